@@ -0,0 +1,108 @@
+"""
+Analisis teks (tokenize -> stem -> buang stopwords) yang dipakai bersama oleh
+indexing (BSBIIndex.parse_block) dan query (BSBIIndex.preprocess_query),
+sehingga dokumen dan query selalu diproses dengan cara yang sama.
+
+Tokenizer dan stemmer dibuat sekali per proses lalu dipakai ulang. Daftar
+stopwords dimuat sekali menjadi frozenset (lookup O(1)), bukan dibaca ulang
+dari corpus NLTK untuk setiap token. Hasil stemming di-memoize dengan cache
+LRU yang ukurannya dibatasi (STEM_CACHE_SIZE), karena vocabulary jauh lebih
+kecil dari banyaknya token.
+
+Seperti sebelumnya, stopwords dibuang SETELAH stemming (term hasil stem
+dibandingkan dengan daftar stopwords), supaya term di index tidak berubah.
+"""
+
+import functools
+import nltk
+from nltk.stem import PorterStemmer
+from nltk.tokenize import RegexpTokenizer
+
+# banyaknya hasil stemming yang disimpan di cache
+STEM_CACHE_SIZE = 1 << 16
+
+_tokenizer = RegexpTokenizer(r'\w+')
+_stemmer = PorterStemmer()
+_stopwords = None
+
+
+def stopwords():
+    """
+    frozenset stopwords bahasa Inggris dari corpus NLTK, dimuat sekali per
+    proses. Corpus harus sudah terpasang saat deploy (lihat nltk.txt); jika
+    belum, LookupError dengan petunjuk instalasinya, karena analisis dokumen
+    dan query tidak boleh mengakses jaringan (mengunduh corpus).
+    """
+    global _stopwords
+    if _stopwords is None:
+        try:
+            words = nltk.corpus.stopwords.words('english')
+        except LookupError:
+            raise LookupError("corpus stopwords NLTK belum terpasang (lihat nltk.txt), "
+                              "pasang dengan: python -m nltk.downloader stopwords") from None
+        _stopwords = frozenset(words)
+    return _stopwords
+
+
+def tokenize(text):
+    """Tokenisasi dengan regex \\w+"""
+    return _tokenizer.tokenize(text)
+
+
+@functools.lru_cache(maxsize=STEM_CACHE_SIZE)
+def stem(token):
+    """Porter stemming (memoized)"""
+    return _stemmer.stem(token)
+
+
+def analyze(text):
+    """
+    Parameters
+    ----------
+    text: str
+        isi dokumen atau query
+
+    Returns
+    -------
+    List[str]
+        term-term hasil tokenisasi dan stemming, tanpa stopwords, sesuai
+        urutan kemunculannya di text
+    """
+    stop = stopwords()
+    return [term for term in map(stem, tokenize(text)) if term not in stop]
+
+
+def analyze_positions(text):
+    """
+    Seperti analyze, tetapi juga mengembalikan posisi setiap term, yaitu
+    urutan token-nya di text. Posisi dihitung sebelum stopwords dibuang,
+    sehingga stopwords meninggalkan celah (dipakai oleh phrase query, lihat
+    boolean.py).
+
+    Returns
+    -------
+    Tuple[List[str], List[int]]
+        term-term (sama dengan analyze(text)) dan posisinya
+    """
+    stop = stopwords()
+    terms, positions = [], []
+    for position, term in enumerate(map(stem, tokenize(text))):
+        if term not in stop:
+            terms.append(term)
+            positions.append(position)
+    return terms, positions
+
+
+if __name__ == '__main__':
+
+    assert "the" in stopwords() and isinstance(stopwords(), frozenset), "stopwords salah"
+    assert tokenize("Lipid metabolism, in toxemia!") == ["Lipid", "metabolism", "in", "toxemia"], "tokenisasi salah"
+    assert analyze("lipid metabolism in toxemia and normal pregnancy") == \
+           ["lipid", "metabol", "toxemia", "normal", "pregnanc"], "analisis salah"
+    assert analyze_positions("lipid metabolism in toxemia") == (["lipid", "metabol", "toxemia"], [0, 1, 3]), \
+           "posisi harus dihitung sebelum stopwords dibuang"
+    # stopwords dibuang setelah stemming
+    assert stem("this") == "thi" and "thi" in analyze("this"), "urutan stem dan stopwords berubah"
+    stem.cache_clear()
+    analyze("children children children")
+    assert stem.cache_info().hits == 2 and stem.cache_info().misses == 1, "cache stem salah"
@@ -0,0 +1,1170 @@
+"""
+Kumpulan micro-benchmark untuk komponen-komponen search engine.
+
+Jalankan dari root repository (index sudah dibangun di folder index/):
+
+    python -m medical_search.TP3.benchmark              # semua benchmark
+    python -m medical_search.TP3.benchmark reader_io    # satu benchmark saja
+"""
+
+import os
+import sys
+import math
+import time
+import shutil
+import pickle
+import tempfile
+import tracemalloc
+import array
+import heapq
+import contextlib
+import threading
+import numpy as np
+
+from .index import InvertedIndexReader, InvertedIndexWriter
+from .compression import StandardPostings, VBEPostings, PForPostings, EliasFanoPostings
+from .bsbi import BSBIIndex
+from .scoring import bm25_impacts
+from .util import sorted_merge_posts_and_tfs
+from .spimi import SPIMIInverter, iter_documents
+from .lexicon import Lexicon, convert, lexicon_path
+from . import analysis
+from .searcher import Searcher
+from .cache import LocalCache, DjangoCache
+from .docstore import DocumentStore, docstore_path, split_path
+from .stats import CollectionStats, stats_path
+from .impact import ImpactIndex, write_impact_index
+from .tombstones import Tombstones, tombstones_path
+from .generations import list_generations
+from .shards import score_partitions, get_executor
+from .boolean import BooleanEvaluator, parse_query, galloping_intersect, GALLOP_RATIO
+from . import experiment
+
+INDEX_DIR = 'index'
+INDEX_NAME = 'main_index'
+
+QUERIES = ["alkylated with radioactive iodoacetate", \
+           "psychodrama for disturbed children", \
+           "lipid metabolism in toxemia and normal pregnancy"]
+
+
+def timeit(fn, repeat):
+    """Menjalankan fn sebanyak repeat kali, mengembalikan rata-rata waktu (detik)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def bench_reader_io(repeat = 200):
+    """
+    Membandingkan I/O per query antara reader lama (yang me-pickle ulang
+    metadata ke file .dict setiap keluar context) dan reader read-only.
+    Benchmark dijalankan pada salinan index di direktori sementara, sehingga
+    index asli tidak tersentuh.
+    """
+    class LegacyReader(InvertedIndexReader):
+        # perilaku lama: menulis ulang metadata setiap __exit__
+        def __exit__(self, exception_type, exception_value, traceback):
+            super().__exit__(exception_type, exception_value, traceback)
+            with open(self.metadata_file_path, 'wb') as f:
+                pickle.dump([self.postings_dict, self.terms, self.doc_length], f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for ext in ['.index', '.dict']:
+            shutil.copy(os.path.join(INDEX_DIR, INDEX_NAME + ext), tmp)
+        metadata_size = os.path.getsize(os.path.join(tmp, INDEX_NAME + '.dict'))
+
+        print("reader_io: open + 1 postings lookup + close, rata-rata dari", repeat, "kali")
+        for Reader, bytes_written in [(LegacyReader, metadata_size), (InvertedIndexReader, 0)]:
+            def query():
+                with Reader(INDEX_NAME, VBEPostings, directory=tmp) as reader:
+                    reader.get_postings_list(reader.terms[0])
+            mtime = os.stat(os.path.join(tmp, INDEX_NAME + '.dict')).st_mtime_ns
+            elapsed = timeit(query, repeat)
+            rewritten = os.stat(os.path.join(tmp, INDEX_NAME + '.dict')).st_mtime_ns != mtime
+            print(f"  {Reader.__name__:22} {elapsed * 1000:8.3f} ms/query   " \
+                  f"metadata ditulis: {bytes_written if rewritten else 0} bytes/query")
+
+
+
+def query_term_ids(queries = QUERIES):
+    """termID dari semua term query yang ada di index (memakai analisis yang sama dengan BSBIIndex)"""
+    bsbi = BSBIIndex(data_dir = 'collection', output_dir = INDEX_DIR, postings_encoding = VBEPostings)
+    bsbi.load()
+    term_ids = []
+    for query in queries:
+        for token in analysis.tokenize(query):
+            term_id = bsbi.term_id_map.get(analysis.stem(token))
+            if term_id is not None:
+                term_ids.append(term_id)
+    return term_ids
+
+
+def bench_postings_mmap(repeat = 2000):
+    """
+    Membandingkan lookup postings dengan seek + read (file) dan dengan slice
+    memoryview dari index yang di-memory-map, untuk semua term pada QUERIES.
+    "fetch" hanya mengambil bytes postings + TF, "fetch + decode" adalah
+    get_postings_list secara utuh.
+    """
+    term_ids = query_term_ids()
+    print("postings_mmap: lookup", len(term_ids), "term query, rata-rata dari", repeat, "kali")
+    for use_mmap in [False, True]:
+        with InvertedIndexReader(INDEX_NAME, VBEPostings, directory=INDEX_DIR, use_mmap=use_mmap) as reader:
+            term_ids = [t for t in term_ids if t in reader.postings_dict]
+            def fetch():
+                for term_id in term_ids:
+                    start_pos, _, length_postings, length_tf = reader.postings_dict[term_id]
+                    if use_mmap:
+                        reader.index_view[start_pos:start_pos + length_postings]
+                        reader.index_view[start_pos + length_postings:start_pos + length_postings + length_tf]
+                    else:
+                        reader.index_file.seek(start_pos)
+                        reader.index_file.read(length_postings)
+                        reader.index_file.read(length_tf)
+            def lookup():
+                for term_id in term_ids:
+                    reader.get_postings_list(term_id)
+            fetch_time = timeit(fetch, repeat)
+            lookup_time = timeit(lookup, repeat)
+        print(f"  {'mmap' if use_mmap else 'seek + read':12} fetch {fetch_time * 1e6 / len(term_ids):8.2f} us/term   " \
+              f"fetch + decode {lookup_time * 1e6 / len(term_ids):8.2f} us/term")
+
+
+
+def bench_lexicon_load(repeat = 20):
+    """
+    Membandingkan waktu muat dan memori (heap Python yang dialokasikan, diukur
+    dengan tracemalloc) antara metadata .dict yang di-unpickle dan lexicon
+    biner yang di-memory-map. Lexicon dibuat dari main_index.dict di direktori
+    sementara. Memori hasil mmap tidak dihitung tracemalloc karena berupa
+    halaman file (page cache) yang dibagi antar proses, bukan heap Python.
+    """
+    def load_pickle():
+        with open(os.path.join(INDEX_DIR, INDEX_NAME + '.dict'), 'rb') as f:
+            return pickle.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy(os.path.join(INDEX_DIR, INDEX_NAME + '.dict'), tmp)
+        convert(INDEX_NAME, tmp)
+        path = lexicon_path(INDEX_NAME, tmp)
+
+        print("lexicon_load: rata-rata dari", repeat, "kali")
+        print(f"  ukuran file: .dict {os.path.getsize(os.path.join(tmp, INDEX_NAME + '.dict'))} bytes, " \
+              f".lexicon {os.path.getsize(path)} bytes")
+        lexicons = []
+        for name, load in [('pickle (.dict)', load_pickle), ('lexicon (mmap)', lambda: lexicons.append(Lexicon(path)))]:
+            elapsed = timeit(load, repeat)
+            tracemalloc.start()
+            metadata = load()
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"  {name:16} {elapsed * 1000:8.3f} ms   heap {current / 1024:10.1f} KiB")
+            metadata = None
+        for lexicon in lexicons:
+            lexicon.close()
+
+
+
+def collection_queries(n = 100):
+    """Mengambil judul (baris pertama) dari n dokumen di collection/ sebagai query"""
+    paths = sorted(os.path.join(root, file) for root, _, files in os.walk('collection') for file in files)
+    queries = []
+    for path in paths[::max(1, len(paths) // n)][:n]:
+        with open(path, 'r') as f:
+            queries.append(f.readline().strip())
+    return queries
+
+
+def retrieve_bm25_loop(bsbi, query_list, k = 10, k1 = 1.6, b = 0.75):
+    """
+    Implementasi BM25 lama (loop Python per posting + sort seluruh hasil),
+    dipakai sebagai pembanding pada benchmark scoring.
+    """
+    dict1 = {}
+    with bsbi.open_reader() as reader:
+        avg_doc_length = bsbi.avg_doc_length
+        for term in query_list:
+            term_id = bsbi.term_id_map.get(term)
+            if term_id not in reader.postings_dict:
+                continue
+            postings_list, tf_list = reader.get_postings_list(term_id)
+            N = len(reader.doc_length)
+            wtq = math.log(N/len(postings_list), 10)
+            for i in range(len(postings_list)):
+                normalization = (1-b)+b*((reader.doc_length[postings_list[i]])/avg_doc_length)
+                okapibm25 = wtq*(k1+1)*tf_list[i]/((k1*normalization)+tf_list[i])
+                if postings_list[i] in dict1:
+                    dict1[postings_list[i]] += okapibm25
+                else:
+                    dict1[postings_list[i]] = okapibm25
+    result = sorted(dict1.items(), key=lambda x: x[1], reverse=True)[:k]
+    return [(score, bsbi.doc_id_map[doc_id]) for doc_id, score in result]
+
+
+def query_terms(query):
+    """Analisis query (tokenize, stem, buang stopwords) seperti pada BSBIIndex"""
+    return analysis.analyze(query)
+
+
+def same_ranking(result1, result2):
+    """
+    Dua hasil retrieval dianggap sama jika score di setiap rank sama
+    (toleransi floating point), dan dokumen di setiap rank sama kecuali
+    untuk dokumen-dokumen dengan score yang sama (ties).
+    """
+    if len(result1) != len(result2):
+        return False
+    for (score1, _), (score2, _) in zip(result1, result2):
+        if not math.isclose(score1, score2, rel_tol=1e-9, abs_tol=1e-12):
+            return False
+    groups = {}
+    for (score, doc1), (_, doc2) in zip(result1, result2):
+        group = groups.setdefault(round(score, 9), [[], []])
+        group[0].append(doc1)
+        group[1].append(doc2)
+    # ties di rank terakhir boleh berbeda dokumennya (terpotong oleh k)
+    last = round(result1[-1][0], 9) if result1 else None
+    return all(sorted(d1) == sorted(d2) for score, (d1, d2) in groups.items() if score != last)
+
+
+def bench_scoring(k = 1000, repeat = 3):
+    """
+    Membandingkan BM25 loop Python (implementasi lama) dengan scoring engine
+    NumPy (BSBIIndex.retrieve_bm25) pada query-query dari collection/, dan
+    memastikan hasil keduanya sama.
+    """
+    queries = [query_terms(query) for query in collection_queries()]
+    bsbi = BSBIIndex(data_dir = 'collection', output_dir = INDEX_DIR, postings_encoding = VBEPostings).open()
+    def retrieve_numpy(query_list):
+        return [(score, bsbi.doc_id_map[doc_id]) for score, doc_id in bsbi.score_bm25(query_list).top_k(k)]
+    for query_list in queries:
+        assert same_ranking(retrieve_bm25_loop(bsbi, query_list, k = k), retrieve_numpy(query_list)), query_list
+    print("scoring:", len(queries), "query dari collection/, k =", k, "(hasil identik; tanpa analisis query)")
+    # query dari term-term dengan df terbesar (postings list terpanjang)
+    frequent = sorted(bsbi.reader.postings_dict.keys(), key=lambda t: -bsbi.reader.postings_dict[t][1])[:50]
+    frequent_queries = [[bsbi.term_id_map[t] for t in frequent[i:i + 5]] for i in range(0, 50, 5)]
+    for query_list in frequent_queries:
+        assert same_ranking(retrieve_bm25_loop(bsbi, query_list, k = k), retrieve_numpy(query_list)), query_list
+    for label, query_set in [('judul dokumen', queries), ('5 term df terbesar', frequent_queries)]:
+        print(f"  query: {label}")
+        for name, retrieve in [('loop Python', lambda q: retrieve_bm25_loop(bsbi, q, k = k)), \
+                               ('NumPy', retrieve_numpy)]:
+            elapsed = timeit(lambda: [retrieve(query) for query in query_set], repeat)
+            print(f"    {name:12} {elapsed * 1000 / len(query_set):8.3f} ms/query")
+    bsbi.close()
+
+
+
+def bench_wand(repeat = 3):
+    """
+    Membandingkan BM25 exhaustive (TaaT, ScoreAccumulator) dengan DaaT + WAND:
+    hasil top-K harus sama persis, lalu dilaporkan banyaknya posting yang
+    dievaluasi dan latency per query.
+    """
+    queries = [query_terms(query) for query in collection_queries()]
+    bsbi = BSBIIndex(data_dir = 'collection', output_dir = INDEX_DIR, postings_encoding = VBEPostings).open()
+    def df(query_list):
+        term_ids = [bsbi.term_id_map.get(term) for term in query_list]
+        return sum(bsbi.reader.postings_dict[t][1] for t in term_ids if t in bsbi.reader.postings_dict)
+
+    print("wand:", len(queries), "query dari collection/")
+    for k in [10, 100]:
+        for query_list in queries:
+            assert bsbi.wand_bm25(query_list, k)[0] == bsbi.score_bm25(query_list).top_k(k), query_list
+        exhaustive = sum(df(query_list) for query_list in queries)
+        evaluated = sum(bsbi.wand_bm25(query_list, k)[1] for query_list in queries)
+        taat = timeit(lambda: [bsbi.score_bm25(q).top_k(k) for q in queries], repeat)
+        daat = timeit(lambda: [bsbi.wand_bm25(q, k) for q in queries], repeat)
+        print(f"  k = {k:4} (hasil identik)")
+        print(f"    exhaustive   {exhaustive / len(queries):8.1f} posting/query   {taat * 1000 / len(queries):8.3f} ms/query")
+        print(f"    WAND         {evaluated / len(queries):8.1f} posting/query   {daat * 1000 / len(queries):8.3f} ms/query")
+    bsbi.close()
+
+
+def bench_block_max(block_size = 64, repeat = 3):
+    """
+    Membangun ulang merged index dengan postings list per block (block_size)
+    di direktori sementara dari intermediate index yang sudah ada, lalu
+    membandingkan WAND pada index biasa dengan WAND dan Block-Max WAND pada
+    index per block. Hasil top-K harus sama dengan BM25 exhaustive.
+    """
+    queries = [query_terms(query) for query in collection_queries()]
+    with tempfile.TemporaryDirectory() as tmp:
+        for file in os.listdir(INDEX_DIR):
+            if file.startswith('intermediate_index_') or file in ['terms.dict', 'docs.dict']:
+                shutil.copy(os.path.join(INDEX_DIR, file), tmp)
+        BSBIIndex(data_dir = 'collection', output_dir = tmp, postings_encoding = VBEPostings, \
+                  block_size = block_size).merge_index()
+        flat = BSBIIndex(data_dir = 'collection', output_dir = INDEX_DIR, postings_encoding = VBEPostings).open()
+        blocked = BSBIIndex(data_dir = 'collection', output_dir = tmp, postings_encoding = VBEPostings).open()
+        frequent = sorted(flat.reader.postings_dict.keys(), key=lambda t: -flat.reader.postings_dict[t][1])[:50]
+        frequent_queries = [[flat.term_id_map[t] for t in frequent[i:i + 5]] for i in range(0, 50, 5)]
+
+        print(f"block_max: block_size = {block_size}, ukuran index {os.path.getsize(os.path.join(INDEX_DIR, INDEX_NAME + '.index'))}" \
+              f" -> {os.path.getsize(os.path.join(tmp, INDEX_NAME + '.index'))} bytes")
+        for label, query_set in [('judul dokumen', queries), ('5 term df terbesar', frequent_queries)]:
+            for k in [10, 100]:
+                print(f"  query: {label}, k = {k} (hasil identik)")
+                for name, bsbi, block_max in [('WAND', flat, False), ('WAND (block)', blocked, False), \
+                                              ('Block-Max WAND', blocked, True)]:
+                    for query_list in query_set:
+                        assert bsbi.wand_bm25(query_list, k, block_max)[0] == flat.score_bm25(query_list).top_k(k), query_list
+                    evaluated = sum(bsbi.wand_bm25(query_list, k, block_max)[1] for query_list in query_set)
+                    elapsed = timeit(lambda: [bsbi.wand_bm25(q, k, block_max) for q in query_set], repeat)
+                    print(f"    {name:16} {evaluated / len(query_set):8.1f} posting/query   " \
+                          f"{elapsed * 1000 / len(query_set):8.3f} ms/query")
+        flat.close()
+        blocked.close()
+
+
+def bench_parallel_index(worker_counts = None):
+    """
+    Membangun index dari collection/ di direktori sementara secara serial dan
+    dengan beberapa worker process (BSBIIndex.index(workers)), melaporkan
+    wall-clock time dan speedup, serta memastikan semua file index yang
+    dihasilkan identik byte per byte dengan indexing serial.
+    """
+    def read(path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    if worker_counts is None:
+        worker_counts = sorted({2, os.cpu_count() or 1} - {1})
+    print(f"parallel_index: {os.cpu_count()} CPU")
+    with tempfile.TemporaryDirectory() as tmp:
+        outputs = {}
+        for workers in [1] + list(worker_counts):
+            output_dir = os.path.join(tmp, str(workers))
+            os.mkdir(output_dir)
+            start = time.perf_counter()
+            BSBIIndex(data_dir = 'collection', output_dir = output_dir, postings_encoding = VBEPostings).index(workers = workers)
+            elapsed = time.perf_counter() - start
+            outputs[workers] = output_dir
+            files = sorted(os.listdir(output_dir))
+            identical = files == sorted(os.listdir(outputs[1])) and \
+                        all(read(os.path.join(output_dir, file)) == read(os.path.join(outputs[1], file)) for file in files)
+            if workers == 1:
+                serial = elapsed
+            print(f"  workers = {workers:2}   {elapsed:8.2f} s   speedup {serial / elapsed:5.2f}x   " \
+                  f"identik dengan serial: {identical}")
+            assert identical, "index paralel berbeda dengan index serial"
+
+
+def analyze_legacy(text):
+    """
+    Analisis teks versi lama (sebelum analysis.py): tokenizer dan stemmer
+    dibuat ulang setiap pemanggilan, dan daftar stopwords dibaca ulang dari
+    corpus NLTK lalu dicari secara linear untuk setiap token.
+    """
+    import nltk
+    from nltk.stem import PorterStemmer
+    from nltk.tokenize import RegexpTokenizer
+    ps = PorterStemmer()
+    tokenizer = RegexpTokenizer(r'\w+')
+    stemmed = [ps.stem(word) for word in tokenizer.tokenize(text)]
+    return [word for word in stemmed if word not in nltk.corpus.stopwords.words('english')]
+
+
+def bench_analysis(legacy_docs = 50, repeat = 3):
+    """
+    Throughput analisis dokumen (token/detik, seperti pada parse_block) dan
+    latency analisis query (seperti pada preprocess_query), versi lama
+    (analyze_legacy) dibandingkan dengan analysis.analyze. Versi lama sangat
+    lambat sehingga hanya diukur pada legacy_docs dokumen pertama. Versi
+    lama juga memanggil nltk.download('stopwords') di setiap query BM25;
+    biaya jaringan tersebut TIDAK ikut diukur di sini.
+    """
+    paths = sorted(os.path.join(root, file) for root, _, files in os.walk('collection') for file in files)
+    docs = []
+    for path in paths:
+        with open(path, 'r') as f:
+            docs.append(f.read())
+    queries = collection_queries()
+    for text in docs[:legacy_docs] + queries:
+        assert analyze_legacy(text) == analysis.analyze(text), text
+
+    print("analysis: hasil analisis identik dengan versi lama")
+    tokens = sum(len(analysis.tokenize(text)) for text in docs[:legacy_docs])
+    elapsed = timeit(lambda: [analyze_legacy(text) for text in docs[:legacy_docs]], 1)
+    print(f"  dokumen  lama           {tokens / elapsed:12.0f} token/s   ({legacy_docs} dokumen)")
+    tokens = sum(len(analysis.tokenize(text)) for text in docs)
+    analysis.stem.cache_clear()
+    elapsed = timeit(lambda: [analysis.analyze(text) for text in docs], 1)
+    print(f"  dokumen  analysis.py    {tokens / elapsed:12.0f} token/s   ({len(docs)} dokumen, cache stem kosong)")
+    elapsed = timeit(lambda: [analysis.analyze(text) for text in docs], repeat)
+    print(f"  dokumen  analysis.py    {tokens / elapsed:12.0f} token/s   ({len(docs)} dokumen, cache stem terisi)")
+    for name, analyze in [('lama', analyze_legacy), ('analysis.py', analysis.analyze)]:
+        elapsed = timeit(lambda: [analyze(query) for query in queries], repeat)
+        print(f"  query    {name:14} {elapsed * 1e6 / len(queries):12.1f} us/query")
+
+
+def bench_result_cache(num_queries = 20, pages = 5, rounds = 3):
+    """
+    Mensimulasikan pengguna yang mengulang query dan membuka beberapa halaman
+    hasil (seperti views.search, max_results = 1000): setiap query dari
+    collection/ dibuka halaman 1 s.d. pages, diulang rounds kali. Latency per
+    request dan hit rate dibandingkan antara Searcher tanpa cache, dengan
+    LocalCache, dan dengan DjangoCache (LocMemCache). Hasil ketiganya harus
+    sama.
+    """
+    from django.conf import settings
+    if not settings.configured:
+        settings.configure(CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    queries = collection_queries(num_queries)
+    requests = [(query, page * 10) for _ in range(rounds) for query in queries for page in range(pages)]
+    print("result_cache:", len(requests), "request (", num_queries, "query x", pages, "halaman x", rounds, "kali )")
+    expected = None
+    for name, cache in [('tanpa cache', None), ('LocalCache', LocalCache()), ('DjangoCache', DjangoCache())]:
+        if cache is not None:
+            cache.clear()
+        searcher = Searcher(data_dir = 'collection', output_dir = INDEX_DIR, postings_encoding = VBEPostings, cache = cache)
+        start = time.perf_counter()
+        results = [searcher.search_bm25(query, offset, 10, max_results = 1000) for query, offset in requests]
+        elapsed = time.perf_counter() - start
+        results = [(total, [(hit.score, hit.path) for hit in hits]) for total, hits in results]
+        expected = expected or results
+        assert results == expected, name
+        hit_rate = f"hit rate {cache.stats()['hit_rate']:.2f}" if cache is not None else ""
+        print(f"  {name:12} {elapsed * 1000 / len(requests):8.3f} ms/request   {hit_rate}")
+        searcher.index.close()
+
+
+def bench_snippets(num_queries = 20, repeat = 3):
+    """
+    Latency satu halaman hasil (10 dokumen) dari query sampai snippet siap
+    dirender, untuk:
+
+        semua hasil   : alur lama views.search, membaca isi 1000 dokumen
+                        teratas lalu memotong 500 karakter pertama
+        halaman, awal : hanya 10 dokumen di halaman yang dibaca, snippet
+                        berupa 500 karakter pertama
+        Hit, lazy     : Searcher.search_bm25 + Hit.snippet (query-biased)
+
+    Dilaporkan juga persentase snippet yang memuat paling sedikit satu term
+    query.
+    """
+    queries = collection_queries(num_queries)
+    searcher = Searcher(data_dir = 'collection', output_dir = INDEX_DIR, postings_encoding = VBEPostings)
+    def prefix(path):
+        with open(os.path.join(*split_path(path)), 'r') as f:
+            content = f.read()
+        return content[:500] + " ..." if len(content) > 500 else content
+    def all_results(query):
+        _, hits = searcher.search_bm25(query, 0, 1000, max_results = 1000)
+        return [prefix(hit.path) for hit in hits][:10]
+    def page_prefix(query):
+        _, hits = searcher.search_bm25(query, 0, 10, max_results = 1000)
+        return [prefix(hit.path) for hit in hits]
+    def page_lazy(query):
+        _, hits = searcher.search_bm25(query, 0, 10, max_results = 1000)
+        return [hit.snippet for hit in hits]
+
+    print("snippets:", len(queries), "query dari collection/, halaman pertama (10 hasil)")
+    for name, page in [('semua hasil', all_results), ('halaman, awal', page_prefix), ('Hit, lazy', page_lazy)]:
+        elapsed = timeit(lambda: [page(query) for query in queries], repeat)
+        covered = total = 0
+        for query in queries:
+            terms = set(analysis.analyze(query))
+            for snippet in page(query):
+                covered += bool(terms & {analysis.stem(token) for token in analysis.tokenize(snippet)})
+                total += 1
+        print(f"  {name:14} {elapsed * 1000 / len(queries):8.3f} ms/halaman   " \
+              f"snippet memuat term query: {covered * 100 / total:5.1f}%")
+    searcher.index.close()
+
+
+def bench_docstore(num_queries = 20, repeat = 3):
+    """
+    Membandingkan pembacaan isi dokumen hasil pencarian dari file per
+    dokumen (open + read) dengan document store (mmap, tanpa kompresi dan
+    zlib) yang dibangun di direktori sementara: isi lengkap top-1000 dokumen
+    dan 500 karakter pertama 10 dokumen di halaman pertama. Isi dokumen dari
+    ketiganya harus sama.
+    """
+    queries = collection_queries(num_queries)
+    bsbi = BSBIIndex(data_dir = 'collection', output_dir = INDEX_DIR, postings_encoding = VBEPostings).open()
+    results = [[doc_id for _, doc_id in bsbi.score_bm25(analysis.analyze(query)).top_k(1000)] for query in queries]
+    def read_file(doc_id):
+        with open(os.path.join(*split_path(bsbi.doc_id_map[doc_id])), 'r') as f:
+            return f.read()
+
+    print("docstore:", len(queries), "query dari collection/")
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = {}
+        for compression in ['none', 'zlib']:
+            output = BSBIIndex(data_dir = 'collection', output_dir = tmp, postings_encoding = VBEPostings, \
+                               index_name = compression)
+            output.doc_id_map = bsbi.doc_id_map
+            output.build_docstore(compression)
+            stores[compression] = DocumentStore(docstore_path(compression, tmp))
+            print(f"  ukuran docstore ({compression:4}): {os.path.getsize(docstore_path(compression, tmp))} bytes")
+        for doc_id in range(len(bsbi.doc_id_map)):
+            assert stores['none'].body(doc_id) == stores['zlib'].body(doc_id) == read_file(doc_id), doc_id
+        methods = [('file', read_file, lambda doc_id: read_file(doc_id)[:500])] + \
+                  [(f"docstore ({name})", store.body, lambda doc_id, store = store: store.prefix(doc_id, 500)) \
+                   for name, store in stores.items()]
+        for name, body, prefix in methods:
+            full = timeit(lambda: [[body(doc_id) for doc_id in top] for top in results], repeat)
+            page = timeit(lambda: [[prefix(doc_id) for doc_id in top[:10]] for top in results], repeat)
+            print(f"  {name:18} top-1000 lengkap {full * 1000 / len(queries):8.3f} ms/query   " \
+                  f"halaman (prefix) {page * 1000 / len(queries):8.3f} ms/query")
+        for store in stores.values():
+            store.close()
+    bsbi.close()
+
+
+class LegacyVBEPostings(VBEPostings):
+    """VBEPostings sebelum encode/decode bulk dan vectorized (untuk perbandingan)"""
+    @staticmethod
+    def vb_encode_number(number):
+        bytes = []
+        while True:
+            bytes.insert(0, number % 128)
+            if number < 128:
+                break
+            number = number // 128
+        bytes[-1] += 128
+        return array.array('B', bytes).tobytes()
+
+    @staticmethod
+    def vb_encode(list_of_numbers):
+        return b"".join([LegacyVBEPostings.vb_encode_number(number) for number in list_of_numbers])
+
+    @staticmethod
+    def encode(postings_list):
+        gap_based_list = [postings_list[0]]
+        for i in range(len(postings_list)-1):
+            gap_based_list.append(postings_list[i+1] - postings_list[i])
+        return LegacyVBEPostings.vb_encode(gap_based_list)
+
+    @staticmethod
+    def encode_tf(tf_list):
+        return LegacyVBEPostings.vb_encode(tf_list)
+
+    @staticmethod
+    def vb_decode(encoded_bytestream):
+        numbers = []
+        n = 0
+        for byte in encoded_bytestream:
+            if (byte < 128):
+                n = 128*n + byte
+            else:
+                n = 128*n + (byte - 128)
+                numbers.append(n)
+                n = 0
+        return numbers
+
+    @staticmethod
+    def decode(encoded_postings_list):
+        gap_based_list = LegacyVBEPostings.vb_decode(encoded_postings_list)
+        postings_list = [gap_based_list[0]]
+        for i in range(len(gap_based_list)-1):
+            postings_list.append(postings_list[i] + gap_based_list[i+1])
+        return postings_list
+
+    @staticmethod
+    def decode_tf(encoded_tf_list):
+        return LegacyVBEPostings.vb_decode(encoded_tf_list)
+
+
+def bench_codec(repeat = 3):
+    """
+    Throughput encode/decode VBEPostings (MB bytestream/detik dan juta
+    integer/detik) untuk semua postings list dan TF list di index, dan untuk
+    satu postings list sintetis yang panjang. Dibandingkan dengan
+    implementasi lama (LegacyVBEPostings); decode_array mengembalikan NumPy
+    array tanpa melalui list.
+    """
+    with InvertedIndexReader(INDEX_NAME, VBEPostings, directory=INDEX_DIR) as reader:
+        index_lists = [reader.get_postings_list(term) for term in reader.terms]
+    synthetic = list(range(0, 20_000_000, 7))
+    workloads = [("semua term di index", index_lists), \
+                 ("1 postings list panjang", [(synthetic, [1 + i % 50 for i in range(len(synthetic))])])]
+
+    for workload, lists in workloads:
+        encoded = [(VBEPostings.encode(postings), VBEPostings.encode_tf(tfs)) for postings, tfs in lists]
+        assert encoded == [(LegacyVBEPostings.encode(postings), LegacyVBEPostings.encode_tf(tfs)) \
+                           for postings, tfs in lists], "format encoding berubah"
+        num_bytes = sum(len(p) + len(t) for p, t in encoded)
+        num_ints = sum(2 * len(postings) for postings, _ in lists)
+        print(f"codec: {workload} ({len(lists)} list, {num_ints} integer, {num_bytes / 1e6:.2f} MB)")
+        for name, Postings in [("legacy", LegacyVBEPostings), ("VBEPostings", VBEPostings)]:
+            encode = timeit(lambda: [(Postings.encode(postings), Postings.encode_tf(tfs)) for postings, tfs in lists], repeat)
+            decode = timeit(lambda: [(Postings.decode(p), Postings.decode_tf(t)) for p, t in encoded], repeat)
+            print(f"  {name:12} encode {num_bytes / encode / 1e6:7.2f} MB/s {num_ints / encode / 1e6:7.2f} M int/s   " \
+                  f"decode {num_bytes / decode / 1e6:7.2f} MB/s {num_ints / decode / 1e6:7.2f} M int/s")
+        decode = timeit(lambda: [(VBEPostings.decode_array(p), VBEPostings.decode_tf_array(t)) for p, t in encoded], repeat)
+        print(f"  {'decode_array':12} {'':37}   " \
+              f"decode {num_bytes / decode / 1e6:7.2f} MB/s {num_ints / decode / 1e6:7.2f} M int/s")
+
+
+def bench_codecs(repeat = 3):
+    """
+    Membangun index dari collection/ dengan setiap postings codec
+    (BSBIIndex(postings_encoding=...)) di direktori sementara, lalu
+    melaporkan ukuran index, waktu indexing, throughput decoding semua
+    postings list (list dan NumPy array), dan latency query BM25 (TaaT)
+    serta WAND. Hasil top-10 semua codec harus sama.
+    """
+    queries = [query_terms(query) for query in collection_queries()]
+    print("codecs: index dari collection/,", len(queries), "query dari collection/, k = 10 (hasil identik)")
+    with tempfile.TemporaryDirectory() as tmp:
+        reference = None
+        for Postings in [StandardPostings, VBEPostings, PForPostings, EliasFanoPostings]:
+            output_dir = os.path.join(tmp, Postings.__name__)
+            os.mkdir(output_dir)
+            start = time.perf_counter()
+            BSBIIndex(data_dir = 'collection', output_dir = output_dir, postings_encoding = Postings).index()
+            build = time.perf_counter() - start
+            bsbi = BSBIIndex(data_dir = 'collection', output_dir = output_dir, postings_encoding = Postings).open()
+            reader = bsbi.reader
+            num_ints = sum(2 * reader.postings_dict[term][1] for term in reader.terms)
+            decode_list = timeit(lambda: [reader.get_postings_list(term) for term in reader.terms], repeat)
+            decode_array = timeit(lambda: [reader.get_postings_arrays(term) for term in reader.terms], repeat)
+            results = [bsbi.score_bm25(query_list).top_k(10) for query_list in queries]
+            if reference is None:
+                reference = results
+            assert results == reference, f"hasil {Postings.__name__} berbeda"
+            taat = timeit(lambda: [bsbi.score_bm25(q).top_k(10) for q in queries], repeat)
+            wand = timeit(lambda: [bsbi.wand_bm25(q, 10) for q in queries], repeat)
+            print(f"  {Postings.__name__:18} index {os.path.getsize(os.path.join(output_dir, INDEX_NAME + '.index')):8} bytes" \
+                  f"   build {build:6.2f} s" \
+                  f"   decode list {num_ints / decode_list / 1e6:5.2f} / array {num_ints / decode_array / 1e6:5.2f} M int/s" \
+                  f"   BM25 {taat * 1000 / len(queries):6.3f} ms/query   WAND {wand * 1000 / len(queries):6.3f} ms/query")
+            bsbi.close()
+
+
+def bench_collection_stats(repeat = 20):
+    """
+    Biaya menyiapkan statistik koleksi (N, avgdl, normalisasi panjang BM25)
+    untuk sebuah instance BSBIIndex: dimuat dari file .stats yang ditulis
+    saat indexing, dibandingkan dengan dihitung dari metadata index (cara
+    lama: menjumlahkan seluruh doc_length), dan dengan menghitung semuanya
+    termasuk cf (yang dilakukan sekali saat indexing).
+    """
+    print("collection_stats: rata-rata dari", repeat, "kali")
+    with InvertedIndexReader(INDEX_NAME, directory=INDEX_DIR, use_mmap=True) as reader:
+        def legacy():
+            # seperti implementasi lama: N = len(doc_length), avgdl dari seluruh doc_length
+            doc_length = reader.doc_length
+            total = 0
+            for val in doc_length.values():
+                total += val
+            return len(doc_length), total / len(doc_length)
+        for name, fn in [("scan doc_length (lama)", legacy), \
+                         ("dari metadata", lambda: CollectionStats.from_reader(reader, with_cf = False)), \
+                         ("build (dengan cf)", lambda: CollectionStats.from_reader(reader)), \
+                         ("load file .stats", lambda: CollectionStats.load(stats_path(INDEX_NAME, INDEX_DIR)))]:
+            print(f"  {name:24} {timeit(fn, repeat) * 1000:8.3f} ms")
+
+
+def bench_impact(k = 10, repeat = 3):
+    """
+    Membandingkan BM25 exact (TaaT, ScoreAccumulator) dengan index impact
+    (impact.py) 8 dan 16 bit yang dievaluasi score-at-a-time, dengan dan
+    tanpa early termination (max_postings). Belum ada qrels di repository,
+    sehingga yang diukur BUKAN efektivitas (relevansi), melainkan kesamaan
+    hasil dengan top-K BM25 exact: dokumen dihitung cocok jika ada di top-K
+    exact, lalu dihitung RBP, DCG dan AP (experiment.py) yang dinormalisasi
+    dengan score ranking exact, serta overlap@K.
+    """
+    queries = [query_terms(query) for query in collection_queries()]
+    bsbi = BSBIIndex(data_dir = 'collection', output_dir = INDEX_DIR).open()
+    exact = [[doc_id for _, doc_id in bsbi.score_bm25(query_list).top_k(k)] for query_list in queries]
+    postings = [sum(bsbi.reader.postings_dict[t][1] for t in [bsbi.term_id_map.get(term) for term in query_list] \
+                    if t in bsbi.reader.postings_dict) for query_list in queries]
+    metrics = [('RBP', experiment.rbp), ('DCG', experiment.dcg), ('AP', experiment.ap)]
+
+    def agreement(results):
+        """Kesamaan results dengan top-K BM25 exact (bukan relevansi)"""
+        totals = dict.fromkeys([name for name, _ in metrics] + ['overlap'], 0.0)
+        for result, reference in zip(results, exact):
+            if not reference:
+                continue
+            ranking = [int(doc_id in reference) for _, doc_id in result]
+            ideal = [1] * len(reference)
+            for name, metric in metrics:
+                totals[name] += metric(ranking) / metric(ideal) if sum(ranking) else 0.0
+            totals['overlap'] += sum(ranking) / len(reference)
+        evaluated = sum(1 for reference in exact if reference)
+        return "vs exact: " + "   ".join(f"{name} {total / evaluated:5.3f}" for name, total in totals.items())
+
+    taat = timeit(lambda: [bsbi.score_bm25(q).top_k(k) for q in queries], repeat)
+    print("impact:", len(queries), "query dari collection/, k =", k, "(kesamaan dengan top-K BM25 exact, bukan relevansi)")
+    print(f"  {'exact BM25':22} {sum(postings) / len(queries):8.1f} posting/query   {taat * 1000 / len(queries):7.3f} ms/query")
+    with tempfile.TemporaryDirectory() as tmp:
+        for bits in [8, 16]:
+            write_impact_index(bsbi.reader, bsbi.stats, INDEX_NAME, tmp, bits = bits)
+            impact_index = ImpactIndex(INDEX_NAME, tmp)
+            size = os.path.getsize(os.path.join(tmp, INDEX_NAME + '.impacts'))
+            print(f"  {bits} bit: {size} bytes")
+            term_ids = [[bsbi.term_id_map.get(term) for term in query_list] for query_list in queries]
+            for fraction in [None, 0.5, 0.2]:
+                def run():
+                    return [impact_index.score_at_a_time(t, k, max_postings = None if fraction is None \
+                                                         else max(1, int(fraction * n))) for t, n in zip(term_ids, postings)]
+                results = run()
+                elapsed = timeit(run, repeat)
+                processed = sum(p for _, p in results)
+                label = "SaaT" if fraction is None else f"SaaT {int(fraction * 100)}% posting"
+                print(f"    {label:20} {processed / len(queries):8.1f} posting/query   {elapsed * 1000 / len(queries):7.3f} ms/query   " \
+                      + agreement([top for top, _ in results]))
+            impact_index.close()
+    bsbi.close()
+
+
+def merge_legacy(bsbi, indices, merged_index):
+    """
+    Implementasi BSBIIndex.merge lama (heapq.merge atas seluruh isi
+    intermediate indices, lalu sorted_merge_posts_and_tfs berpasangan untuk
+    setiap term yang muncul lagi), dipakai sebagai pembanding pada benchmark
+    merge.
+    """
+    doc_length = {}
+    for index in indices:
+        doc_length.update(index.doc_length)
+    avg_doc_length = bsbi.calculate_average_doc_length(doc_length)
+    def append(term, postings, tf_list):
+        impacts = bm25_impacts(np.array(tf_list, dtype=np.float64), \
+                               np.array([doc_length[doc_id] for doc_id in postings], dtype=np.float64), \
+                               avg_doc_length)
+        merged_index.append(term, postings, tf_list, impacts = impacts.tolist())
+
+    merged_iter = heapq.merge(*indices, key = lambda x: x[0])
+    curr, postings, tf_list = next(merged_iter)
+    for t, postings_, tf_list_ in merged_iter:
+        if t == curr:
+            zip_p_tf = sorted_merge_posts_and_tfs(list(zip(postings, tf_list)), \
+                                                  list(zip(postings_, tf_list_)))
+            postings = [doc_id for (doc_id, _) in zip_p_tf]
+            tf_list = [tf for (_, tf) in zip_p_tf]
+        else:
+            append(curr, postings, tf_list)
+            curr, postings, tf_list = t, postings_, tf_list_
+    append(curr, postings, tf_list)
+
+
+def bench_merge(counts = (2, 8, 32, 128, 512), repeat = 3):
+    """
+    Merge time terhadap banyaknya intermediate indices. Dokumen di merged
+    index dibagi menjadi n rentang docID yang sama besar, lalu setiap
+    rentang ditulis sebagai satu intermediate index (seperti satu block
+    BSBI). Intermediate indices tersebut di-merge dengan BSBIIndex.merge dan
+    dengan implementasi lama (merge_legacy); merged index yang dihasilkan
+    harus identik byte per byte. Dilaporkan juga puncak alokasi memori
+    (tracemalloc) selama merge.
+    """
+    bsbi = BSBIIndex(data_dir = 'collection', output_dir = INDEX_DIR)
+    with InvertedIndexReader(INDEX_NAME, directory = INDEX_DIR) as reader:
+        lists = {term: reader.get_postings_arrays(term) for term in reader.terms}
+        num_docs = len(reader.doc_length)
+    print("merge:", num_docs, "dokumen,", len(lists), "term")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in counts:
+            bounds = np.linspace(0, num_docs, n + 1).astype(np.int64)
+            names = [f'intermediate_{i}' for i in range(n)]
+            for i, name in enumerate(names):
+                with InvertedIndexWriter(name, VBEPostings, directory = tmp) as index:
+                    for term, (postings, tfs) in lists.items():
+                        start, end = np.searchsorted(postings, bounds[i:i + 2])
+                        if start < end:
+                            index.append(term, postings[start:end].tolist(), tfs[start:end].astype(np.int64).tolist())
+            outputs = {}
+            print(f"  {n:4} intermediate indices")
+            for label, merge in [('lama', lambda indices, merged: merge_legacy(bsbi, indices, merged)), \
+                                 ('k-way', bsbi.merge)]:
+                def run():
+                    with InvertedIndexWriter(label, VBEPostings, directory = tmp) as merged:
+                        with contextlib.ExitStack() as stack:
+                            merge([stack.enter_context(InvertedIndexReader(name, directory = tmp)) for name in names], merged)
+                elapsed = timeit(run, repeat)
+                tracemalloc.start()
+                run()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                with open(os.path.join(tmp, label + '.index'), 'rb') as f:
+                    outputs[label] = f.read()
+                print(f"    {label:8} {elapsed * 1000:9.1f} ms   puncak alokasi {peak / 1024:9.1f} KiB")
+            assert outputs['lama'] == outputs['k-way'], "merged index berbeda"
+
+
+def bench_spimi(budgets = (64 << 10, 256 << 10, 1 << 20, 16 << 20)):
+    """
+    Inversion BSBI (satu block per folder, parse_block + invert_write)
+    dibandingkan dengan SPIMI (spimi.py) dengan beberapa memory budget,
+    pada collection/ dan pada salinannya yang berupa satu folder saja.
+    Dilaporkan waktu inversion (tanpa merge), banyaknya intermediate index,
+    dan puncak alokasi memori (tracemalloc, diukur pada run terpisah).
+    Untuk collection/, merged index hasil semua konfigurasi harus identik;
+    BSBI tidak meng-index dokumen yang tidak berada di sub-folder.
+    """
+    def invert_bsbi(bsbi):
+        for block_dir_relative in sorted(next(os.walk(bsbi.data_dir))[1]):
+            td_pairs = bsbi.parse_block(block_dir_relative)
+            index_id = 'intermediate_index_' + block_dir_relative
+            bsbi.intermediate_indices.append(index_id)
+            with InvertedIndexWriter(index_id, bsbi.writer_encoding, directory = bsbi.output_dir) as index:
+                bsbi.invert_write(td_pairs, index)
+
+    def invert_spimi(budget):
+        def invert(bsbi):
+            inverter = SPIMIInverter(bsbi.term_id_map, bsbi.doc_id_map, bsbi.output_dir, bsbi.writer_encoding, budget)
+            bsbi.intermediate_indices.extend(inverter.invert(iter_documents(bsbi.data_dir)))
+        return invert
+
+    with tempfile.TemporaryDirectory() as tmp:
+        flat = os.path.join(tmp, 'flat')
+        os.mkdir(flat)
+        for root, _, files in os.walk('collection'):
+            for file in files:
+                shutil.copy(os.path.join(root, file), os.path.join(flat, os.path.relpath(root, 'collection') + '_' + file))
+        for data_dir in ['collection', flat]:
+            print("spimi:", 'collection/' if data_dir == 'collection' else 'satu folder', \
+                  f"({sum(len(files) for _, _, files in os.walk(data_dir))} dokumen)")
+            reference = None
+            configs = [('BSBI per folder', invert_bsbi)] + \
+                      [(f'SPIMI {budget >> 10} KiB', invert_spimi(budget)) for budget in budgets]
+            for label, invert in configs:
+                results = []
+                for traced in [False, True]:
+                    output_dir = tempfile.mkdtemp(dir = tmp)
+                    bsbi = BSBIIndex(data_dir = data_dir, output_dir = output_dir)
+                    analysis.stem.cache_clear()
+                    if traced:
+                        tracemalloc.start()
+                    start = time.perf_counter()
+                    invert(bsbi)
+                    results.append(time.perf_counter() - start)
+                    if traced:
+                        results.append(tracemalloc.get_traced_memory()[1])
+                        tracemalloc.stop()
+                elapsed, _, peak = results
+                print(f"  {label:16} {elapsed:6.2f} s   {len(bsbi.intermediate_indices):4} intermediate index   " \
+                      f"puncak alokasi {peak / 1024:9.1f} KiB   {len(bsbi.doc_id_map)} dokumen di-index")
+                if len(bsbi.intermediate_indices) == 0:
+                    continue
+                bsbi.save()
+                bsbi.merge_index()
+                with open(os.path.join(output_dir, INDEX_NAME + '.index'), 'rb') as f:
+                    merged = f.read()
+                if reference is None:
+                    reference = merged
+                if data_dir == 'collection':
+                    assert merged == reference, f"merged index {label} berbeda"
+
+
+def bench_incremental(base_blocks = 8, repeat = 3):
+    """
+    Incremental indexing (BSBIIndex.add_documents): index dibangun dari
+    base_blocks folder pertama collection/, lalu setiap folder sisanya
+    ditambahkan sebagai satu segment. Dilaporkan waktu setiap penambahan,
+    waktu rebuild penuh, latency query BM25 dengan segment dan setelah
+    compaction, serta waktu compaction. Hasil top-100 index bersegmen dan
+    index hasil compaction harus sama dengan index hasil rebuild penuh.
+    """
+    queries = [query_terms(query) for query in collection_queries()]
+    blocks = sorted(next(os.walk('collection'))[1])
+    with tempfile.TemporaryDirectory() as tmp:
+        # path relatif, karena nama dokumen di doc_id_map dipecah dengan split_path
+        data_dir = os.path.relpath(os.path.join(tmp, 'collection'))
+        incremental_dir, full_dir = os.path.join(tmp, 'incremental'), os.path.join(tmp, 'full')
+        for directory in [data_dir, incremental_dir, full_dir]:
+            os.mkdir(directory)
+        for block in blocks[:base_blocks]:
+            shutil.copytree(os.path.join('collection', block), os.path.join(data_dir, block))
+        BSBIIndex(data_dir = data_dir, output_dir = incremental_dir).index()
+        print("incremental:", base_blocks, "folder di index awal")
+        for block in blocks[base_blocks:]:
+            shutil.copytree(os.path.join('collection', block), os.path.join(data_dir, block))
+            start = time.perf_counter()
+            added = BSBIIndex(data_dir = data_dir, output_dir = incremental_dir).add_documents()
+            print(f"  add_documents folder {block:3} {added:5} dokumen   {time.perf_counter() - start:6.2f} s")
+        start = time.perf_counter()
+        BSBIIndex(data_dir = data_dir, output_dir = full_dir).index()
+        print(f"  rebuild penuh                            {time.perf_counter() - start:6.2f} s")
+
+        full = BSBIIndex(data_dir = data_dir, output_dir = full_dir).open()
+        def latency(label):
+            bsbi = BSBIIndex(data_dir = data_dir, output_dir = incremental_dir).open()
+            for query_list in queries:
+                assert same_ranking(bsbi.score_bm25(query_list).top_k(100), full.score_bm25(query_list).top_k(100)), query_list
+            elapsed = timeit(lambda: [bsbi.score_bm25(q).top_k(10) for q in queries], repeat)
+            print(f"  BM25 {label:16} {elapsed * 1000 / len(queries):8.3f} ms/query (hasil sama dengan rebuild penuh)")
+            bsbi.close()
+        latency("dengan segment")
+        start = time.perf_counter()
+        BSBIIndex(data_dir = data_dir, output_dir = incremental_dir).compact()
+        print(f"  compaction            {time.perf_counter() - start:6.2f} s")
+        latency("setelah compact")
+        full.close()
+
+
+def bench_tombstones(fractions = (0.01, 0.1), repeat = 20):
+    """
+    Overhead query dari tombstone (BSBIIndex.delete_documents) pada salinan
+    index/: latency BM25 dan TF-IDF tanpa tombstone (reader biasa), dengan
+    tombstone kosong (SegmentedIndexReader tanpa dokumen yang dihapus), dan
+    dengan sebagian dokumen (fractions, dipilih acak) dihapus. Hasil top-100
+    dengan tombstone harus sama dengan hasil setelah compaction, yaitu index
+    yang benar-benar tanpa dokumen tersebut.
+    """
+    queries = [query_terms(query) for query in collection_queries()]
+    with tempfile.TemporaryDirectory() as tmp:
+        output_dir = os.path.join(tmp, INDEX_DIR)
+        shutil.copytree(INDEX_DIR, output_dir)
+        bsbi = BSBIIndex(data_dir = 'collection', output_dir = output_dir)
+        bsbi.load()
+        num_docs = len(bsbi.doc_id_map)
+
+        def latency(label):
+            bsbi = BSBIIndex(data_dir = 'collection', output_dir = output_dir).open()
+            # putaran pemanasan (page cache dan cache stem)
+            [bsbi.score_bm25(q) for q in queries]
+            elapsed = {name: timeit(lambda: [score(q).top_k(10) for q in queries], repeat)
+                       for name, score in [('BM25', bsbi.score_bm25), ('TF-IDF', bsbi.score_tfidf)]}
+            print(f"  {label:22} BM25 {elapsed['BM25'] * 1000 / len(queries):7.3f} ms/query   "
+                  f"TF-IDF {elapsed['TF-IDF'] * 1000 / len(queries):7.3f} ms/query   N = {bsbi.stats.num_docs}")
+            return bsbi
+
+        print("tombstones:", num_docs, "dokumen")
+        latency("tanpa tombstone").close()
+        Tombstones().save(tombstones_path(INDEX_NAME, output_dir))
+        latency("tombstone kosong").close()
+        rng = np.random.default_rng(0)
+        deleted = 0
+        for fraction in fractions:
+            # dokumen yang sudah dihapus boleh terpilih lagi; yang dihitung hanya yang baru
+            doc_ids = rng.choice(num_docs, int(num_docs * fraction) - deleted, replace = False)
+            deleted += bsbi.delete_documents([bsbi.doc_id_map[doc_id] for doc_id in doc_ids.tolist()])
+            tombstoned = latency(f"{deleted} dihapus ({deleted / num_docs:.0%})")
+        expected = {tuple(query): (tombstoned.score_bm25(query).top_k(100), tombstoned.score_tfidf(query).top_k(100))
+                    for query in queries}
+        tombstoned.close()
+        start = time.perf_counter()
+        BSBIIndex(data_dir = 'collection', output_dir = output_dir).compact()
+        print(f"  compaction             {time.perf_counter() - start:6.2f} s")
+        compacted = latency("setelah compact")
+        for query in queries:
+            bm25, tfidf = expected[tuple(query)]
+            assert same_ranking(compacted.score_bm25(query).top_k(100), bm25), query
+            assert same_ranking(compacted.score_tfidf(query).top_k(100), tfidf), query
+        compacted.close()
+        print("  hasil dengan tombstone sama dengan hasil setelah compaction")
+
+
+def bench_generations(rebuilds = 2):
+    """
+    Rebuild penuh ke generation baru (BSBIIndex.rebuild) di background
+    thread, selagi thread utama terus melayani query lewat Searcher (dengan
+    reload_if_changed sebelum setiap query, seperti view Django). Dilaporkan
+    banyaknya query yang dilayani dan latency-nya selama rebuild
+    dibandingkan saat idle, serta generation yang terlihat. Setiap hasil
+    harus sama dengan hasil sebelum rebuild (collection tidak berubah) dan
+    tidak boleh ada query yang gagal.
+    """
+    queries = collection_queries()
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, INDEX_DIR)
+        start = time.perf_counter()
+        BSBIIndex(data_dir = 'collection', output_dir = root).rebuild()
+        print(f"generations: rebuild awal {time.perf_counter() - start:.2f} s")
+        searcher = Searcher(data_dir = 'collection', output_dir = root)
+        search = lambda query: [(hit.score, hit.path) for hit in searcher.search_bm25(query, limit = 10)[1]]
+        expected = {query: search(query) for query in queries}
+
+        def serve(running):
+            latencies, generations, errors = [], set(), 0
+            i = 0
+            while running():
+                query = queries[i % len(queries)]
+                i += 1
+                start = time.perf_counter()
+                try:
+                    searcher.reload_if_changed()
+                    result = search(query)
+                    assert same_ranking(result, expected[query]), query
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+                generations.add(searcher.version[0])
+            return np.array(latencies) * 1000, generations, errors
+
+        def report(label, latencies, generations, errors):
+            print(f"  {label:16} {len(latencies):6} query   p50 {np.percentile(latencies, 50):6.3f} ms   "
+                  f"p99 {np.percentile(latencies, 99):7.3f} ms   generation {sorted(generations)}   gagal {errors}")
+
+        deadline = time.perf_counter() + 1.0
+        report("idle", *serve(lambda: time.perf_counter() < deadline))
+        builder = threading.Thread(target = lambda: [BSBIIndex(data_dir = 'collection', output_dir = root).rebuild()
+                                                     for _ in range(rebuilds)])
+        builder.start()
+        report(f"{rebuilds}x rebuild", *serve(builder.is_alive))
+        builder.join()
+        searcher.reload_if_changed()
+        print(f"  generation aktif {searcher.version[0]}, tersisa di disk {list_generations(root)}")
+
+
+def bench_shards(copies = 8, num_shards = 4, worker_counts = None, repeat = 5):
+    """
+    Scatter-gather per shard (lihat shards.py) pada collection/ yang
+    diperbesar secara sintetis (setiap folder disalin copies kali). Index
+    dibangun sekali sebagai satu merged index dan sekali sebagai num_shards
+    shard; dilaporkan latency BM25 index tunggal dan latency scoring shard
+    dengan 1..N thread (default: sampai num_shards), beserta speedup-nya.
+    Hasil top-100 semua konfigurasi harus sama dengan index tunggal.
+    """
+    worker_counts = worker_counts or sorted({1, 2, num_shards} | ({os.cpu_count()} if os.cpu_count() <= num_shards else set()))
+    queries = [query_terms(query) for query in collection_queries()]
+    blocks = sorted(next(os.walk('collection'))[1])
+    with tempfile.TemporaryDirectory() as tmp:
+        # path relatif, karena nama dokumen di doc_id_map dipecah dengan split_path
+        data_dir = os.path.relpath(os.path.join(tmp, 'collection'))
+        single_dir, sharded_dir = os.path.join(tmp, 'single'), os.path.join(tmp, 'sharded')
+        for directory in [data_dir, single_dir, sharded_dir]:
+            os.mkdir(directory)
+        for copy in range(copies):
+            for block in blocks:
+                shutil.copytree(os.path.join('collection', block), os.path.join(data_dir, f'{copy:02d}{block}'))
+        BSBIIndex(data_dir = data_dir, output_dir = single_dir).index()
+        BSBIIndex(data_dir = data_dir, output_dir = sharded_dir).index_shards(num_shards)
+
+        single = BSBIIndex(data_dir = data_dir, output_dir = single_dir).open()
+        sharded = BSBIIndex(data_dir = data_dir, output_dir = sharded_dir).open()
+        print(f"shards: {len(single.doc_id_map)} dokumen ({copies}x collection), {num_shards} shard, "
+              f"{os.cpu_count()} CPU")
+        expected = [single.score_bm25(query_list).top_k(100) for query_list in queries]
+        baseline = timeit(lambda: [single.score_bm25(q).top_k(10) for q in queries], repeat)
+        print(f"  index tunggal        {baseline * 1000 / len(queries):8.3f} ms/query")
+        reader, stats = sharded.reader, sharded.stats
+        for workers in worker_counts:
+            executor = get_executor(workers) if workers > 1 else None
+            score = lambda query_list: score_partitions(reader, stats, sharded.query_term_ids(reader, query_list), 'bm25', executor)
+            for query_list, top in zip(queries, expected):
+                assert same_ranking(score(query_list).top_k(100), top), query_list
+            elapsed = timeit(lambda: [score(q).top_k(10) for q in queries], repeat)
+            print(f"  {num_shards} shard, {workers} thread  {elapsed * 1000 / len(queries):8.3f} ms/query   "
+                  f"speedup {baseline / elapsed:5.2f}x")
+        single.close()
+        sharded.close()
+
+
+def phrase_post_filter(bsbi, reader, node):
+    """
+    Pembanding phrase query tanpa index positional: kandidat dokumen adalah
+    dokumen yang memuat semua term phrase (dari index), lalu isi setiap
+    kandidat dibaca ulang dari document store dan dianalisis untuk mencari
+    phrase-nya.
+    """
+    terms = node[1]
+    candidates = BooleanEvaluator(reader, bsbi.term_id_map.get).conjunction([('term', term) for term, _ in terms])
+    matches = []
+    for doc_id in candidates.tolist():
+        doc_terms, positions = analysis.analyze_positions(bsbi.document_text(doc_id))
+        occurrences = {}
+        for term, position in zip(doc_terms, positions):
+            occurrences.setdefault(term, set()).add(position)
+        if any(all(start + offset in occurrences.get(term, ()) for term, offset in terms)
+               for start in occurrences.get(terms[0][0], ())):
+            matches.append(doc_id)
+    return matches
+
+
+def bench_boolean(copies = 4, repeat = 3, long_length = 100000):
+    """
+    Index positional dan query boolean/phrase (lihat boolean.py) pada
+    collection/ yang diperbesar secara sintetis (setiap folder disalin
+    copies kali):
+
+    1. waktu build dan ukuran file posisi dibanding index non-positional;
+    2. phrase query (2 dan 3 kata pertama judul dokumen) dari index
+       positional, dibanding post-filtering dengan membaca ulang dokumen
+       kandidat (phrase_post_filter); hasil keduanya harus sama;
+    3. intersection galloping vs np.intersect1d untuk postings list dengan
+       rasio panjang yang berbeda (dasar pemilihan GALLOP_RATIO).
+    """
+    blocks = sorted(next(os.walk('collection'))[1])
+    with tempfile.TemporaryDirectory() as tmp:
+        # path relatif, karena nama dokumen di doc_id_map dipecah dengan split_path
+        data_dir = os.path.relpath(os.path.join(tmp, 'collection'))
+        plain_dir, positional_dir = os.path.join(tmp, 'plain'), os.path.join(tmp, 'positional')
+        for directory in [data_dir, plain_dir, positional_dir]:
+            os.mkdir(directory)
+        for copy in range(copies):
+            for block in blocks:
+                shutil.copytree(os.path.join('collection', block), os.path.join(data_dir, f'{copy:02d}{block}'))
+        build = {}
+        for directory, positional in [(plain_dir, False), (positional_dir, True)]:
+            start = time.perf_counter()
+            BSBIIndex(data_dir = data_dir, output_dir = directory, positional = positional).index()
+            build[positional] = time.perf_counter() - start
+        index_size = os.path.getsize(os.path.join(plain_dir, INDEX_NAME + '.index'))
+        positions_size = os.path.getsize(os.path.join(positional_dir, INDEX_NAME + '.positions'))
+
+        bsbi = BSBIIndex(data_dir = data_dir, output_dir = positional_dir).open()
+        print(f"boolean: {len(bsbi.doc_id_map)} dokumen ({copies}x collection)")
+        print(f"  build non-positional {build[False]:8.2f} s, positional {build[True]:8.2f} s")
+        print(f"  .index {index_size / 1024:8.1f} KB, .positions {positions_size / 1024:8.1f} KB "
+              f"({positions_size / index_size:.2f}x)")
+
+        nodes = []
+        for query in collection_queries():
+            tokens = analysis.tokenize(query)
+            for length in [2, 3]:
+                node = parse_query('"' + ' '.join(tokens[:length]) + '"')
+                if node is not None and node[0] == 'phrase':
+                    nodes.append(node)
+        reader = bsbi.reader
+        evaluate = lambda node: BooleanEvaluator(reader, bsbi.term_id_map.get).evaluate(node)
+        for node in nodes:
+            assert evaluate(node).tolist() == phrase_post_filter(bsbi, reader, node), node
+        positional = timeit(lambda: [evaluate(node) for node in nodes], repeat)
+        post_filter = timeit(lambda: [phrase_post_filter(bsbi, reader, node) for node in nodes], repeat)
+        print(f"  phrase ({len(nodes)} query): index positional {positional * 1000 / len(nodes):8.3f} ms/query, "
+              f"post-filter {post_filter * 1000 / len(nodes):8.3f} ms/query, speedup {post_filter / positional:6.1f}x")
+        bsbi.close()
+
+    rng = np.random.default_rng(0)
+    long = np.unique(rng.integers(0, 10 * long_length, long_length))
+    print(f"  intersection dengan postings list {len(long)} docID (GALLOP_RATIO = {GALLOP_RATIO}):")
+    for ratio in [4096, 1024, 512, 256, 64, 16, 4]:
+        short = np.unique(rng.choice(long, len(long) // ratio, replace = False) if ratio < 16 else
+                          rng.integers(0, 10 * long_length, len(long) // ratio))
+        assert galloping_intersect(short, long).tolist() == np.intersect1d(short, long).tolist()
+        runs = max(1, repeat * 10)
+        galloping = timeit(lambda: galloping_intersect(short, long), runs)
+        merge = timeit(lambda: np.intersect1d(short, long, assume_unique = True), runs)
+        print(f"    rasio {ratio:5d}: galloping {galloping * 1e6:9.1f} us, np.intersect1d {merge * 1e6:9.1f} us")
+
+
+BENCHMARKS = {
+    'reader_io': bench_reader_io,
+    'postings_mmap': bench_postings_mmap,
+    'lexicon_load': bench_lexicon_load,
+    'scoring': bench_scoring,
+    'wand': bench_wand,
+    'block_max': bench_block_max,
+    'parallel_index': bench_parallel_index,
+    'analysis': bench_analysis,
+    'result_cache': bench_result_cache,
+    'snippets': bench_snippets,
+    'docstore': bench_docstore,
+    'codec': bench_codec,
+    'codecs': bench_codecs,
+    'collection_stats': bench_collection_stats,
+    'impact': bench_impact,
+    'merge': bench_merge,
+    'spimi': bench_spimi,
+    'incremental': bench_incremental,
+    'tombstones': bench_tombstones,
+    'generations': bench_generations,
+    'shards': bench_shards,
+    'boolean': bench_boolean,
+}
+
+if __name__ == '__main__':
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        BENCHMARKS[name]()
+        print()
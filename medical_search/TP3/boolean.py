@@ -0,0 +1,381 @@
+"""
+Query boolean (AND, OR, NOT, tanda kurung) dan phrase query ("...") yang
+dijawab langsung dari index, tanpa membaca ulang dokumen.
+
+Sintaks query (operator harus ditulis dengan huruf besar):
+
+    "radioactive iodoacetate" AND (thyroid OR goiter) NOT rat
+
+Dua operand yang bersebelahan tanpa operator dianggap AND. Setiap operand
+dianalisis seperti dokumen (lihat analysis.py); kata yang hasil analisisnya
+lebih dari satu term (misal "covid-19") diperlakukan sebagai phrase, dan
+operand yang hanya berisi stopwords diabaikan.
+
+parse_query mengubah query menjadi tree (tuple) berikut:
+
+    ('term', term)
+    ('phrase', ((term, offset), ...))    offset: jarak dari term pertama
+    ('and', (node, ...)), ('or', (node, ...)), ('not', node)
+
+BooleanEvaluator mengevaluasi tree tersebut menjadi docID terurut
+(np.ndarray). Operand AND diproses dari yang df-nya paling kecil, dan
+intersection dua postings list yang panjangnya jauh berbeda memakai
+galloping search (lihat intersect). Phrase query dijawab dari index
+positional (lihat InvertedIndexWriter positional): kandidat dokumennya
+adalah intersection postings list semua term, lalu posisi setiap term
+digeser sesuai offset-nya dan dicocokkan secara vectorized. Karena
+posisi dihitung sebelum stopwords dibuang, stopwords di dalam phrase ikut
+menentukan jarak antar term. Pada index yang tidak positional, phrase
+diperlakukan sebagai AND semua term-nya (operator lain tetap berlaku).
+"""
+
+import re
+import bisect
+import numpy as np
+
+from .analysis import analyze_positions
+
+OPERATORS = ('AND', 'OR', 'NOT')
+# intersection memakai galloping search jika postings list yang lebih
+# panjang paling sedikit GALLOP_RATIO kali yang lebih pendek (lihat
+# benchmark.py boolean); selain itu np.intersect1d lebih cepat
+GALLOP_RATIO = 512
+
+_query_tokens = re.compile(r'"[^"]*"?|\(|\)|[^\s()"]+')
+EMPTY = np.zeros(0, dtype=np.int64)
+
+
+def is_boolean_query(query):
+    """
+    True jika query memakai operator boolean atau phrase (tanda petik yang
+    ditutup). Tanda kurung saja atau tanda petik yang tidak ditutup (misal
+    'children (psychodrama)') tidak membuat query biasa diperlakukan sebagai
+    query boolean.
+    """
+    return any(token in OPERATORS or (len(token) > 1 and token[0] == token[-1] == '"') \
+               for token in _query_tokens.findall(query))
+
+
+def parse_query(query):
+    """
+    Parsing query boolean menjadi tree (lihat docstring modul). Query yang
+    tidak valid (misal tanda kurung atau tanda petik yang tidak ditutup)
+    tidak menimbulkan error: bagian yang tidak lengkap ditutup di akhir
+    query.
+
+    Returns
+    -------
+    tuple
+        root tree, atau None jika query tidak berisi term sama sekali
+    """
+    return _Parser(_query_tokens.findall(query)).parse()
+
+
+def operand(text):
+    """Node untuk sebuah kata atau isi phrase (None jika hanya berisi stopwords)"""
+    terms, positions = analyze_positions(text)
+    if len(terms) == 0:
+        return None
+    if len(terms) == 1:
+        return ('term', terms[0])
+    return ('phrase', tuple((term, position - positions[0]) for term, position in zip(terms, positions)))
+
+
+def _combine(operator, children):
+    children = tuple(child for child in children if child is not None)
+    if len(children) == 0:
+        return None
+    if len(children) == 1:
+        return children[0]
+    return (operator, children)
+
+
+class _Parser:
+    """
+    Recursive descent parser dengan prioritas operator (dari yang paling
+    lemah): OR, AND (termasuk AND implisit), NOT.
+    """
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def parse(self):
+        node = self.parse_or()
+        while self.peek() is not None:
+            # tanda kurung tutup yang berlebih dilewati
+            self.position += 1
+            node = _combine('and', [node, self.parse_or()])
+        return node
+
+    def parse_or(self):
+        children = [self.parse_and()]
+        while self.peek() == 'OR':
+            self.position += 1
+            children.append(self.parse_and())
+        return _combine('or', children)
+
+    def parse_and(self):
+        children = [self.parse_not()]
+        while self.peek() not in (None, ')', 'OR'):
+            if self.peek() == 'AND':
+                self.position += 1
+            children.append(self.parse_not())
+        return _combine('and', children)
+
+    def parse_not(self):
+        if self.peek() == 'NOT':
+            self.position += 1
+            child = self.parse_not()
+            return ('not', child) if child is not None else None
+        return self.parse_primary()
+
+    def parse_primary(self):
+        token = self.peek()
+        if token is None or token == ')':
+            return None
+        self.position += 1
+        if token == '(':
+            node = self.parse_or()
+            if self.peek() == ')':
+                self.position += 1
+            return node
+        if token in OPERATORS:
+            # operator di posisi operand (misal "AND" di awal query)
+            return None
+        return operand(token.strip('"'))
+
+
+def query_terms(node):
+    """
+    Term yang tidak dinegasikan (di luar NOT), tanpa duplikat, sesuai urutan
+    kemunculannya di query. Dipakai untuk ranking hasil query boolean dan
+    snippet.
+    """
+    terms = []
+    def visit(node):
+        if node is None or node[0] == 'not':
+            return
+        if node[0] == 'term':
+            terms.append(node[1])
+        elif node[0] == 'phrase':
+            terms.extend(term for term, _ in node[1])
+        else:
+            for child in node[1]:
+                visit(child)
+    visit(node)
+    return list(dict.fromkeys(terms))
+
+
+def galloping_intersect(short, long):
+    """
+    Intersection dua postings list terurut (np.ndarray) dengan galloping
+    (exponential) search: untuk setiap docID di short, jarak lompatan di long
+    digandakan sampai melewati docID tersebut, lalu posisinya dicari dengan
+    binary search di rentang terakhir. Pencarian dimulai dari posisi hasil
+    sebelumnya, sehingga biayanya O(m log(n/m)) untuk m = len(short) dan
+    n = len(long), bukan O(m + n).
+    """
+    result = []
+    low, n = 0, len(long)
+    for doc_id in short.tolist():
+        step = 1
+        while low + step < n and long[low + step] < doc_id:
+            step *= 2
+        low = bisect.bisect_left(long, doc_id, low, min(low + step + 1, n))
+        if low == n:
+            break
+        if long[low] == doc_id:
+            result.append(doc_id)
+    return np.array(result, dtype=np.int64)
+
+
+def intersect(a, b):
+    """Intersection dua postings list terurut (np.ndarray)"""
+    if len(a) > len(b):
+        a, b = b, a
+    if len(a) == 0:
+        return EMPTY
+    if len(a) * GALLOP_RATIO <= len(b):
+        return galloping_intersect(a, b)
+    return np.intersect1d(a, b, assume_unique=True)
+
+
+class BooleanEvaluator:
+    """
+    Mengevaluasi tree hasil parse_query terhadap sebuah reader
+    (InvertedIndexReader atau SegmentedIndexReader; dokumen yang dihapus
+    tidak pernah muncul di hasil). Postings list dan posisi setiap term
+    di-decode sekali saja per evaluator.
+
+    Parameters
+    ----------
+    reader: InvertedIndexReader atau SegmentedIndexReader
+    term_id: Callable[[str], int]
+        termID sebuah term, None jika tidak ada (misal term_id_map.get)
+    """
+    def __init__(self, reader, term_id):
+        self.reader = reader
+        self.term_id = term_id
+        self.postings_cache = {}
+        self.positions_cache = {}
+        self.all_docs = None
+
+    def evaluate(self, node):
+        """
+        Returns
+        -------
+        np.ndarray
+            docID (int64, terurut) yang memenuhi query
+        """
+        if node is None:
+            return EMPTY
+        kind = node[0]
+        if kind == 'term':
+            return self.postings(node[1])
+        if kind == 'phrase':
+            return self.phrase(node[1])
+        if kind == 'not':
+            return np.setdiff1d(self.universe(), self.evaluate(node[1]), assume_unique=True)
+        if kind == 'or':
+            return np.unique(np.concatenate([self.evaluate(child) for child in node[1]]))
+        return self.conjunction(node[1])
+
+    def conjunction(self, children):
+        """
+        AND: operand positif diproses dari perkiraan df terkecil (evaluasi
+        berhenti begitu hasilnya kosong), lalu operand NOT dikurangkan.
+        """
+        positive = sorted((child for child in children if child[0] != 'not'), key=self.estimate)
+        negative = [child[1] for child in children if child[0] == 'not']
+        result = self.evaluate(positive[0]) if positive else self.universe()
+        for child in positive[1:]:
+            if len(result) == 0:
+                return result
+            result = intersect(result, self.evaluate(child))
+        for child in negative:
+            if len(result) == 0:
+                break
+            result = np.setdiff1d(result, self.evaluate(child), assume_unique=True)
+        return result
+
+    def estimate(self, node):
+        """Perkiraan banyaknya dokumen hasil node, tanpa men-decode postings"""
+        if node[0] == 'term':
+            term_id = self.term_id(node[1])
+            return self.reader.postings_dict[term_id][1] if term_id in self.reader.postings_dict else 0
+        if node[0] == 'phrase':
+            return min(self.estimate(('term', term)) for term, _ in node[1])
+        return len(self.reader.doc_length)
+
+    def postings(self, term):
+        if term not in self.postings_cache:
+            term_id = self.term_id(term)
+            if term_id not in self.reader.postings_dict:
+                self.postings_cache[term] = EMPTY
+            else:
+                self.postings_cache[term] = self.reader.get_postings_arrays(term_id)[0].astype(np.int64)
+        return self.postings_cache[term]
+
+    def positional_postings(self, term):
+        if term not in self.positions_cache:
+            self.positions_cache[term] = self.reader.get_positional_postings(self.term_id(term))
+        return self.positions_cache[term]
+
+    def universe(self):
+        """docID semua dokumen (yang tidak dihapus)"""
+        if self.all_docs is None:
+            self.all_docs = np.array(sorted(self.reader.doc_length), dtype=np.int64)
+        return self.all_docs
+
+    def phrase(self, terms):
+        """
+        Dokumen yang memuat semua term phrase dengan jarak antar posisi
+        sesuai offset-nya. Setiap kemunculan term di dokumen kandidat
+        dikodekan sebagai key docID << 32 | (posisi - offset + max offset),
+        yaitu posisi awal phrase jika kemunculan tersebut bagian dari phrase;
+        key yang ada di semua term adalah kemunculan phrase.
+
+        Jika reader tidak punya posisi (index tidak positional), hasilnya
+        adalah dokumen yang memuat semua term phrase (AND).
+        """
+        candidates = self.conjunction([('term', term) for term, _ in terms])
+        if len(candidates) == 0 or not self.reader.has_positions():
+            return candidates
+        max_offset = max(offset for _, offset in terms)
+        keys = None
+        for term, offset in sorted(terms, key=lambda item: len(self.postings(item[0]))):
+            postings, tfs, positions = self.positional_postings(term)
+            docs = np.repeat(postings, tfs)
+            selected = np.isin(docs, candidates)
+            term_keys = (docs[selected] << 32) | (positions[selected] + (max_offset - offset))
+            keys = term_keys if keys is None else np.intersect1d(keys, term_keys, assume_unique=True)
+            if len(keys) == 0:
+                return EMPTY
+            candidates = np.unique(keys >> 32)
+        return candidates
+
+
+if __name__ == '__main__':
+
+    import tempfile
+    from .index import InvertedIndexWriter, InvertedIndexReader
+    from .compression import VBEPostings
+
+    assert parse_query('lipid metabolism') == ('and', (('term', 'lipid'), ('term', 'metabol'))), "AND implisit salah"
+    assert parse_query('"lipid metabolism in toxemia"') == \
+           ('phrase', (('lipid', 0), ('metabol', 1), ('toxemia', 3))), "offset phrase harus menghitung stopwords"
+    assert parse_query('lipid OR toxemia AND NOT pregnancy') == \
+           ('or', (('term', 'lipid'), ('and', (('term', 'toxemia'), ('not', ('term', 'pregnanc')))))), "prioritas operator salah"
+    assert parse_query('(lipid OR toxemia') == ('or', (('term', 'lipid'), ('term', 'toxemia'))), "kurung yang tidak ditutup"
+    assert parse_query('the AND of') is None and parse_query('') is None, "query tanpa term"
+    assert parse_query('covid-19') == ('phrase', (('covid', 0), ('19', 1))), "kata dengan beberapa term adalah phrase"
+    assert is_boolean_query('lipid AND toxemia') and is_boolean_query('"lipid metabolism"') \
+           and not is_boolean_query('lipid and toxemia'), "deteksi query boolean salah"
+    assert not is_boolean_query('children (psychodrama)') and not is_boolean_query('"lipid metabolism') \
+           and not is_boolean_query('5" tumor'), "tanda kurung atau tanda petik yang tidak ditutup bukan query boolean"
+    assert is_boolean_query('(lipid OR toxemia) pregnancy'), "tanda kurung dengan operator adalah query boolean"
+    node = parse_query('"normal pregnancy" OR lipid NOT (rat OR mouse)')
+    assert query_terms(node) == ['normal', 'pregnanc', 'lipid'], "query_terms salah"
+
+    long = np.arange(0, 100000, 3, dtype=np.int64)
+    for short in [np.array([0, 5, 6, 99999, 200000]), np.array([], dtype=np.int64), long[::7] + 1, long[::500]]:
+        expected = np.intersect1d(short, long).tolist()
+        assert galloping_intersect(short, long).tolist() == expected, "galloping intersection salah"
+        assert intersect(long, short).tolist() == expected, "intersection salah"
+
+    # dokumen: 0 "lipid metabolism toxemia", 1 "toxemia lipid metabolism",
+    # 2 "lipid x metabolism", 3 "metabolism"
+    lipid, metabolism, toxemia = 1, 2, 3
+    with tempfile.TemporaryDirectory() as tmp:
+        with InvertedIndexWriter('test', VBEPostings, directory = tmp, positional = True) as index:
+            index.append(lipid, [0, 1, 2], [1, 1, 1], positions = [0, 1, 0])
+            index.append(metabolism, [0, 1, 2, 3], [1, 1, 1, 1], positions = [1, 2, 2, 0])
+            index.append(toxemia, [0, 1], [1, 1], positions = [2, 0])
+        term_ids = {'lipid': lipid, 'metabol': metabolism, 'toxemia': toxemia}
+        with InvertedIndexReader('test', directory = tmp) as reader:
+            evaluator = BooleanEvaluator(reader, term_ids.get)
+            def search(query):
+                return evaluator.evaluate(parse_query(query)).tolist()
+            assert search('"lipid metabolism"') == [0, 1], "phrase salah"
+            assert search('"lipid the metabolism"') == [2], "stopwords di phrase harus dihitung"
+            assert search('"metabolism lipid"') == [] and search('"lipid unknown"') == [], "phrase salah"
+            assert search('"lipid metabolism toxemia"') == [0], "phrase tiga term salah"
+            assert search('lipid AND NOT toxemia') == [2] and search('NOT lipid') == [3], "NOT salah"
+            assert search('toxemia OR "lipid the metabolism"') == [0, 1, 2], "OR salah"
+            assert search('metabolism NOT (lipid OR toxemia)') == [3], "tanda kurung salah"
+            assert search('unknown') == [] and search('metabolism unknown') == [], "term yang tidak ada"
+        # index non-positional: phrase menjadi AND, operator lain tetap berlaku
+        with InvertedIndexWriter('flat', VBEPostings, directory = tmp) as index:
+            index.append(lipid, [0, 1, 2], [1, 1, 1])
+            index.append(metabolism, [0, 1, 2, 3], [1, 1, 1, 1])
+            index.append(toxemia, [0, 1], [1, 1])
+        with InvertedIndexReader('flat', directory = tmp) as reader:
+            evaluator = BooleanEvaluator(reader, term_ids.get)
+            def search(query):
+                return evaluator.evaluate(parse_query(query)).tolist()
+            assert search('"metabolism lipid"') == [0, 1, 2], "phrase tanpa posisi harus menjadi AND"
+            assert search('"lipid metabolism" NOT toxemia') == [2], "NOT harus tetap berlaku tanpa posisi"
+            assert search('"lipid toxemia" OR metabolism') == [0, 1, 2, 3], "OR harus tetap berlaku tanpa posisi"
@@ -2,19 +2,35 @@ import os
 import pickle
 import contextlib
 import heapq
+import itertools
 import time
 import math
-import nltk
+import multiprocessing
+import numpy as np
 import lightgbm as lgb
 
-from .index import InvertedIndexReader, InvertedIndexWriter
-from .util import IdMap, sorted_merge_posts_and_tfs
+from .index import InvertedIndexReader, InvertedIndexWriter, positions_path, remove_index
+from .lexicon import convert, lexicon_path
+from .util import IdMap, sorted_merge_postings
 from .compression import StandardPostings, VBEPostings
+from .scoring import ScoreAccumulator, bm25_impacts, K1, B
+from .wand import wand, block_max_wand
+from .analysis import analyze, analyze_positions, stopwords
+from .docstore import DocumentStore, docstore_path, split_path, write_docstore
+from .stats import CollectionStats, stats_path
+from .impact import ImpactIndex, impact_paths, write_impact_index
+from .spimi import SPIMIInverter, document_paths, iter_documents, DEFAULT_MEMORY_BUDGET
+from .segments import SegmentedIndexReader, read_segments, write_segments, segment_name
+from .tombstones import Tombstones, tombstones_path
+from .generations import resolve, create_generation, publish, prune_generations, KEEP_GENERATIONS
+from .shards import read_shards, write_shards, shard_name, shards_path, split_ranges, score_partitions, get_executor
+from .boolean import BooleanEvaluator, parse_query, query_terms
 from tqdm import tqdm
-from nltk.stem import PorterStemmer
-from nltk.tokenize import RegexpTokenizer
 # from letor import Letor
 
+# codec untuk index yang ditulis jika BSBIIndex dibuat tanpa postings_encoding
+DEFAULT_POSTINGS_ENCODING = VBEPostings
+
 class BSBIIndex:
     """
     Attributes
@@ -23,31 +39,67 @@ class BSBIIndex:
     doc_id_map(IdMap): Untuk mapping relative paths dari dokumen (misal,
                     /collection/0/gamma.txt) to docIDs
     data_dir(str): Path ke data
-    output_dir(str): Path ke output index files
+    output_dir(str): Path ke output index files. Jika direktori tersebut
+                    memakai generation (lihat generations.py), output_dir
+                    adalah direktori generation yang aktif saat instance
+                    dibuat dan root_dir adalah direktori asalnya
     postings_encoding: Lihat di compression.py, kandidatnya adalah StandardPostings,
-                    VBEPostings, dsb.
+                    VBEPostings, dsb. Jika None, codec index yang dibaca diambil
+                    dari manifest-nya (lihat InvertedIndex.manifest) dan index
+                    baru ditulis dengan DEFAULT_POSTINGS_ENCODING
     index_name(str): Nama dari file yang berisi inverted index
+    block_size(int): Jika diisi, postings list merged index ditulis per block
+                    berukuran block_size (lihat InvertedIndexWriter)
+    positional(bool): Jika True, posisi setiap term di dokumen ikut disimpan
+                    (lihat InvertedIndexWriter positional) sehingga phrase
+                    query bisa dijawab (lihat retrieve_boolean). Jika None,
+                    True jika index yang sudah ada positional
     """
-    def __init__(self, data_dir, output_dir, postings_encoding, index_name = "main_index"):
+    def __init__(self, data_dir, output_dir, postings_encoding = None, index_name = "main_index", block_size = None, \
+                 positional = None):
         self.term_id_map = IdMap()
         self.doc_id_map = IdMap()
         self.data_dir = data_dir
-        self.output_dir = output_dir
+        self.root_dir = output_dir
+        self.generation, self.output_dir = resolve(output_dir)
         self.index_name = index_name
         self.postings_encoding = postings_encoding
+        self.block_size = block_size
+        if positional is None:
+            positional = any(os.path.exists(positions_path(name, self.output_dir)) \
+                             for name in [index_name, shard_name(index_name, 0)])
+        self.positional = positional
         self.avg_doc_length = -1
+        self.stats = None
+        # banyaknya thread untuk scoring paralel per shard (lihat open dan shards.py)
+        self.query_workers = 1
         # self.letor = Letor()
 
+        # Reader dan document store yang tetap terbuka setelah open() dipanggil (lihat method open)
+        self.reader = None
+        self.docstore = None
+        self.impact_index = None
+        self.doc_id_by_parts = None
+
         # Untuk menyimpan nama-nama file dari semua intermediate inverted index
         self.intermediate_indices = []
 
-    def save(self):
-        """Menyimpan doc_id_map and term_id_map ke output directory via pickle"""
+    @property
+    def writer_encoding(self):
+        """postings encoding untuk index yang ditulis"""
+        return self.postings_encoding or DEFAULT_POSTINGS_ENCODING
 
-        with open(os.path.join(self.output_dir, 'terms.dict'), 'wb') as f:
-            pickle.dump(self.term_id_map, f)
-        with open(os.path.join(self.output_dir, 'docs.dict'), 'wb') as f:
-            pickle.dump(self.doc_id_map, f)
+    def save(self):
+        """
+        Menyimpan doc_id_map and term_id_map ke output directory via pickle.
+        Setiap file ditulis ke file sementara lalu di-rename (atomic), supaya
+        proses lain yang memuatnya (lihat load) tidak membaca file setengah jadi.
+        """
+        for name, id_map in [('terms.dict', self.term_id_map), ('docs.dict', self.doc_id_map)]:
+            path = os.path.join(self.output_dir, name)
+            with open(path + '.tmp', 'wb') as f:
+                pickle.dump(id_map, f)
+            os.replace(path + '.tmp', path)
 
     def load(self):
         """Memuat doc_id_map and term_id_map dari output directory"""
@@ -57,6 +109,189 @@ class BSBIIndex:
         with open(os.path.join(self.output_dir, 'docs.dict'), 'rb') as f:
             self.doc_id_map = pickle.load(f)
 
+    def open(self, use_mmap = True, use_lexicon = None, query_workers = 1):
+        """
+        Memuat term_id_map, doc_id_map, dan membuka merged index sekali saja,
+        lalu membiarkannya tetap terbuka (resident di memori) sampai close()
+        dipanggil. Setelah open(), retrieve_tfidf dan retrieve_bm25 tidak lagi
+        memuat ulang metadata di setiap query, sehingga biaya per query
+        hanyalah membaca postings dan menghitung score.
+
+        Parameters
+        ----------
+        use_mmap: bool
+            Jika True, index file di-memory-map (lihat InvertedIndexReader)
+        use_lexicon: bool
+            Jika True, metadata dibaca dari lexicon biner (lihat lexicon.py).
+            Default (None): pakai lexicon jika file-nya ada.
+        query_workers: int
+            Jika > 1 dan index terdiri dari beberapa shard (atau segment),
+            setiap shard di-score secara paralel di thread pool (lihat
+            shards.py)
+        """
+        self.query_workers = query_workers
+        if use_lexicon is None:
+            use_lexicon = os.path.exists(lexicon_path(self.index_name, self.output_dir))
+        self.load()
+        # reader baru dipasang setelah berhasil dibuka (index yang ditolak, lihat
+        # InvertedIndex.load_manifest, tidak meninggalkan reader setengah terbuka)
+        self.reader = self.open_index_reader(use_mmap, use_lexicon)
+        if os.path.exists(docstore_path(self.index_name, self.output_dir)):
+            self.docstore = DocumentStore(docstore_path(self.index_name, self.output_dir))
+        if self.has_current_impact_index():
+            self.impact_index = ImpactIndex(self.index_name, self.output_dir)
+        # stopwords dimuat sekarang, bukan saat query pertama
+        stopwords()
+        self.collection_stats(self.reader)
+        return self
+
+    def close(self):
+        """Menutup reader dan document store yang dibuka oleh open()"""
+        if self.reader is not None:
+            self.reader.__exit__(None, None, None)
+            self.reader = None
+        if self.docstore is not None:
+            self.docstore.close()
+            self.docstore = None
+        if self.impact_index is not None:
+            self.impact_index.close()
+            self.impact_index = None
+        self.stats = None
+
+    def document_text(self, doc_id):
+        """
+        Isi dokumen dengan docID doc_id, dari document store jika sudah dibuka
+        (lihat open dan build_docstore), atau dari file dokumennya.
+        """
+        if self.docstore is not None and doc_id in self.docstore:
+            return self.docstore.body(doc_id)
+        with open(os.path.join(*split_path(self.doc_id_map[doc_id])), 'r') as f:
+            return f.read()
+
+    def find_doc_id(self, path):
+        """
+        docID untuk path dokumen dengan separator apa pun ('/' atau '\\'),
+        None jika dokumen tidak ada di index.
+        """
+        if self.doc_id_by_parts is None:
+            self.doc_id_by_parts = {tuple(split_path(name)): doc_id for doc_id, name in enumerate(self.doc_id_map.id_to_str)}
+        return self.doc_id_by_parts.get(tuple(split_path(path)))
+
+    def base_indices(self):
+        """Nama shard (lihat shards.py), atau [index_name] jika index tidak di-shard"""
+        return read_shards(self.index_name, self.output_dir) or [self.index_name]
+
+    def open_index_reader(self, use_mmap = False, use_lexicon = False):
+        """
+        Membuka reader merged index. Jika index di-shard (lihat shards.py dan
+        index_shards), ada segment (lihat segments.py dan add_documents),
+        atau ada dokumen yang dihapus (lihat tombstones.py dan
+        delete_documents), dikembalikan SegmentedIndexReader yang
+        menggabungkan semua shard (atau merged index) dan segment-nya serta
+        membuang dokumen yang dihapus. Reader ditutup dengan __exit__.
+        """
+        base = self.base_indices()
+        segments, _ = read_segments(self.index_name, self.output_dir)
+        tombstones = self.load_tombstones(base + segments)
+        readers = []
+        try:
+            for name in base:
+                # lexicon hanya dibangun untuk merged index
+                readers.append(InvertedIndexReader(name, self.postings_encoding, directory=self.output_dir, \
+                                                   use_mmap=use_mmap, use_lexicon=use_lexicon and len(base) == 1).__enter__())
+            for name in segments:
+                readers.append(InvertedIndexReader(name, self.postings_encoding, directory=self.output_dir, \
+                                                   use_mmap=use_mmap).__enter__())
+        except Exception:
+            for reader in readers:
+                reader.__exit__(None, None, None)
+            raise
+        if len(readers) == 1 and tombstones[0] is None:
+            return readers[0]
+        return SegmentedIndexReader(readers, tombstones)
+
+    def load_tombstones(self, index_names):
+        """Tombstones setiap index di index_names (None jika tidak ada file-nya)"""
+        paths = [tombstones_path(name, self.output_dir) for name in index_names]
+        return [Tombstones.load(path) if os.path.exists(path) else None for path in paths]
+
+    def collection_stats(self, reader):
+        """
+        Statistik koleksi merged index (lihat stats.py): dimuat dari file
+        <index_name>.stats yang ditulis saat indexing, atau untuk index lama
+        dihitung dari metadata reader (tanpa cf). Hasilnya disimpan di
+        self.stats sehingga hanya dimuat sekali per instance. File stats yang
+        tidak cocok dengan index ditolak dengan ValueError.
+
+        Jika index punya segment atau dokumen yang dihapus, statistik dihitung
+        dari metadata reader gabungan (lihat SegmentedIndexReader), tanpa cf;
+        N dan avgdl hanya menghitung dokumen yang masih ada.
+        """
+        if self.stats is None:
+            path = stats_path(self.index_name, self.output_dir)
+            if isinstance(reader, SegmentedIndexReader):
+                stats = CollectionStats.from_reader(reader, with_cf = False)
+            elif os.path.exists(path):
+                stats = CollectionStats.load(path)
+                if stats.num_docs != len(reader.doc_length) or np.count_nonzero(stats.df) != len(reader.terms):
+                    raise ValueError(f"{path} tidak cocok dengan index (stats basi?)")
+            else:
+                stats = CollectionStats.from_reader(reader, with_cf = False)
+            self.stats = stats
+            self.avg_doc_length = stats.avg_doc_length
+        return self.stats
+
+    def build_stats(self, index_name = None):
+        """
+        Menghitung statistik koleksi merged index (termasuk cf, sehingga semua
+        postings di-decode sekali) dan menyimpannya ke <index_name>.stats.
+        index_name default: self.index_name.
+        """
+        index_name = index_name or self.index_name
+        with InvertedIndexReader(index_name, self.postings_encoding, directory = self.output_dir) as reader:
+            CollectionStats.from_reader(reader).save(stats_path(index_name, self.output_dir))
+
+    def has_current_impact_index(self):
+        """
+        True jika index impact ada dan masih sesuai dengan index: index impact
+        dibangun dari merged index (atau shard) saja, sehingga tidak lagi
+        berlaku begitu ada segment (lihat add_documents) atau dokumen yang
+        dihapus (lihat delete_documents), karena dokumen baru tidak ada di
+        dalamnya, dokumen yang dihapus masih ada, dan N, df, serta avgdl
+        sudah berubah. Compaction membangunnya ulang (lihat compact).
+        """
+        if not all(os.path.exists(path) for path in impact_paths(self.index_name, self.output_dir)):
+            return False
+        segments, _ = read_segments(self.index_name, self.output_dir)
+        if len(segments) > 0:
+            return False
+        return all(tombstones is None for tombstones in self.load_tombstones(self.base_indices()))
+
+    def build_impact_index(self, bits = 8):
+        """
+        Membangun index impact BM25 ter-kuantisasi (lihat impact.py) dari
+        merged index dan statistik koleksinya.
+        """
+        with self.open_reader() as reader:
+            write_impact_index(reader, self.collection_stats(reader), self.index_name, self.output_dir, \
+                               bits = bits, postings_encoding = self.writer_encoding)
+
+    @contextlib.contextmanager
+    def open_reader(self):
+        """
+        Context manager yang menghasilkan InvertedIndexReader untuk merged index.
+        Jika index sudah dibuka dengan open(), reader yang sudah ada dipakai ulang;
+        jika belum, reader baru dibuka dan ditutup lagi setelah context selesai.
+        """
+        if self.reader is not None:
+            yield self.reader
+        else:
+            reader = self.open_index_reader()
+            try:
+                yield reader
+            finally:
+                reader.__exit__(None, None, None)
+
     def parse_block(self, block_dir_relative):
         """
         Lakukan parsing terhadap text file sehingga menjadi sequence of
@@ -84,26 +319,33 @@ class BSBIIndex:
         List[Tuple[Int, Int]]
             Returns all the td_pairs extracted from the block
             Mengembalikan semua pasangan <termID, docID> dari sebuah block (dalam hal
-            ini sebuah sub-direktori di dalam folder collection)
+            ini sebuah sub-direktori di dalam folder collection). Jika
+            self.positional, yang dikembalikan adalah <termID, docID, posisi>
+            (lihat analysis.analyze_positions).
 
         Harus menggunakan self.term_id_map dan self.doc_id_map untuk mendapatkan
         termIDs dan docIDs. Dua variable ini harus 'persist' untuk semua pemanggilan
         parse_block(...).
         """
         # TODO
-        ps = PorterStemmer()
-
         path = os.path.join(self.data_dir, block_dir_relative)
         list = []
         removed_stop_words = None
         for file in os.listdir(path):
             with open(os.path.join(path, file), 'r') as f:
                 isi_file = f.read()
-                tokenizer = RegexpTokenizer(r'\w+')
-                tokens = tokenizer.tokenize(isi_file)
-                stemmed = [ps.stem(word) for word in tokens]
-                removed_stop_words = [word for word in stemmed if word not in nltk.corpus.stopwords.words('english')]
-                
+                if self.positional:
+                    terms, positions = analyze_positions(isi_file)
+                    doc_id = None
+                    for term, position in zip(terms, positions):
+                        term_id = self.term_id_map[term]
+                        if doc_id is None:
+                            doc_id = self.doc_id_map[os.path.join(self.data_dir, block_dir_relative, file)]
+                        list.append((term_id, doc_id, position))
+                    continue
+                # tokenisasi, stemming, dan membuang stopwords (lihat analysis.py)
+                removed_stop_words = analyze(isi_file)
+
                 for term in removed_stop_words:
                     term_id = self.term_id_map[term]
                     doc_id = self.doc_id_map[os.path.join(self.data_dir, block_dir_relative, file)]
@@ -131,8 +373,23 @@ class BSBIIndex:
             List of termID-docID pairs
         index: InvertedIndexWriter
             Inverted index pada disk (file) yang terkait dengan suatu "block"
+
+        Jika self.positional, td_pairs berisi <termID, docID, posisi> (lihat
+        parse_block) dan posisinya ikut ditulis ke index.
         """
         # TODO
+        if self.positional:
+            # { termid : { docid : list of posisi } }
+            term_positions = {}
+            for term_id, doc_id, position in td_pairs:
+                term_positions.setdefault(term_id, {}).setdefault(doc_id, []).append(position)
+            for term_id in sorted(term_positions.keys()):
+                docs = term_positions[term_id]
+                postings_list = sorted(docs.keys())
+                index.append(term_id, postings_list, [len(docs[doc_id]) for doc_id in postings_list], \
+                             positions = [position for doc_id in postings_list for position in docs[doc_id]])
+            return
+
         # { termid : { docid : tflist } }
         term_dict = {}
         for term_id, doc_id in td_pairs:
@@ -152,14 +409,19 @@ class BSBIIndex:
                 tf_list.append(term_dict[term_id][key])
             index.append(term_id, postings_list, tf_list)
 
-    def merge(self, indices, merged_index):
+    def merge(self, indices, merged_index, deleted = None):
         """
         Lakukan merging ke semua intermediate inverted indices menjadi
         sebuah single index.
 
         Ini adalah bagian yang melakukan EXTERNAL MERGE SORT
 
-        Gunakan fungsi orted_merge_posts_and_tfs(..) di modul util
+        Intermediate indices dibaca secara streaming dan di-merge dengan
+        heapq.merge; postings list sebuah term dari semua index yang
+        memuatnya dikumpulkan dulu, lalu digabung dalam satu langkah dengan
+        sorted_merge_postings di modul util (cukup disambung, karena rentang
+        docID setiap block saling lepas dan terurut). Memori yang dipakai
+        sebanding dengan postings list satu term.
 
         Parameters
         ----------
@@ -171,26 +433,92 @@ class BSBIIndex:
         merged_index: InvertedIndexWriter
             Instance InvertedIndexWriter object yang merupakan hasil merging dari
             semua intermediate InvertedIndexWriter objects.
+
+        deleted: Set[int]
+            docID yang dihapus (lihat tombstones.py); postings dan panjang
+            dokumennya dibuang dari merged index (dipakai oleh compact)
+
+        Panjang setiap dokumen sudah diketahui dari doc_length intermediate
+        indices, sehingga kontribusi BM25 setiap posting bisa langsung
+        dihitung saat merging; nilai maksimumnya disimpan sebagai upper bound
+        (max_score) term dan setiap block untuk WAND dan Block-Max WAND.
+
+        Jika merged_index positional, posisi setiap posting dibaca dari file
+        posisi index asalnya (lihat InvertedIndexReader.get_positions, yang
+        tidak mengganggu iterasi reader) dan ditulis sesuai urutan postings
+        hasil merging; posisi docID yang muncul di beberapa index digabung.
+        Jika postings list cukup disambung (tanpa dokumen yang dihapus),
+        posisi yang sudah di-encode juga cukup disambung tanpa di-decode
+        (lihat compression.encode_positions).
         """
-        # kode berikut mengasumsikan minimal ada 1 term
-        merged_iter = heapq.merge(*indices, key = lambda x: x[0])
-        curr, postings, tf_list = next(merged_iter) # first item
-        for t, postings_, tf_list_ in merged_iter: # from the second item
-            if t == curr:
-                zip_p_tf = sorted_merge_posts_and_tfs(list(zip(postings, tf_list)), \
-                                                      list(zip(postings_, tf_list_)))
-                postings = [doc_id for (doc_id, _) in zip_p_tf]
-                tf_list = [tf for (_, tf) in zip_p_tf]
-            else:
-                merged_index.append(curr, postings, tf_list)
-                curr, postings, tf_list = t, postings_, tf_list_
-        merged_index.append(curr, postings, tf_list)
+        doc_length = {}
+        for index in indices:
+            if doc_length.keys().isdisjoint(index.doc_length):
+                doc_length.update(index.doc_length)
+                continue
+            # docID yang sama di beberapa index: panjangnya dijumlahkan, seperti TF-nya
+            for doc_id, length in index.doc_length.items():
+                doc_length[doc_id] = doc_length.get(doc_id, 0) + length
+        for doc_id in deleted or ():
+            doc_length.pop(doc_id, None)
+        # semua dokumen dihapus: merged index kosong (tanpa term), avgdl 0
+        avg_doc_length = self.calculate_average_doc_length(doc_length) if doc_length else 0
+
+        positional = merged_index.positional
+        sources = indices
+        if positional:
+            # reader asal setiap postings list dibutuhkan untuk membaca posisinya
+            sources = [with_reader(index) for index in indices]
+        # untuk term yang sama, heapq.merge mempertahankan urutan indices
+        merged_iter = heapq.merge(*sources, key = lambda x: x[0])
+        for term, group in itertools.groupby(merged_iter, key = lambda x: x[0]):
+            group = list(group)
+            postings, tf_list = sorted_merge_postings([(entry[1], entry[2]) for entry in group])
+            if deleted:
+                live = [i for i, doc_id in enumerate(postings) if doc_id not in deleted]
+                if len(live) == 0:
+                    continue
+                postings, tf_list = [postings[i] for i in live], [tf_list[i] for i in live]
+            positions, encoded_positions = None, None
+            if positional and not deleted and \
+               all(previous[1][-1] < entry[1][0] for previous, entry in zip(group, group[1:])):
+                encoded_positions = b''.join(entry[3].get_encoded_positions(term) for entry in group)
+            elif positional:
+                # posisi sebuah docID yang muncul di beberapa index digabung
+                # (dan diurutkan), sesuai TF-nya yang dijumlahkan
+                doc_positions = {}
+                for _, part_postings, part_tfs, index in group:
+                    part_positions = index.get_positions(term, part_tfs)
+                    for doc_id, doc_part in zip(part_postings, np.split(part_positions, np.cumsum(part_tfs)[:-1])):
+                        doc_positions.setdefault(doc_id, []).append(doc_part)
+                positions = np.concatenate([parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts)) \
+                                            for parts in (doc_positions[doc_id] for doc_id in postings)])
+            impacts = bm25_impacts(np.array(tf_list, dtype=np.float64), \
+                                   np.array([doc_length[doc_id] for doc_id in postings], dtype=np.float64), \
+                                   avg_doc_length)
+            merged_index.append(term, postings, tf_list, impacts = impacts.tolist(), positions = positions, \
+                                encoded_positions = encoded_positions)
+
+    def preprocess_query(self, query):
+        """
+        Tokenisasi, stemming, dan membuang stopwords dari query (sama seperti
+        pemrosesan dokumen pada parse_block, lihat analysis.py).
+
+        Returns
+        -------
+        List[str]
+            List of terms dari query
+        """
+        return analyze(query)
 
-    def retrieve_tfidf(self, query, k = 10):
+    def retrieve_tfidf(self, query, k = 10, offset = 0):
         """
         Melakukan Ranked Retrieval dengan skema TaaT (Term-at-a-Time).
         Method akan mengembalikan top-K retrieval results.
 
+        Score diakumulasikan secara vectorized dengan ScoreAccumulator
+        (lihat scoring.py).
+
         w(t, D) = (1 + log tf(t, D))       jika tf(t, D) > 0
                 = 0                        jika sebaliknya
 
@@ -211,6 +539,9 @@ class BSBIIndex:
 
             contoh: Query "universitas indonesia depok" artinya ada
             tiga terms: universitas, indonesia, dan depok
+        offset: int
+            Banyaknya dokumen teratas yang dilewati. Dengan offset dan k, caller
+            bisa meminta satu halaman hasil (rank offset+1 s.d. offset+k) saja.
 
         Result
         ------
@@ -226,41 +557,131 @@ class BSBIIndex:
         if len(self.term_id_map) == 0 or len(self.doc_id_map) == 0:
             self.load()
 
-        ps = PorterStemmer()
-        dict1 = {}
+        query_list = self.preprocess_query(query)
+        accumulator = self.score_tfidf(query_list)
+        return [(score, self.doc_id_map[doc_id]) for (score, doc_id) in accumulator.top_k(k, offset)]
 
-        tokenizer = RegexpTokenizer(r'\w+')
-        tokens = tokenizer.tokenize(query)
-        stemmed = [ps.stem(word) for word in tokens]
-        query_list = [word for word in stemmed if word not in nltk.corpus.stopwords.words('english')]
+    def query_term_ids(self, reader, query_list):
+        """termID setiap term query yang ada di index (urutan dan duplikat dipertahankan)"""
+        term_ids = [self.term_id_map.get(term) for term in query_list]
+        return [term_id for term_id in term_ids if term_id in reader.postings_dict]
 
-        with InvertedIndexReader(self.index_name, directory=self.output_dir, postings_encoding=self.postings_encoding) as reader:
+    def score_tfidf(self, query_list):
+        """
+        Menghitung score TF-IDF untuk list of terms (sudah di-stem dan tanpa
+        stopwords) dan mengembalikan ScoreAccumulator-nya (ShardedScores
+        dengan interface yang sama jika di-score paralel per shard, lihat
+        open dan shards.py).
+        """
+        with self.open_reader() as reader:
+            stats = self.collection_stats(reader)
+            if self.query_workers > 1 and isinstance(reader, SegmentedIndexReader):
+                return score_partitions(reader, stats, self.query_term_ids(reader, query_list), 'tfidf', \
+                                        get_executor(self.query_workers))
+            N = stats.num_docs
+            accumulator = ScoreAccumulator(len(stats.doc_length))
             for term in query_list:
-                
-                try:
-                    postings_list, tf_list = reader.get_postings_list(self.term_id_map[term])
-                    N = len(reader.doc_length)
-                    wtq = math.log(N/len(postings_list), 10) # IDF
-                    for i in range(len(postings_list)):
-                        wtd = 0
-                        if (tf_list[i] <= 0):
-                            wtd = 0
-                        else:
-                            wtd = 1 + math.log(tf_list[i], 10)
-                        if postings_list[i] in dict1:
-                            dict1[postings_list[i]] += wtd*wtq
-                        else:
-                            dict1[postings_list[i]] = wtd*wtq
-                except:
+                term_id = self.term_id_map.get(term)
+                if term_id not in reader.postings_dict:
                     continue
- 
-        list_of_did_and_tfidf = list(dict1.items())
-        list_of_did_and_tfidf.sort(key=lambda x: x[1],reverse=True)
-        
-        final_result = []
-        for i in range(min(k, len(list_of_did_and_tfidf))):
-            final_result.append((list_of_did_and_tfidf[i][1],self.doc_id_map[list_of_did_and_tfidf[i][0]]))
-        return final_result
+                postings, tfs = reader.get_postings_arrays(term_id)
+                if len(postings) > 0:
+                    accumulator.add_tfidf(postings, tfs, N)
+        return accumulator
+
+    def retrieve_bm25_wand(self, query, k = 10, block_max = False):
+        """
+        Sama seperti retrieve_bm25, tetapi dengan skema DaaT (Document-at-a-Time)
+        dan dynamic pruning WAND (lihat wand.py). Top-K yang dihasilkan sama
+        dengan retrieve_bm25, namun dokumen yang tidak mungkin masuk top-K
+        dilewati tanpa dihitung score-nya.
+
+        Jika block_max=True, dipakai Block-Max WAND; pruning paling efektif
+        jika merged index ditulis per block (lihat block_size).
+        """
+        if len(self.term_id_map) == 0 or len(self.doc_id_map) == 0:
+            self.load()
+
+        top, _ = self.wand_bm25(self.preprocess_query(query), k, block_max = block_max)
+        return [(score, self.doc_id_map[doc_id]) for (score, doc_id) in top]
+
+    def wand_bm25(self, query_list, k, block_max = False):
+        """
+        Evaluasi BM25 dengan WAND untuk list of terms (sudah di-stem dan tanpa
+        stopwords).
+
+        Upper bound setiap term adalah IDF * max_score term tersebut, yang
+        dihitung saat indexing (lihat merge). Untuk index lama yang belum
+        menyimpan max_score, dipakai bound IDF * (k1 + 1) yang selalu valid
+        (namun lebih longgar).
+
+        Returns
+        -------
+        Tuple[List[(float, int)], int]
+            top-K (score, docID) dan banyaknya posting yang dievaluasi
+        """
+        with self.open_reader() as reader:
+            stats = self.collection_stats(reader)
+            N = stats.num_docs
+            bm25_norm = stats.bm25_norm
+            cursors, upper_bounds, idfs = [], [], []
+            for term in query_list:
+                term_id = self.term_id_map.get(term)
+                if term_id not in reader.postings_dict or reader.document_frequency(term_id) == 0:
+                    continue
+                wtq = math.log(N/reader.document_frequency(term_id), 10)
+                cursors.append(reader.cursor(term_id))
+                upper_bounds.append(wtq*reader.max_score.get(term_id, K1+1))
+                idfs.append(wtq)
+
+            def contribution(i, doc_id, tf):
+                return idfs[i]*(K1+1)*tf/(float(bm25_norm[doc_id])+tf)
+
+            if block_max:
+                return block_max_wand(cursors, upper_bounds, idfs, contribution, k)
+            return wand(cursors, upper_bounds, contribution, k)
+
+    def retrieve_bm25_impact(self, query, k = 10, offset = 0, max_postings = None):
+        """
+        Sama seperti retrieve_bm25, tetapi memakai index impact BM25 yang
+        sudah dikuantisasi (lihat build_impact_index dan impact.py) dengan
+        evaluasi score-at-a-time. Score hanya berupa aproksimasi BM25; jika
+        max_postings diisi, evaluasi berhenti lebih awal (lihat
+        ImpactIndex.score_at_a_time). Selama index impact tidak berlaku
+        (lihat has_current_impact_index), dipakai BM25 exact.
+        """
+        if len(self.term_id_map) == 0 or len(self.doc_id_map) == 0:
+            self.load()
+
+        top, _ = self.impact_bm25(self.preprocess_query(query), k, offset, max_postings)
+        return [(score, self.doc_id_map[doc_id]) for (score, doc_id) in top]
+
+    def impact_bm25(self, query_list, k, offset = 0, max_postings = None):
+        """
+        Evaluasi score-at-a-time untuk list of terms (sudah di-stem dan tanpa
+        stopwords) pada index impact. Jika index impact tidak berlaku lagi
+        (ada segment atau dokumen yang dihapus, lihat
+        has_current_impact_index), dipakai BM25 exact (lihat score_bm25) dan
+        max_postings diabaikan, supaya dokumen yang dihapus tidak muncul dan
+        dokumen baru ikut di-ranking.
+
+        Returns
+        -------
+        Tuple[List[(float, int)], int]
+            top-K (score, docID) dan banyaknya posting yang diproses
+        """
+        term_ids = [self.term_id_map.get(term) for term in query_list]
+        if self.impact_index is not None:
+            return self.impact_index.score_at_a_time(term_ids, k, offset, max_postings)
+        if os.path.exists(impact_paths(self.index_name, self.output_dir)[1]) and not self.has_current_impact_index():
+            with self.open_reader() as reader:
+                processed = sum(reader.postings_dict[term_id][1] for term_id in term_ids if term_id in reader.postings_dict)
+            return self.score_bm25(query_list).top_k(k, offset), processed
+        impact_index = ImpactIndex(self.index_name, self.output_dir)
+        try:
+            return impact_index.score_at_a_time(term_ids, k, offset, max_postings)
+        finally:
+            impact_index.close()
 
     def calculate_average_doc_length(self, doc_length_dict: dict):
         sum = 0
@@ -269,11 +690,14 @@ class BSBIIndex:
         return sum/len(doc_length_dict)
 
 
-    def retrieve_bm25(self, query, k = 10):
+    def retrieve_bm25(self, query, k = 10, offset = 0):
         """
         Melakukan Ranked Retrieval dengan skema TaaT (Term-at-a-Time).
         Method akan mengembalikan top-K retrieval results.
 
+        Score diakumulasikan secara vectorized dengan ScoreAccumulator
+        (lihat scoring.py).
+
         w(t, D) = (1 + log tf(t, D))       jika tf(t, D) > 0
                 = 0                        jika sebaliknya
 
@@ -294,6 +718,9 @@ class BSBIIndex:
 
             contoh: Query "universitas indonesia depok" artinya ada
             tiga terms: universitas, indonesia, dan depok
+        offset: int
+            Banyaknya dokumen teratas yang dilewati. Dengan offset dan k, caller
+            bisa meminta satu halaman hasil (rank offset+1 s.d. offset+k) saja.
 
         Result
         ------
@@ -306,46 +733,69 @@ class BSBIIndex:
 
         """
         # TODO
-        nltk.download('stopwords')
         if len(self.term_id_map) == 0 or len(self.doc_id_map) == 0:
             self.load()
 
-        ps = PorterStemmer()
-
-        dict1 = {}
-        tokenizer = RegexpTokenizer(r'\w+')
-        tokens = tokenizer.tokenize(query)
-        stemmed = [ps.stem(word) for word in tokens]
-        query_list = [word for word in stemmed if word not in nltk.corpus.stopwords.words('english')]
-        k1 = 1.6
-        b = 0.75
-        
-        with InvertedIndexReader(self.index_name, directory=self.output_dir, postings_encoding=self.postings_encoding) as reader:
+        query_list = self.preprocess_query(query)
+        accumulator = self.score_bm25(query_list)
+        return [(score, self.doc_id_map[doc_id]) for (score, doc_id) in accumulator.top_k(k, offset)]
+
+    def score_bm25(self, query_list):
+        """
+        Menghitung score BM25 untuk list of terms (sudah di-stem dan tanpa
+        stopwords) dan mengembalikan ScoreAccumulator-nya (atau ShardedScores,
+        lihat score_tfidf).
+        """
+        with self.open_reader() as reader:
+            stats = self.collection_stats(reader)
+            if self.query_workers > 1 and isinstance(reader, SegmentedIndexReader):
+                return score_partitions(reader, stats, self.query_term_ids(reader, query_list), 'bm25', \
+                                        get_executor(self.query_workers))
+            accumulator = ScoreAccumulator(len(stats.bm25_norm))
             for term in query_list:
-                try:
-                    postings_list, tf_list = reader.get_postings_list(self.term_id_map[term])
-                    N = len(reader.doc_length)
-                    wtq = math.log(N/len(postings_list), 10)
-                    if self.avg_doc_length == -1:
-                        self.avg_doc_length = self.calculate_average_doc_length(reader.doc_length)
-                    
-                    for i in range(len(postings_list)):
-                        normalization = (1-b)+b*((reader.doc_length[postings_list[i]])/self.avg_doc_length)
-                        okapibm25 = wtq*(k1+1)*tf_list[i]/((k1*normalization)+tf_list[i])
-                        if postings_list[i] in dict1:
-                            dict1[postings_list[i]] += okapibm25
-                        else:
-                            dict1[postings_list[i]] = okapibm25
-                except:
+                term_id = self.term_id_map.get(term)
+                if term_id not in reader.postings_dict:
                     continue
- 
-        list_of_did_and_tfidf = list(dict1.items())
-        list_of_did_and_tfidf.sort(key=lambda x: x[1],reverse=True)
-        
-        final_result = []
-        for i in range(min(k, len(list_of_did_and_tfidf))):
-            final_result.append((list_of_did_and_tfidf[i][1],self.doc_id_map[list_of_did_and_tfidf[i][0]]))
-        return final_result
+                postings, tfs = reader.get_postings_arrays(term_id)
+                if len(postings) > 0:
+                    accumulator.add_bm25_norm(postings, tfs, stats.num_docs, stats.bm25_norm)
+        return accumulator
+
+    def retrieve_boolean(self, query, k = 10, offset = 0):
+        """
+        Query boolean dan phrase query (lihat boolean.py), misal
+        '"radioactive iodoacetate" AND (thyroid OR goiter) NOT rat'. Hanya
+        dokumen yang memenuhi query yang dikembalikan, diurutkan dengan BM25
+        term yang tidak dinegasikan (dokumen hasil NOT saja mendapat score 0).
+        Jika index tidak positional, phrase dicocokkan sebagai AND semua
+        term-nya.
+
+        Result
+        ------
+        List[(int, str)]
+            seperti retrieve_bm25
+        """
+        if len(self.term_id_map) == 0 or len(self.doc_id_map) == 0:
+            self.load()
+
+        accumulator = self.score_boolean(parse_query(query))
+        return [(score, self.doc_id_map[doc_id]) for (score, doc_id) in accumulator.top_k(k, offset)]
+
+    def score_boolean(self, node):
+        """
+        Mengevaluasi tree query boolean (hasil boolean.parse_query) dan
+        mengembalikan ScoreAccumulator berisi score BM25 term-term yang tidak
+        dinegasikan, dengan hanya dokumen yang memenuhi query yang match.
+        """
+        with self.open_reader() as reader:
+            stats = self.collection_stats(reader)
+            doc_ids = BooleanEvaluator(reader, self.term_id_map.get).evaluate(node)
+            accumulator = ScoreAccumulator(len(stats.bm25_norm))
+            for term_id in self.query_term_ids(reader, query_terms(node)):
+                postings, tfs = reader.get_postings_arrays(term_id)
+                if len(postings) > 0:
+                    accumulator.add_bm25_norm(postings, tfs, stats.num_docs, stats.bm25_norm)
+        return accumulator.restrict(doc_ids)
 
     # def retrieve_bm25_then_letor(self, query, k=10):
     #     # Membaca model lgb yang sudah ditrain untuk menghemat waktu (tidak perlu train ulang tiap query dijalankan)
@@ -371,7 +821,7 @@ class BSBIIndex:
 
     #     return sorted_scores_did
 
-    def index(self):
+    def index(self, workers = 1, memory_budget = None):
         """
         Base indexing code
         BAGIAN UTAMA untuk melakukan Indexing dengan skema BSBI (blocked-sort
@@ -380,27 +830,460 @@ class BSBIIndex:
         Method ini scan terhadap semua data di collection, memanggil parse_block
         untuk parsing dokumen dan memanggil invert_write yang melakukan inversion
         di setiap block dan menyimpannya ke index yang baru.
+
+        Parameters
+        ----------
+        workers: int
+            Jika > 1, parsing dan inversion setiap block dijalankan paralel di
+            beberapa worker process (lihat index_parallel). Index yang
+            dihasilkan identik dengan indexing serial.
+        memory_budget: int
+            Jika diisi, dokumen di-index secara SPIMI dengan batas memori
+            memory_budget bytes untuk postings di memori (lihat index_spimi),
+            bukan per folder di collection.
+
+        Index ditulis langsung ke output_dir, sehingga hanya untuk direktori
+        baru atau layout lama. Jika output_dir memakai generation (ada
+        CURRENT, lihat generations.py), ValueError: file generation yang
+        aktif (mungkin sedang dibaca) tidak boleh ditimpa; gunakan rebuild.
+        """
+        self.check_writable()
+        if memory_budget is not None:
+            if workers > 1:
+                raise ValueError("indexing SPIMI (memory_budget) tidak mendukung workers > 1")
+            self.index_spimi(memory_budget)
+        else:
+            self.invert_blocks(workers)
+    
+        self.save()
+        self.merge_index()
+        self.build_docstore()
+
+    def check_writable(self):
+        """ValueError jika output_dir adalah generation yang aktif (lihat index)"""
+        if self.generation is not None:
+            raise ValueError(f"{self.root_dir} memakai generation (lihat generations.py), "
+                             "indexing penuh harus lewat rebuild")
+
+    def invert_blocks(self, workers = 1):
+        """
+        Parsing dan inversion setiap block (sub-directory data_dir, terurut)
+        menjadi intermediate index, serial atau paralel (lihat index).
         """
+        block_dirs = sorted(next(os.walk(self.data_dir))[1])
+        if workers > 1:
+            self.index_parallel(block_dirs, workers)
+            return
         # loop untuk setiap sub-directory di dalam folder collection (setiap block)
-        for block_dir_relative in tqdm(sorted(next(os.walk(self.data_dir))[1])):
+        for block_dir_relative in tqdm(block_dirs):
             td_pairs = self.parse_block(block_dir_relative)
             index_id = 'intermediate_index_'+block_dir_relative
             self.intermediate_indices.append(index_id)
-            with InvertedIndexWriter(index_id, self.postings_encoding, directory = self.output_dir) as index:
+            with InvertedIndexWriter(index_id, self.writer_encoding, directory = self.output_dir, \
+                                     positional = self.positional) as index:
                 self.invert_write(td_pairs, index)
                 td_pairs = None
-    
+
+    def index_shards(self, num_shards, workers = 1):
+        """
+        Sama seperti index, tetapi block-block di data_dir (terurut) dibagi
+        menjadi num_shards rentang berurutan, dan intermediate index setiap
+        rentang di-merge menjadi satu shard <index_name>.shard<i> (lihat
+        shards.py), bukan satu merged index. termID dan docID tetap global,
+        dan document store tetap satu untuk semua shard.
+
+        Returns
+        -------
+        List[str]
+            nama semua shard, sesuai urutan docID
+        """
+        self.check_writable()
+        self.invert_blocks(workers)
+        self.save()
+        names = []
+        for number, intermediate_indices in enumerate(split_ranges(self.intermediate_indices, num_shards)):
+            name = shard_name(self.index_name, number)
+            build_params = {'data_dir': self.data_dir, 'index_name': self.index_name, 'k1': K1, 'b': B, 'shard': number}
+            with InvertedIndexWriter(name, self.writer_encoding, directory = self.output_dir, block_size = self.block_size, \
+                                     build_params = build_params, positional = self.positional) as merged_index:
+                with contextlib.ExitStack() as stack:
+                    indices = [stack.enter_context(InvertedIndexReader(index_id, self.postings_encoding, directory=self.output_dir))
+                               for index_id in intermediate_indices]
+                    self.merge(indices, merged_index)
+            names.append(name)
+        write_shards(self.index_name, self.output_dir, names)
+        self.build_docstore()
+        return names
+
+    def rebuild(self, workers = 1, memory_budget = None, keep = KEEP_GENERATIONS, pinned = (), shards = None):
+        """
+        Rebuild penuh (lihat index) ke direktori generation baru di root_dir,
+        lalu pointer CURRENT dipindah ke generation tersebut secara atomic
+        (lihat generations.py). Selama rebuild, index di generation yang
+        aktif tetap utuh dan bisa dibaca oleh proses lain; instance ini juga
+        tetap memakai generation lamanya. Document store (dengan kompresi
+        yang sama) dan index impact ikut dibangun jika ada di generation
+        yang aktif. Index baru positional jika index ini positional.
+        Intermediate index tidak disimpan di generation baru.
+        Jika shards diisi, index dibangun sebagai shards shard (lihat
+        index_shards).
+
+        Setelah itu generation lama dihapus (lihat prune_generations),
+        kecuali keep generation terakhir dan generation di pinned.
+
+        Returns
+        -------
+        int
+            nomor generation baru
+        """
+        generation, directory = create_generation(self.root_dir)
+        index = BSBIIndex(data_dir = self.data_dir, output_dir = directory, postings_encoding = self.postings_encoding, \
+                          index_name = self.index_name, block_size = self.block_size, positional = self.positional)
+        if shards is not None:
+            if memory_budget is not None:
+                raise ValueError("indexing SPIMI (memory_budget) tidak mendukung shards")
+            index.index_shards(shards, workers)
+        else:
+            index.index(workers, memory_budget)
+        for index_id in index.intermediate_indices:
+            remove_index(index_id, directory)
+
+        store_path = docstore_path(self.index_name, self.output_dir)
+        if os.path.exists(store_path):
+            store = DocumentStore(store_path)
+            compression = store.compression
+            store.close()
+            if compression != 'none':
+                index.build_docstore(compression)
+        impact_metadata_path = impact_paths(self.index_name, self.output_dir)[1]
+        if os.path.exists(impact_metadata_path):
+            with open(impact_metadata_path, 'rb') as f:
+                index.build_impact_index(pickle.load(f)['bits'])
+
+        publish(self.root_dir, generation)
+        prune_generations(self.root_dir, keep, set(pinned) | {self.generation})
+        return generation
+
+    def index_spimi(self, memory_budget = DEFAULT_MEMORY_BUDGET):
+        """
+        Parsing dan inversion semua dokumen di data_dir (termasuk file dan
+        sub-direktori di kedalaman berapa pun) secara streaming dengan
+        SPIMIInverter (lihat spimi.py): intermediate index ditulis setiap
+        kali postings di memori mencapai memory_budget bytes, tidak
+        tergantung struktur folder.
+        """
+        inverter = SPIMIInverter(self.term_id_map, self.doc_id_map, self.output_dir, \
+                                 self.writer_encoding, memory_budget, positional = self.positional)
+        self.intermediate_indices.extend(inverter.invert(tqdm(iter_documents(self.data_dir))))
+
+    def build_docstore(self, compression = 'none', index_name = None, deleted = None):
+        """
+        Menulis isi semua dokumen di doc_id_map (sesuai urutan docID) ke
+        document store <index_name>.docstore (lihat docstore.py). index_name
+        default: self.index_name. Dokumen dengan docID di deleted (lihat
+        tombstones.py) disimpan kosong.
+        """
+        if len(self.doc_id_map) == 0:
+            self.load()
+        documents = []
+        for doc_id, name in enumerate(self.doc_id_map.id_to_str):
+            if deleted and doc_id in deleted:
+                documents.append("")
+                continue
+            with open(os.path.join(*split_path(name)), 'r') as f:
+                documents.append(f.read())
+        write_docstore(docstore_path(index_name or self.index_name, self.output_dir), documents, compression)
+
+    def add_documents(self, memory_budget = DEFAULT_MEMORY_BUDGET):
+        """
+        Incremental indexing: hanya file di data_dir yang belum ada di
+        doc_id_map yang di-index (SPIMI, lihat spimi.py), menjadi satu
+        segment baru (lihat segments.py). term_id_map dan doc_id_map yang
+        diperbarui disimpan, lalu segment didaftarkan di <index_name>.segments.
+        Waktu yang dibutuhkan sebanding dengan banyaknya dokumen baru
+        (ditambah membaca daftar file dan memuat term_id_map/doc_id_map).
+
+        Sampai compaction (lihat compact), isi dokumen baru dibaca dari
+        file-nya (bukan dari document store), dan index impact (jika ada)
+        tidak dipakai (lihat has_current_impact_index).
+
+        Returns
+        -------
+        int
+            banyaknya dokumen yang ditambahkan
+        """
+        self.load()
+        segments, number = read_segments(self.index_name, self.output_dir)
+        name = segment_name(self.index_name, number)
+        # dokumen yang di-update (lihat update_documents) sudah tidak ada di str_to_id
+        indexed = {tuple(split_path(doc)) for doc in self.doc_id_map.str_to_id}
+        paths = [path for path in document_paths(self.data_dir) if tuple(split_path(path)) not in indexed]
+        num_docs = len(self.doc_id_map)
+        inverter = SPIMIInverter(self.term_id_map, self.doc_id_map, self.output_dir, self.writer_encoding, \
+                                 memory_budget, index_prefix = name + '.intermediate_', positional = self.positional)
+        intermediate_indices = inverter.invert(iter_documents(self.data_dir, paths))
+        if len(intermediate_indices) == 0:
+            return 0
+
+        build_params = {'data_dir': self.data_dir, 'index_name': self.index_name, 'k1': K1, 'b': B, 'segment': number}
+        with InvertedIndexWriter(name, self.writer_encoding, directory = self.output_dir, block_size = self.block_size, \
+                                 build_params = build_params, positional = self.positional) as segment:
+            with contextlib.ExitStack() as stack:
+                indices = [stack.enter_context(InvertedIndexReader(index_id, self.writer_encoding, directory=self.output_dir))
+                           for index_id in intermediate_indices]
+                self.merge(indices, segment)
+        for index_id in intermediate_indices:
+            remove_index(index_id, self.output_dir)
+
+        # term_id_map dan doc_id_map disimpan sebelum segment didaftarkan,
+        # sehingga termID/docID di segment yang aktif selalu sudah dikenal
+        self.save()
+        write_segments(self.index_name, self.output_dir, segments + [name], number + 1)
+        self.doc_id_by_parts = None
+        return len(self.doc_id_map) - num_docs
+
+    def delete_documents(self, paths):
+        """
+        Menghapus dokumen dari index: docID setiap dokumen (path dengan
+        separator apa pun) ditandai di tombstone index yang memuatnya (merged
+        index atau segment, lihat tombstones.py). Dokumen tersebut langsung
+        tidak lagi muncul di hasil query (dan tidak dihitung di N, avgdl, dan
+        df), dan baru benar-benar dibuang dari index saat compaction. Sampai
+        compaction, index impact (jika ada) tidak dipakai (lihat
+        has_current_impact_index).
+
+        Returns
+        -------
+        int
+            banyaknya dokumen yang baru dihapus
+        """
+        self.load()
+        self.doc_id_by_parts = None
+        doc_ids = {self.find_doc_id(path) for path in paths} - {None}
+        segments, _ = read_segments(self.index_name, self.output_dir)
+        names = self.base_indices() + segments
+        deleted = 0
+        for name, tombstones in zip(names, self.load_tombstones(names)):
+            with InvertedIndexReader(name, self.postings_encoding, directory = self.output_dir) as reader:
+                owned = [doc_id for doc_id in doc_ids if doc_id in reader.doc_length]
+            if len(owned) == 0:
+                continue
+            tombstones = tombstones or Tombstones()
+            deleted += tombstones.add(owned)
+            tombstones.save(tombstones_path(name, self.output_dir))
+        return deleted
+
+    def update_documents(self, paths, memory_budget = DEFAULT_MEMORY_BUDGET):
+        """
+        Meng-index ulang dokumen yang isinya berubah: versi lama dihapus
+        (lihat delete_documents), lalu dokumen di-index lagi dengan docID
+        baru di segment baru (lihat add_documents).
+
+        Returns
+        -------
+        int
+            banyaknya dokumen yang di-index ulang
+        """
+        self.delete_documents(paths)
+        for path in paths:
+            doc_id = self.find_doc_id(path)
+            if doc_id is not None:
+                # nama lama tetap di id_to_str (docID lama tetap valid), tetapi
+                # tidak lagi di str_to_id, sehingga add_documents memberi docID baru
+                del self.doc_id_map.str_to_id[self.doc_id_map[doc_id]]
         self.save()
+        self.doc_id_by_parts = None
+        return self.add_documents(memory_budget)
 
-        with InvertedIndexWriter(self.index_name, self.postings_encoding, directory = self.output_dir) as merged_index:
+    def compact(self, keep = KEEP_GENERATIONS, pinned = ()):
+        """
+        Compaction: me-merge merged index dan semua segment-nya menjadi satu
+        merged index baru (beserta lexicon, stats, document store, dan index
+        impact jika ada) tanpa segment. Dokumen yang dihapus (lihat
+        delete_documents) dibuang dari index, sehingga tombstone-nya tidak
+        lagi diperlukan.
+
+        Seperti rebuild, hasilnya ditulis ke direktori generation baru di
+        root_dir lalu di-publish dengan mengganti pointer CURRENT secara
+        atomic (lihat generations.py), sehingga reader (misal
+        Searcher.reload_if_changed di proses lain) selalu melihat satu set
+        file yang utuh, tidak pernah campuran file lama dan file hasil
+        compaction. Compaction dapat dijalankan di background selagi index
+        dipakai untuk query; instance ini tetap memakai generation lamanya.
+        Untuk index dengan layout lama (tanpa CURRENT), compaction membuat
+        generation pertama.
+
+        Setelah itu generation lama dihapus (lihat prune_generations),
+        kecuali keep generation terakhir dan generation di pinned.
+
+        Index yang di-shard (lihat index_shards) belum bisa di-compact
+        (ValueError); shard baru bisa dibangun ulang dengan rebuild.
+
+        Returns
+        -------
+        bool
+            False jika tidak ada segment maupun dokumen yang dihapus
+        """
+        self.check_compactable()
+        segments, number = read_segments(self.index_name, self.output_dir)
+        tombstones = [t for t in self.load_tombstones([self.index_name] + segments) if t is not None]
+        if len(segments) == 0 and len(tombstones) == 0:
+            return False
+        deleted = {doc_id for t in tombstones for doc_id in t.doc_ids().tolist()}
+        self.load()
+
+        generation, directory = create_generation(self.root_dir)
+        index = BSBIIndex(data_dir = self.data_dir, output_dir = directory, postings_encoding = self.postings_encoding, \
+                          index_name = self.index_name, block_size = self.block_size, positional = self.positional)
+        index.term_id_map, index.doc_id_map = self.term_id_map, self.doc_id_map
+        index.save()
+        build_params = {'data_dir': self.data_dir, 'index_name': self.index_name, 'k1': K1, 'b': B}
+        with InvertedIndexWriter(self.index_name, self.writer_encoding, directory = directory, block_size = self.block_size, \
+                                 build_params = build_params, positional = self.positional) as merged_index:
+            with contextlib.ExitStack() as stack:
+                indices = [stack.enter_context(InvertedIndexReader(index_id, self.postings_encoding, directory=self.output_dir))
+                           for index_id in [self.index_name] + segments]
+                self.merge(indices, merged_index, deleted)
+        convert(self.index_name, directory)
+        index.build_stats()
+        # nomor segment berikutnya tetap dilanjutkan
+        write_segments(self.index_name, directory, [], number)
+
+        store_path = docstore_path(self.index_name, self.output_dir)
+        if os.path.exists(store_path):
+            store = DocumentStore(store_path)
+            compression = store.compression
+            store.close()
+            index.build_docstore(compression, deleted = deleted)
+        impact_metadata_path = impact_paths(self.index_name, self.output_dir)[1]
+        if os.path.exists(impact_metadata_path):
+            with open(impact_metadata_path, 'rb') as f:
+                index.build_impact_index(pickle.load(f)['bits'])
+
+        publish(self.root_dir, generation)
+        prune_generations(self.root_dir, keep, set(pinned) | {self.generation})
+        return True
+
+    def check_compactable(self):
+        """ValueError jika index tidak bisa di-compact (index yang di-shard, lihat compact)"""
+        if len(read_shards(self.index_name, self.output_dir)) > 0:
+            raise ValueError("compaction index yang di-shard belum didukung, gunakan rebuild")
+
+    def index_parallel(self, block_dirs, workers):
+        """
+        Parsing dan inversion block-block secara paralel. Setiap worker
+        (parse_block_worker) memakai IdMap lokal dan menulis intermediate
+        index dengan termID/docID lokal. Hasil worker diproses sesuai urutan
+        block: term dan dokumen lokal didaftarkan ke term_id_map dan
+        doc_id_map global sesuai urutan ID lokalnya (= urutan kemunculan
+        pertama di block tersebut), sehingga ID global yang dihasilkan sama
+        persis dengan indexing serial. Intermediate index kemudian ditulis
+        ulang dengan ID global (lihat remap_intermediate).
+        """
+        tasks = [(self.data_dir, self.output_dir, self.writer_encoding, block_dir_relative, self.positional) \
+                 for block_dir_relative in block_dirs]
+        with multiprocessing.Pool(workers) as pool:
+            # imap mengembalikan hasil sesuai urutan block; block yang sudah
+            # selesai diproses selagi worker lain masih parsing
+            for block_dir_relative, terms, docs in tqdm(pool.imap(parse_block_worker, tasks), total=len(tasks)):
+                term_ids = [self.term_id_map[term] for term in terms]
+                doc_ids = [self.doc_id_map[doc] for doc in docs]
+                index_id = 'intermediate_index_'+block_dir_relative
+                self.remap_intermediate(LOCAL_INDEX_PREFIX+block_dir_relative, index_id, term_ids, doc_ids)
+                self.intermediate_indices.append(index_id)
+
+    def remap_intermediate(self, local_index_id, index_id, term_ids, doc_ids):
+        """
+        Menulis ulang intermediate index dengan termID/docID lokal
+        (local_index_id) menjadi intermediate index dengan ID global
+        (index_id), lalu menghapus index lokal.
+
+        Parameters
+        ----------
+        term_ids, doc_ids: List[int]
+            termID/docID global untuk setiap termID/docID lokal
+        """
+        with InvertedIndexReader(local_index_id, self.postings_encoding, directory = self.output_dir) as local_index:
+            with InvertedIndexWriter(index_id, self.writer_encoding, directory = self.output_dir, \
+                                     positional = self.positional) as index:
+                # term diurutkan ulang berdasarkan termID global, seperti pada invert_write
+                for local_term_id in sorted(local_index.terms, key = lambda t: term_ids[t]):
+                    postings_list, tf_list = local_index.get_postings_list(local_term_id)
+                    if not self.positional:
+                        postings = sorted((doc_ids[doc_id], tf) for doc_id, tf in zip(postings_list, tf_list))
+                        index.append(term_ids[local_term_id], [doc_id for doc_id, _ in postings], [tf for _, tf in postings])
+                        continue
+                    positions = np.split(local_index.get_positions(local_term_id, tf_list), np.cumsum(tf_list)[:-1])
+                    postings = sorted((doc_ids[doc_id], tf, i) for i, (doc_id, tf) in enumerate(zip(postings_list, tf_list)))
+                    index.append(term_ids[local_term_id], [doc_id for doc_id, _, _ in postings], [tf for _, tf, _ in postings], \
+                                 positions = np.concatenate([positions[i] for _, _, i in postings]))
+        remove_index(local_index_id, self.output_dir)
+
+    def merge_index(self):
+        """
+        Melakukan merging semua intermediate indices (self.intermediate_indices)
+        menjadi merged index, lalu menyimpan metadata-nya juga sebagai lexicon.
+        Jika self.intermediate_indices kosong (misal index sudah dibangun
+        sebelumnya), dipakai intermediate index dari setiap block di collection.
+        """
+        if len(self.intermediate_indices) == 0:
+            self.intermediate_indices = ['intermediate_index_'+block_dir_relative \
+                                         for block_dir_relative in sorted(next(os.walk(self.data_dir))[1])]
+
+        # parameter yang menentukan isi index dicatat di manifest merged index
+        build_params = {'data_dir': self.data_dir, 'index_name': self.index_name, 'k1': K1, 'b': B}
+        with InvertedIndexWriter(self.index_name, self.writer_encoding, directory = self.output_dir, block_size = self.block_size, \
+                                 build_params = build_params, positional = self.positional) as merged_index:
             with contextlib.ExitStack() as stack:
                 indices = [stack.enter_context(InvertedIndexReader(index_id, self.postings_encoding, directory=self.output_dir))
                                for index_id in self.intermediate_indices]
                 self.merge(indices, merged_index)
 
+        # metadata merged index juga disimpan sebagai lexicon biner (lihat lexicon.py)
+        convert(self.index_name, self.output_dir)
+        self.build_stats()
+        # merged index yang baru menggantikan shard dari indexing sebelumnya
+        if os.path.exists(shards_path(self.index_name, self.output_dir)):
+            os.remove(shards_path(self.index_name, self.output_dir))
+
+
+def with_reader(reader):
+    """Iterasi reader, dengan reader tersebut di akhir setiap tuple (lihat BSBIIndex.merge)"""
+    for term, postings_list, tf_list in reader:
+        yield term, postings_list, tf_list, reader
+
+
+LOCAL_INDEX_PREFIX = 'local_intermediate_index_'
+
+def parse_block_worker(task):
+    """
+    Dijalankan di worker process oleh BSBIIndex.index_parallel: parsing dan
+    inversion satu block dengan IdMap lokal (kosong), lalu menulis
+    intermediate index dengan termID/docID lokal.
+
+    Parameters
+    ----------
+    task: Tuple[str, str, postings_encoding, str, bool]
+        (data_dir, output_dir, postings_encoding, block_dir_relative, positional)
+
+    Returns
+    -------
+    Tuple[str, List[str], List[str]]
+        block_dir_relative, term untuk setiap termID lokal, dan nama dokumen
+        untuk setiap docID lokal
+    """
+    data_dir, output_dir, postings_encoding, block_dir_relative, positional = task
+    local = BSBIIndex(data_dir = data_dir, output_dir = output_dir, postings_encoding = postings_encoding, positional = positional)
+    td_pairs = local.parse_block(block_dir_relative)
+    with InvertedIndexWriter(LOCAL_INDEX_PREFIX+block_dir_relative, postings_encoding, directory = output_dir, \
+                             positional = positional) as index:
+        local.invert_write(td_pairs, index)
+    return block_dir_relative, local.term_id_map.id_to_str, local.doc_id_map.id_to_str
+
 
 if __name__ == "__main__":
     BSBI_instance = BSBIIndex(data_dir = 'collection', \
                               postings_encoding = VBEPostings, \
-                              output_dir = 'index')
-    BSBI_instance.index() # memulai indexing!
+                              output_dir = 'index', \
+                              positional = True)
+    BSBI_instance.rebuild(workers = os.cpu_count()) # memulai indexing ke generation baru!
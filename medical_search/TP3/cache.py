@@ -0,0 +1,167 @@
+"""
+Cache hasil query (ranking) untuk Searcher.
+
+Key sebuah entry adalah (model scoring, versi index, term-term query hasil
+analisis), sehingga query yang berbeda penulisannya tetapi sama hasil
+analisisnya ("Children's psychodrama" dan "childrens psychodrama") memakai
+entry yang sama. Versi index (nomor generation dan waktu modifikasi metadata
+index, lihat Searcher.index_version) ikut menjadi bagian key: setelah index
+di-reload, entry lama tidak pernah terpakai lagi dan akan tergusur dengan
+sendirinya.
+
+Dua backend tersedia dengan interface yang sama (get, set, clear):
+
+    LocalCache  : di memori proses, LRU dengan ukuran terbatas + TTL
+    DjangoCache : memakai cache framework Django (misal LocMemCache,
+                  Memcached, Redis), sehingga bisa dibagi antar worker
+"""
+
+import time
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    Base class backend cache, mencatat banyaknya hit dan miss. Penghitung
+    hit dan miss dilindungi oleh lock, karena get bisa dipanggil bersamaan
+    oleh beberapa thread (misal server Django yang threaded).
+
+    Attributes
+    ----------
+    hits: int
+        banyaknya get yang menemukan entry
+    misses: int
+        banyaknya get yang tidak menemukan entry (tidak ada atau kedaluwarsa)
+    lock: threading.Lock
+        lock untuk penghitung (dan untuk entries di LocalCache)
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Mengembalikan value untuk key, atau None jika tidak ada"""
+        value = self.lookup(key)
+        with self.lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def lookup(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self):
+        """Mengembalikan dictionary hits, misses, dan hit_rate"""
+        with self.lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else 0.0}
+
+
+class LocalCache(ResultCache):
+    """
+    Cache di memori proses: LRU dengan maksimum max_entries entry, dan
+    setiap entry kedaluwarsa ttl detik setelah disimpan (None: tidak pernah).
+    Aman dipakai bersama oleh beberapa thread.
+    """
+    def __init__(self, max_entries = 1024, ttl = 3600, clock = time.monotonic):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()    # key -> (expires_at, value), urutan dari yang paling lama tidak dipakai
+
+    def lookup(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and self.clock() >= expires_at:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires_at = None if self.ttl is None else self.clock() + self.ttl
+        with self.lock:
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last = False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class DjangoCache(ResultCache):
+    """
+    Cache yang memakai cache framework Django (settings.CACHES[alias]).
+    Eviction (LRU, ukuran maksimum) diatur oleh backend Django-nya; ttl
+    dipakai sebagai timeout setiap entry.
+    """
+    def __init__(self, alias = 'default', ttl = 3600, prefix = 'medical_search:results:'):
+        super().__init__()
+        from django.core.cache import caches
+        self.backend = caches[alias]
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def backend_key(self, key):
+        # key Django harus string pendek tanpa spasi
+        return self.prefix + hashlib.sha1(pickle.dumps(key)).hexdigest()
+
+    def lookup(self, key):
+        return self.backend.get(self.backend_key(key))
+
+    def set(self, key, value):
+        self.backend.set(self.backend_key(key), value, timeout = self.ttl)
+
+    def clear(self):
+        self.backend.clear()
+
+
+if __name__ == '__main__':
+
+    now = [0.0]
+    cache = LocalCache(max_entries = 2, ttl = 10, clock = lambda: now[0])
+    cache.set(('bm25', 1, ('lipid',)), 'a')
+    cache.set(('bm25', 1, ('toxemia',)), 'b')
+    assert cache.get(('bm25', 1, ('lipid',))) == 'a', "cache salah"
+    cache.set(('bm25', 1, ('pregnanc',)), 'c')
+    assert cache.get(('bm25', 1, ('toxemia',))) is None, "entry yang paling lama tidak dipakai harus tergusur"
+    assert cache.get(('bm25', 1, ('lipid',))) == 'a' and len(cache) == 2, "LRU salah"
+    assert cache.get(('tfidf', 1, ('lipid',))) is None, "model scoring harus menjadi bagian key"
+    now[0] = 10.0
+    assert cache.get(('bm25', 1, ('lipid',))) is None and len(cache) == 1, "entry kedaluwarsa harus dibuang"
+    assert cache.stats() == {'hits': 2, 'misses': 3, 'hit_rate': 0.4}, "statistik salah"
+
+    # get dari banyak thread sekaligus: tidak ada hit/miss yang hilang
+    cache = LocalCache()
+    cache.set('lipid', 'a')
+    def worker():
+        for i in range(2000):
+            cache.get('lipid' if i % 2 == 0 else 'toxemia')
+    threads = [threading.Thread(target = worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.stats() == {'hits': 8000, 'misses': 8000, 'hit_rate': 0.5}, "statistik dengan banyak thread salah"
@@ -1,4 +1,12 @@
 import array
+import numpy as np
+
+# list dengan paling sedikit ENCODE_VECTORIZE_THRESHOLD angka di-encode, dan
+# bytestream dengan paling sedikit DECODE_VECTORIZE_THRESHOLD bytes di-decode,
+# secara vectorized dengan NumPy; input yang lebih pendek lebih cepat diproses
+# dengan loop Python karena overhead pemanggilan NumPy
+ENCODE_VECTORIZE_THRESHOLD = 64
+DECODE_VECTORIZE_THRESHOLD = 256
 
 class StandardPostings:
     """ 
@@ -88,6 +96,17 @@ class StandardPostings:
         """
         return StandardPostings.decode(encoded_tf_list)
 
+    @staticmethod
+    def decode_array(encoded_postings_list):
+        """Sama seperti decode, tetapi hasilnya NumPy array (int64)"""
+        itemsize = array.array('L').itemsize
+        return np.frombuffer(encoded_postings_list, dtype=np.dtype(f'u{itemsize}')).astype(np.int64)
+
+    @staticmethod
+    def decode_tf_array(encoded_tf_list):
+        """Sama seperti decode_tf, tetapi hasilnya NumPy array (int64)"""
+        return StandardPostings.decode_array(encoded_tf_list)
+
 class VBEPostings:
     """ 
     Berbeda dengan StandardPostings, dimana untuk suatu postings list,
@@ -105,6 +124,13 @@ class VBEPostings:
 
     ASUMSI: postings_list untuk sebuah term MUAT di memori!
 
+    List yang panjang (lihat ENCODE_VECTORIZE_THRESHOLD dan
+    DECODE_VECTORIZE_THRESHOLD) di-encode dan di-decode
+    secara vectorized dengan NumPy (vb_encode_array, vb_decode_array);
+    bytestream yang dihasilkan sama persis dengan encoding per angka.
+    decode_array dan decode_tf_array mengembalikan NumPy array secara
+    langsung (dipakai oleh scoring engine).
+
     """
 
     @staticmethod
@@ -113,14 +139,14 @@ class VBEPostings:
         Encodes a number using Variable-Byte Encoding
         Lihat buku teks kita!
         """
-        bytes = []
-        while True:
-            bytes.insert(0, number % 128) # prepend ke depan
-            if number < 128:
-                break
-            number = number // 128
-        bytes[-1] += 128 # bit awal pada byte terakhir diganti 1
-        return array.array('B', bytes).tobytes()
+        # 7 bit terakhir di byte terakhir (bit awal = 1), lalu ke depan
+        encoded = bytearray([(number & 127) | 128])
+        number >>= 7
+        while number:
+            encoded.append(number & 127)
+            number >>= 7
+        encoded.reverse()
+        return bytes(encoded)
 
     @staticmethod
     def vb_encode(list_of_numbers):
@@ -128,10 +154,39 @@ class VBEPostings:
         Melakukan encoding (tentunya dengan compression) terhadap
         list of numbers, dengan Variable-Byte Encoding
         """
-        bytes = []
+        if len(list_of_numbers) >= ENCODE_VECTORIZE_THRESHOLD:
+            return VBEPostings.vb_encode_array(np.asarray(list_of_numbers, dtype=np.int64))
+        encoded = bytearray()
         for number in list_of_numbers:
-            bytes.append(VBEPostings.vb_encode_number(number))
-        return b"".join(bytes)
+            if number < 128:
+                encoded.append(number | 128)
+            else:
+                encoded += VBEPostings.vb_encode_number(number)
+        return bytes(encoded)
+
+    @staticmethod
+    def vb_encode_array(numbers):
+        """
+        Variable-Byte Encoding secara vectorized untuk NumPy array of
+        non-negative integers: panjang encoding setiap angka dihitung lebih
+        dulu, lalu setiap "digit" 7 bit langsung ditulis ke posisinya di
+        output yang sudah dialokasikan.
+        """
+        if len(numbers) == 0:
+            return b""
+        max_length = max(1, (int(numbers.max()).bit_length() + 6) // 7)
+        if max_length == 1:
+            return (numbers | 128).astype(np.uint8).tobytes()
+        lengths = np.ones(len(numbers), dtype=np.int64)
+        for k in range(1, max_length):
+            lengths += numbers >= (1 << (7 * k))
+        ends = np.cumsum(lengths) - 1
+        encoded = np.empty(ends[-1] + 1, dtype=np.uint8)
+        encoded[ends] = (numbers & 127) | 128
+        for k in range(1, max_length):
+            selected = lengths > k
+            encoded[ends[selected] - k] = (numbers[selected] >> (7 * k)) & 127
+        return encoded.tobytes()
 
     @staticmethod
     def encode(postings_list):
@@ -151,6 +206,9 @@ class VBEPostings:
             bytearray yang merepresentasikan urutan integer di postings_list
         """
         # TODO
+        if len(postings_list) >= ENCODE_VECTORIZE_THRESHOLD:
+            postings = np.asarray(postings_list, dtype=np.int64)
+            return VBEPostings.vb_encode_array(np.diff(postings, prepend=0))
         gap_based_list = [postings_list[0]]
         for i in range(len(postings_list)-1):
             gap_based_list.append(postings_list[i+1] - postings_list[i])
@@ -181,17 +239,44 @@ class VBEPostings:
         variable-byte encoding.
         """
         # TODO
+        if len(encoded_bytestream) >= DECODE_VECTORIZE_THRESHOLD:
+            return VBEPostings.vb_decode_array(encoded_bytestream).tolist()
+        # Iterasi langsung (bukan indexing) supaya decoding memoryview dari
+        # index yang di-memory-map sama cepatnya dengan decoding bytes
         numbers = []
         n = 0
-        for i in range(len(encoded_bytestream)):
-            if (encoded_bytestream[i] < 128):
-                n = 128*n + encoded_bytestream[i]
+        for byte in encoded_bytestream:
+            if (byte < 128):
+                n = 128*n + byte
             else:
-                n = 128*n + (encoded_bytestream[i] - 128)
+                n = 128*n + (byte - 128)
                 numbers.append(n)
                 n = 0
         return numbers
 
+    @staticmethod
+    def vb_decode_array(encoded_bytestream):
+        """
+        Decoding variable-byte encoding secara vectorized, hasilnya NumPy
+        array (int64). Byte terakhir setiap angka ditandai bit awal = 1;
+        kontribusi setiap byte (7 bit, digeser sesuai jaraknya ke byte
+        terakhir angka tersebut) dijumlahkan per angka dengan np.add.reduceat.
+        """
+        data = np.frombuffer(encoded_bytestream, dtype=np.uint8)
+        ends = np.flatnonzero(data >= 128)
+        if len(ends) == 0:
+            return np.zeros(0, dtype=np.int64)
+        starts = np.empty_like(ends)
+        starts[0] = 0
+        starts[1:] = ends[:-1] + 1
+        if len(ends) == ends[-1] + 1:
+            # semua angka hanya satu byte
+            return (data[:len(ends)] & 127).astype(np.int64)
+        data = data[:ends[-1] + 1]
+        number_of_byte = np.repeat(np.arange(len(ends)), ends - starts + 1)
+        shifts = 7 * (ends[number_of_byte] - np.arange(len(data)))
+        return np.add.reduceat((data & 127).astype(np.int64) << shifts, starts)
+
     @staticmethod
     def decode(encoded_postings_list):
         """
@@ -211,6 +296,8 @@ class VBEPostings:
             list of docIDs yang merupakan hasil decoding dari encoded_postings_list
         """
         # TODO
+        if len(encoded_postings_list) >= DECODE_VECTORIZE_THRESHOLD:
+            return VBEPostings.decode_array(encoded_postings_list).tolist()
         gap_based_list = VBEPostings.vb_decode(encoded_postings_list)
         postings_list = [gap_based_list[0]]
         for i in range(len(gap_based_list)-1):
@@ -235,11 +322,493 @@ class VBEPostings:
         """
         return VBEPostings.vb_decode(encoded_tf_list)
 
+    @staticmethod
+    def decode_array(encoded_postings_list):
+        """
+        Sama seperti decode, tetapi hasilnya NumPy array (int64); gap
+        dikembalikan menjadi docID dengan np.cumsum.
+        """
+        if len(encoded_postings_list) < DECODE_VECTORIZE_THRESHOLD:
+            return np.array(VBEPostings.decode(encoded_postings_list), dtype=np.int64)
+        return np.cumsum(VBEPostings.vb_decode_array(encoded_postings_list))
+
+    @staticmethod
+    def decode_tf_array(encoded_tf_list):
+        """Sama seperti decode_tf, tetapi hasilnya NumPy array (int64)"""
+        if len(encoded_tf_list) < DECODE_VECTORIZE_THRESHOLD:
+            return np.array(VBEPostings.vb_decode(encoded_tf_list), dtype=np.int64)
+        return VBEPostings.vb_decode_array(encoded_tf_list)
+
+def _pack_bits(values, width):
+    """
+    Bit-packing: setiap angka di values (NumPy array, < 2**width) ditulis
+    sebanyak width bit secara berurutan (little endian), dibulatkan ke byte.
+    """
+    if width == 0 or len(values) == 0:
+        return b""
+    bits = (values[:, None] >> np.arange(width, dtype=np.int64)) & 1
+    return np.packbits(bits.astype(np.uint8).ravel(), bitorder='little').tobytes()
+
+def _unpack_bits(data, count, width):
+    """
+    Kebalikan dari _pack_bits: membaca count angka selebar width bit dari
+    data (bytes-like), hasilnya NumPy array (int64).
+    """
+    positions = np.arange(count, dtype=np.int64) * width
+    return _gather_bits(data, positions, np.full(count, width, dtype=np.int64))
+
+def _gather_bits(data, positions, widths):
+    """
+    Membaca angka-angka selebar widths[i] bit yang dimulai di bit ke-
+    positions[i] pada data. Setiap angka dibaca sebagai satu uint64
+    (unaligned) yang dimulai di byte tempat bit pertamanya berada, lalu
+    digeser dan di-mask, semuanya secara vectorized (widths paling besar 57).
+    """
+    if len(positions) == 0:
+        return np.zeros(0, dtype=np.int64)
+    padded = np.zeros(len(data) + 8, dtype=np.uint8)
+    padded[:len(data)] = np.frombuffer(data, dtype=np.uint8)
+    words = np.ndarray((len(data) + 1,), dtype='<u8', buffer=padded, strides=(1,))
+    masks = (np.uint64(1) << widths.astype(np.uint64)) - np.uint64(1)
+    values = (words[positions >> 3] >> (positions & 7).astype(np.uint64)) & masks
+    return values.astype(np.int64)
+
+def _read_vb(data, pos):
+    """
+    Membaca satu angka variable-byte encoding (lihat VBEPostings) dari data
+    mulai posisi pos; mengembalikan (angka, posisi setelahnya).
+    """
+    n = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        if byte < 128:
+            n = 128*n + byte
+        else:
+            return 128*n + (byte - 128), pos
+
+class PForPostings:
+    """
+    Block bit-packing dengan frame of reference dan exceptions (PFor,
+    pemilihan lebar bit per block seperti OptPFor).
+
+    Postings list di-encode sebagai gap (seperti VBEPostings), TF list
+    di-encode langsung. List dibagi menjadi block berisi BLOCK_SIZE angka:
+
+        VB(banyaknya angka) | block 0 | block 1 | ...
+
+    dan setiap block:
+
+        lebar bit b (1 byte) | banyaknya exception e (1 byte) | VB(reference)
+        | (angka - reference) di-bit-pack b bit | posisi exception (e bytes)
+        | VB((angka - reference) >> b) untuk setiap exception
+
+    reference adalah angka terkecil di block. b dipilih per block supaya
+    ukuran block paling kecil; angka yang tidak muat di b bit menjadi
+    exception: b bit terbawahnya tetap di-bit-pack, sisanya disimpan
+    terpisah. Decoding satu block berupa operasi NumPy (shift dan mask)
+    atas seluruh block sekaligus.
+
+    ASUMSI: postings_list untuk sebuah term MUAT di memori!
+    """
+    BLOCK_SIZE = 128
+    # satu angka dibaca sebagai uint64 yang dimulai di byte manapun (lihat
+    # _unpack_bits), sehingga lebar bit paling besar 64 - 7
+    MAX_WIDTH = 57
+
+    @staticmethod
+    def best_width(values):
+        """
+        Lebar bit b dengan ukuran block (bit-packing + exceptions) terkecil.
+
+        Parameters
+        ----------
+        values: List[int]
+            angka-angka di block setelah dikurangi reference
+
+        Returns
+        -------
+        int
+        """
+        counts = {}
+        for value in values:
+            counts[value.bit_length()] = counts.get(value.bit_length(), 0) + 1
+        best, best_size = None, None
+        for width in range(min(max(counts), PForPostings.MAX_WIDTH) + 1):
+            size = (len(values) * width + 7) // 8
+            for length, count in counts.items():
+                if length > width:
+                    # posisi (1 byte) + VB dari bit-bit di atas width
+                    size += count * (1 + (length - width + 6) // 7)
+            if best_size is None or size < best_size:
+                best, best_size = width, size
+        return best
+
+    @staticmethod
+    def pfor_encode(list_of_numbers):
+        """Encode list of non-negative integers dengan PFor"""
+        encoded = bytearray(VBEPostings.vb_encode_number(len(list_of_numbers)))
+        for start in range(0, len(list_of_numbers), PForPostings.BLOCK_SIZE):
+            block = list_of_numbers[start:start + PForPostings.BLOCK_SIZE]
+            reference = min(block)
+            values = [number - reference for number in block]
+            width = PForPostings.best_width(values)
+            exceptions = [i for i, value in enumerate(values) if value >> width]
+            encoded.append(width)
+            encoded.append(len(exceptions))
+            encoded += VBEPostings.vb_encode_number(reference)
+            low = np.array(values, dtype=np.int64) & ((1 << width) - 1) if width else None
+            encoded += _pack_bits(low, width)
+            encoded += bytes(exceptions)
+            encoded += VBEPostings.vb_encode([values[i] >> width for i in exceptions])
+        return bytes(encoded)
+
+    @staticmethod
+    def pfor_decode(encoded_bytestream):
+        """
+        Decode bytestream hasil pfor_encode menjadi NumPy array (int64).
+        Header setiap block dibaca dengan loop Python, lalu angka-angka di
+        semua block di-unpack sekaligus (lihat _gather_bits).
+        """
+        total, pos = _read_vb(encoded_bytestream, 0)
+        block_size = PForPostings.BLOCK_SIZE
+        starts, widths, references = [], [], []
+        exceptions, highs = [], []
+        for start in range(0, total, block_size):
+            count = min(block_size, total - start)
+            width, num_exceptions = encoded_bytestream[pos], encoded_bytestream[pos + 1]
+            reference, pos = _read_vb(encoded_bytestream, pos + 2)
+            starts.append(8 * pos)
+            widths.append(width)
+            references.append(reference)
+            pos += (count * width + 7) // 8
+            if num_exceptions:
+                positions = list(encoded_bytestream[pos:pos + num_exceptions])
+                pos += num_exceptions
+                for i in positions:
+                    high, pos = _read_vb(encoded_bytestream, pos)
+                    exceptions.append(start + i)
+                    highs.append(high << width)
+        counts = np.full(len(starts), block_size, dtype=np.int64)
+        if len(starts):
+            counts[-1] = total - block_size * (len(starts) - 1)
+        offsets = np.arange(total, dtype=np.int64) % block_size
+        widths = np.repeat(np.array(widths, dtype=np.int64), counts)
+        positions = np.repeat(np.array(starts, dtype=np.int64), counts) + offsets * widths
+        values = _gather_bits(encoded_bytestream, positions, widths)
+        if exceptions:
+            values[exceptions] |= np.array(highs, dtype=np.int64)
+        return values + np.repeat(np.array(references, dtype=np.int64), counts)
+
+    @staticmethod
+    def encode(postings_list):
+        """
+        Encode postings_list (gap-based) dengan PFor
+
+        Parameters
+        ----------
+        postings_list: List[int]
+            List of docIDs (postings)
+
+        Returns
+        -------
+        bytes
+            bytearray yang merepresentasikan urutan integer di postings_list
+        """
+        gap_based_list = [postings_list[0]] + [postings_list[i+1] - postings_list[i] \
+                                               for i in range(len(postings_list)-1)]
+        return PForPostings.pfor_encode(gap_based_list)
+
+    @staticmethod
+    def encode_tf(tf_list):
+        """
+        Encode list of term frequencies dengan PFor
+
+        Parameters
+        ----------
+        tf_list: List[int]
+            List of term frequencies
+
+        Returns
+        -------
+        bytes
+            bytearray yang merepresentasikan nilai raw TF kemunculan term di setiap
+            dokumen pada list of postings
+        """
+        return PForPostings.pfor_encode(tf_list)
+
+    @staticmethod
+    def decode(encoded_postings_list):
+        """
+        Decodes postings_list dari sebuah stream of bytes
+
+        Parameters
+        ----------
+        encoded_postings_list: bytes
+            bytearray merepresentasikan encoded postings list sebagai keluaran
+            dari static method encode di atas.
+
+        Returns
+        -------
+        List[int]
+            list of docIDs yang merupakan hasil decoding dari encoded_postings_list
+        """
+        return PForPostings.decode_array(encoded_postings_list).tolist()
+
+    @staticmethod
+    def decode_tf(encoded_tf_list):
+        """
+        Decodes list of term frequencies dari sebuah stream of bytes
+
+        Parameters
+        ----------
+        encoded_tf_list: bytes
+            bytearray merepresentasikan encoded TF list sebagai keluaran
+            dari static method encode_tf di atas.
+
+        Returns
+        -------
+        List[int]
+            List of term frequencies yang merupakan hasil decoding dari encoded_tf_list
+        """
+        return PForPostings.decode_tf_array(encoded_tf_list).tolist()
+
+    @staticmethod
+    def decode_array(encoded_postings_list):
+        """Sama seperti decode, tetapi hasilnya NumPy array (int64)"""
+        return np.cumsum(PForPostings.pfor_decode(encoded_postings_list))
+
+    @staticmethod
+    def decode_tf_array(encoded_tf_list):
+        """Sama seperti decode_tf, tetapi hasilnya NumPy array (int64)"""
+        return PForPostings.pfor_decode(encoded_tf_list)
+
+class EliasFanoPostings:
+    """
+    Elias-Fano encoding untuk sequence integer yang tidak turun (monoton).
+    Sequence n angka dengan nilai terbesar u - 1 dibagi menjadi l =
+    floor(log2(u / n)) bit terbawah (di-bit-pack, n * l bit) dan bit-bit
+    atasnya, yang disimpan sebagai bit vector unary: angka ke-i menyalakan
+    bit ke-((angka >> l) + i). Totalnya paling banyak 2 + log2(u / n) bit
+    per angka, tanpa perlu menghitung gap.
+
+        VB(n) | l (1 byte) | bit terbawah (n * l bit) | bit vector bit atas
+
+    Postings list langsung di-encode (docID sudah terurut). TF list tidak
+    monoton, sehingga yang di-encode adalah prefix sum-nya.
+
+    ASUMSI: postings_list untuk sebuah term MUAT di memori!
+    """
+
+    @staticmethod
+    def ef_encode(monotone_numbers):
+        """Encode list of non-decreasing non-negative integers dengan Elias-Fano"""
+        n = len(monotone_numbers)
+        encoded = bytearray(VBEPostings.vb_encode_number(n))
+        if n == 0:
+            encoded.append(0)
+            return bytes(encoded)
+        numbers = np.asarray(monotone_numbers, dtype=np.int64)
+        universe = int(numbers[-1]) + 1
+        low_width = max(0, (universe // n).bit_length() - 1)
+        encoded.append(low_width)
+        encoded += _pack_bits(numbers & ((1 << low_width) - 1), low_width)
+        high = numbers >> low_width
+        high_bits = np.zeros(int(high[-1]) + n, dtype=np.uint8)
+        high_bits[high + np.arange(n)] = 1
+        encoded += np.packbits(high_bits, bitorder='little').tobytes()
+        return bytes(encoded)
+
+    @staticmethod
+    def ef_decode(encoded_bytestream):
+        """Decode bytestream hasil ef_encode menjadi NumPy array (int64)"""
+        n, pos = _read_vb(encoded_bytestream, 0)
+        low_width = encoded_bytestream[pos]
+        pos += 1
+        if n == 0:
+            return np.zeros(0, dtype=np.int64)
+        low_end = pos + (n * low_width + 7) // 8
+        low = _unpack_bits(encoded_bytestream[pos:low_end], n, low_width)
+        high_bits = np.unpackbits(np.frombuffer(encoded_bytestream[low_end:], dtype=np.uint8), bitorder='little')
+        high = np.flatnonzero(high_bits)[:n] - np.arange(n)
+        return (high << low_width) | low
+
+    @staticmethod
+    def encode(postings_list):
+        """
+        Encode postings_list (terurut) dengan Elias-Fano
+
+        Parameters
+        ----------
+        postings_list: List[int]
+            List of docIDs (postings)
+
+        Returns
+        -------
+        bytes
+            bytearray yang merepresentasikan urutan integer di postings_list
+        """
+        return EliasFanoPostings.ef_encode(postings_list)
+
+    @staticmethod
+    def encode_tf(tf_list):
+        """
+        Encode prefix sum dari list of term frequencies dengan Elias-Fano
+
+        Parameters
+        ----------
+        tf_list: List[int]
+            List of term frequencies
+
+        Returns
+        -------
+        bytes
+            bytearray yang merepresentasikan nilai raw TF kemunculan term di setiap
+            dokumen pada list of postings
+        """
+        return EliasFanoPostings.ef_encode(np.cumsum(np.asarray(tf_list, dtype=np.int64)))
+
+    @staticmethod
+    def decode(encoded_postings_list):
+        """
+        Decodes postings_list dari sebuah stream of bytes
+
+        Parameters
+        ----------
+        encoded_postings_list: bytes
+            bytearray merepresentasikan encoded postings list sebagai keluaran
+            dari static method encode di atas.
+
+        Returns
+        -------
+        List[int]
+            list of docIDs yang merupakan hasil decoding dari encoded_postings_list
+        """
+        return EliasFanoPostings.decode_array(encoded_postings_list).tolist()
+
+    @staticmethod
+    def decode_tf(encoded_tf_list):
+        """
+        Decodes list of term frequencies dari sebuah stream of bytes
+
+        Parameters
+        ----------
+        encoded_tf_list: bytes
+            bytearray merepresentasikan encoded TF list sebagai keluaran
+            dari static method encode_tf di atas.
+
+        Returns
+        -------
+        List[int]
+            List of term frequencies yang merupakan hasil decoding dari encoded_tf_list
+        """
+        return EliasFanoPostings.decode_tf_array(encoded_tf_list).tolist()
+
+    @staticmethod
+    def decode_array(encoded_postings_list):
+        """Sama seperti decode, tetapi hasilnya NumPy array (int64)"""
+        return EliasFanoPostings.ef_decode(encoded_postings_list)
+
+    @staticmethod
+    def decode_tf_array(encoded_tf_list):
+        """Sama seperti decode_tf, tetapi hasilnya NumPy array (int64)"""
+        return np.diff(EliasFanoPostings.ef_decode(encoded_tf_list), prepend=0)
+
+
+# Registry codec: nama codec dicatat di manifest index (lihat index.py),
+# sehingga reader bisa memilih codec yang tepat tanpa diberi tahu. Codec
+# buatan sendiri cukup ditambahkan ke dictionary ini sebelum indexing.
+CODECS = {
+    'standard': StandardPostings,
+    'vbe': VBEPostings,
+    'pfor': PForPostings,
+    'elias_fano': EliasFanoPostings,
+}
+
+def codec_name(postings_encoding):
+    """Nama postings_encoding di CODECS"""
+    for name, codec in CODECS.items():
+        if codec is postings_encoding:
+            return name
+    raise ValueError(f"codec {postings_encoding.__name__} tidak terdaftar di CODECS")
+
+def get_codec(name):
+    """Class postings encoding dengan nama name di CODECS"""
+    if name not in CODECS:
+        raise ValueError(f"codec {name} tidak dikenal")
+    return CODECS[name]
+
+def encode_positions(positions, tf_list):
+    """
+    Encode posisi kemunculan term di setiap dokumen sebuah postings list
+    (lihat InvertedIndexWriter.append): posisi di setiap dokumen diubah ke
+    gap (posisi pertama setiap dokumen tetap absolut), lalu semua gap di-encode
+    dengan Variable-Byte Encoding, apa pun codec postings-nya. Karena posisi
+    pertama setiap dokumen absolut, encoding postings list yang disambung
+    sama dengan sambungan encoding setiap bagiannya (lihat BSBIIndex.merge).
+
+    Parameters
+    ----------
+    positions: List[int]
+        posisi di setiap dokumen (terurut), disambung sesuai urutan postings;
+        panjangnya sum(tf_list)
+    tf_list: List[int]
+        banyaknya posisi di setiap dokumen
+
+    Returns
+    -------
+    bytes
+    """
+    if len(positions) < ENCODE_VECTORIZE_THRESHOLD:
+        gaps = []
+        start = 0
+        for tf in tf_list:
+            previous = 0
+            for position in positions[start:start + tf]:
+                gaps.append(position - previous)
+                previous = position
+            start += tf
+        return VBEPostings.vb_encode(gaps)
+    positions = np.asarray(positions, dtype=np.int64)
+    gaps = np.diff(positions, prepend=0)
+    starts = np.cumsum(tf_list)[:-1]
+    gaps[starts] = positions[starts]
+    return VBEPostings.vb_encode_array(gaps)
+
+def decode_positions(encoded_positions, tf_array):
+    """
+    Kebalikan encode_positions: gap dijumlahkan kumulatif, lalu dikurangi
+    jumlah kumulatif sampai akhir dokumen sebelumnya sehingga setiap dokumen
+    mulai lagi dari posisi absolut.
+
+    Returns
+    -------
+    np.ndarray
+        posisi (int64) di setiap dokumen, disambung sesuai urutan postings
+    """
+    if len(encoded_positions) < DECODE_VECTORIZE_THRESHOLD:
+        gaps = VBEPostings.vb_decode(encoded_positions)
+        positions = []
+        start = 0
+        for tf in tf_array.tolist():
+            position = 0
+            for gap in gaps[start:start + tf]:
+                position += gap
+                positions.append(position)
+            start += tf
+        return np.array(positions, dtype=np.int64)
+    gaps = VBEPostings.vb_decode_array(encoded_positions)
+    cumulative = np.cumsum(gaps)
+    ends = np.cumsum(tf_array)
+    offsets = np.zeros(len(ends), dtype=np.int64)
+    offsets[1:] = cumulative[ends[:-1] - 1]
+    return cumulative - np.repeat(offsets, tf_array)
+
 if __name__ == '__main__':
     
     postings_list = [34, 67, 89, 454, 2345738]
     tf_list = [12, 10, 3, 4, 1]
-    for Postings in [StandardPostings, VBEPostings]:
+    for Postings in [StandardPostings, VBEPostings, PForPostings, EliasFanoPostings]:
         print(Postings.__name__)
         encoded_postings_list = Postings.encode(postings_list)
         encoded_tf_list = Postings.encode_tf(tf_list)
@@ -255,3 +824,43 @@ if __name__ == '__main__':
         assert decoded_posting_list == postings_list, "hasil decoding tidak sama dengan postings original"
         assert decoded_tf_list == tf_list, "hasil decoding tidak sama dengan postings original"
         print()
+
+    # list panjang di-encode/decode secara vectorized, hasilnya harus sama
+    # persis dengan encoding per angka
+    postings_list = list(range(5, 100000, 37)) + [2**40]
+    tf_list = [(i * 7919) % 300 + 1 for i in range(len(postings_list))]
+    for Postings in [StandardPostings, VBEPostings, PForPostings, EliasFanoPostings]:
+        encoded_postings_list = Postings.encode(postings_list)
+        encoded_tf_list = Postings.encode_tf(tf_list)
+        assert Postings.decode(encoded_postings_list) == postings_list, "hasil decoding list panjang salah"
+        assert Postings.decode_tf(encoded_tf_list) == tf_list, "hasil decoding list panjang salah"
+        assert Postings.decode_array(memoryview(encoded_postings_list)).tolist() == postings_list, "decode_array salah"
+        assert Postings.decode_tf_array(encoded_tf_list).tolist() == tf_list, "decode_tf_array salah"
+    assert VBEPostings.vb_encode(tf_list) == b"".join(VBEPostings.vb_encode_number(n) for n in tf_list), \
+           "vb_encode vectorized tidak sama dengan encoding per angka"
+    assert VBEPostings.vb_decode_array(b"").tolist() == [], "decoding bytestream kosong salah"
+
+    # PFor: outlier disimpan sebagai exception, bukan memperlebar semua angka
+    gaps = [3] * 127 + [1000000]
+    assert PForPostings.best_width([gap - 3 for gap in gaps]) == 0, "pemilihan lebar bit salah"
+    assert PForPostings.pfor_decode(PForPostings.pfor_encode(gaps)).tolist() == gaps, "exception PFor salah"
+    assert len(PForPostings.pfor_encode(gaps)) < 16, "exception PFor tidak efisien"
+    # Elias-Fano: sequence tidak turun (termasuk angka yang sama) dan list kosong
+    for numbers in [[0], [5, 5, 5], [0, 1, 2, 3], [7, 100, 100000, 100001], []]:
+        assert EliasFanoPostings.ef_decode(EliasFanoPostings.ef_encode(numbers)).tolist() == numbers, "Elias-Fano salah"
+
+    assert all(get_codec(codec_name(codec)) is codec for codec in CODECS.values()), "registry codec salah"
+
+    # posisi: gap per dokumen, posisi pertama setiap dokumen absolut
+    positions, tfs = [300, 310, 400, 0, 5, 7, 1000], [3, 1, 2, 1]
+    encoded_positions = encode_positions(positions, tfs)
+    assert decode_positions(encoded_positions, np.array(tfs)).tolist() == positions, "decoding posisi salah"
+    assert len(encoded_positions) < len(VBEPostings.vb_encode(positions)), "posisi harus di-encode sebagai gap"
+    assert decode_positions(encode_positions([], []), np.array([], dtype=np.int64)).tolist() == [], "posisi kosong salah"
+    # posisi yang panjang di-encode/decode secara vectorized, hasilnya harus sama
+    tfs = [(i * 7919) % 5 + 1 for i in range(100)]
+    positions = [position * 13 + i for i, tf in enumerate(tfs) for position in range(tf)]
+    encoded_positions = encode_positions(positions, tfs)
+    assert encoded_positions == b"".join(encode_positions(positions[sum(tfs[:i]):sum(tfs[:i + 1])], [tf]) \
+                                         for i, tf in enumerate(tfs)), "encoding posisi vectorized salah"
+    assert decode_positions(encoded_positions, np.array(tfs)).tolist() == positions, "decoding posisi vectorized salah"
@@ -0,0 +1,163 @@
+"""
+Document store: isi semua dokumen yang di-index dalam satu file
+(<index_name>.docstore), sehingga menampilkan hasil pencarian (snippet) dan
+isi dokumen tidak perlu membuka satu file per dokumen.
+
+    MAGIC (4 bytes) | panjang header (uint32, little endian) | header (JSON)
+    | padding | offsets | isi dokumen 0 | isi dokumen 1 | ...
+
+offsets adalah array uint64 (byte order native mesin yang menulis, dicatat
+di header) berisi num_docs + 1 posisi: isi dokumen dengan docID d berada di
+[offsets[d], offsets[d + 1]), relatif terhadap awal file. Isi dokumen
+disimpan dalam UTF-8, dan jika compression = 'zlib' dikompresi per dokumen
+supaya setiap dokumen tetap bisa dibaca secara acak (O(1)) tanpa membaca
+dokumen lain. File dibaca dengan mmap.
+"""
+
+import os
+import re
+import sys
+import json
+import mmap
+import zlib
+import array
+import struct
+
+MAGIC = b'MSDS'
+VERSION = 1
+COMPRESSIONS = ('none', 'zlib')
+
+
+def docstore_path(index_name, directory=''):
+    return os.path.join(directory, index_name + '.docstore')
+
+
+def split_path(path):
+    """
+    Memecah path dokumen (misal 'collection\\6\\507.txt' hasil indexing di
+    Windows, atau 'collection/6/507.txt') menjadi list komponennya.
+    """
+    return re.split(r'[\\/]', path)
+
+
+def write_docstore(path, documents, compression='none'):
+    """
+    Parameters
+    ----------
+    path: str
+        path file docstore
+    documents: List[str]
+        isi dokumen untuk setiap docID (index list = docID)
+    compression: str
+        'zlib' atau 'none'
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"compression {compression} tidak dikenal")
+    header = json.dumps({'version': VERSION, 'byteorder': sys.byteorder, \
+                         'num_docs': len(documents), 'compression': compression}).encode('utf-8')
+    offsets = array.array('Q')
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        f.write(b'\0' * (-f.tell() % 8))
+        # tempat untuk offsets, diisi setelah semua dokumen ditulis
+        offsets_start = f.tell()
+        f.write(b'\0' * (8 * (len(documents) + 1)))
+        for text in documents:
+            offsets.append(f.tell())
+            body = text.encode('utf-8')
+            f.write(zlib.compress(body) if compression == 'zlib' else body)
+        offsets.append(f.tell())
+        f.seek(offsets_start)
+        f.write(offsets.tobytes())
+
+
+class DocumentStore:
+    """
+    Membaca file docstore dengan mmap.
+
+    Attributes
+    ----------
+    compression: str
+        'zlib' atau 'none'
+    """
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.mmap)
+        if self.view[:4] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} bukan file docstore")
+        header_length, = struct.unpack_from('<I', self.view, 4)
+        header = json.loads(bytes(self.view[8:8 + header_length]))
+        if header['version'] > VERSION or header['byteorder'] != sys.byteorder \
+           or header['compression'] not in COMPRESSIONS:
+            self.close()
+            raise ValueError(f"format docstore {path} tidak didukung")
+
+        self.num_docs = header['num_docs']
+        self.compression = header['compression']
+        offsets_start = 8 + header_length
+        offsets_start += -offsets_start % 8
+        self.offsets = self.view[offsets_start:offsets_start + 8 * (self.num_docs + 1)].cast('Q')
+
+    def __len__(self):
+        return self.num_docs
+
+    def __contains__(self, doc_id):
+        return type(doc_id) is int and 0 <= doc_id < self.num_docs
+
+    def raw(self, doc_id):
+        """Isi dokumen (sudah di-dekompresi) dalam bentuk bytes UTF-8"""
+        if doc_id not in self:
+            raise KeyError(doc_id)
+        data = self.view[self.offsets[doc_id]:self.offsets[doc_id + 1]]
+        return zlib.decompress(data) if self.compression == 'zlib' else bytes(data)
+
+    def body(self, doc_id):
+        """Isi dokumen dengan docID doc_id"""
+        return self.raw(doc_id).decode('utf-8')
+
+    def prefix(self, doc_id, length):
+        """
+        length karakter pertama isi dokumen. Hanya bagian awal dokumen yang
+        dibaca (dan di-dekompresi).
+        """
+        if doc_id not in self:
+            raise KeyError(doc_id)
+        data = self.view[self.offsets[doc_id]:self.offsets[doc_id + 1]]
+        # satu karakter UTF-8 paling panjang 4 bytes
+        if self.compression == 'zlib':
+            data = zlib.decompressobj().decompress(data, 4 * length)
+        else:
+            data = data[:4 * length]
+        return bytes(data).decode('utf-8', errors='ignore')[:length]
+
+    def close(self):
+        # memoryview harus di-release sebelum mmap bisa ditutup
+        if hasattr(self, 'offsets'):
+            self.offsets.release()
+        self.view.release()
+        self.mmap.close()
+        self.file.close()
+
+
+if __name__ == '__main__':
+
+    import tempfile
+
+    assert split_path('collection\\6\\507.txt') == split_path('collection/6/507.txt') == ['collection', '6', '507.txt'], \
+           "split_path salah"
+
+    documents = ["lipid metabolism in toxemia\nand normal pregnancy", "", "café " * 300]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = docstore_path('test', tmp)
+        for compression in COMPRESSIONS:
+            write_docstore(path, documents, compression)
+            store = DocumentStore(path)
+            assert len(store) == 3 and 3 not in store and store.compression == compression, "header salah"
+            assert [store.body(doc_id) for doc_id in range(3)] == documents, "isi dokumen salah"
+            assert store.prefix(0, 5) == "lipid" and store.prefix(2, 7) == "café ca", "prefix salah"
+            assert store.prefix(1, 10) == "", "prefix dokumen kosong salah"
+            store.close()
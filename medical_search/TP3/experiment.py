@@ -1,7 +1,15 @@
 import re
-from bsbi import BSBIIndex
-from compression import VBEPostings
 from math import log
+try:
+    from .bsbi import BSBIIndex
+    from .compression import VBEPostings
+except ImportError:
+    # dijalankan sebagai script (python experiment.py dari direktori TP3)
+    import os
+    import sys
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+    from medical_search.TP3.bsbi import BSBIIndex
+    from medical_search.TP3.compression import VBEPostings
 
 ######## >>>>> 3 IR metrics: RBP p = 0.8, DCG, dan AP
 
@@ -0,0 +1,172 @@
+"""
+Generation index: setiap rebuild penuh (BSBIIndex.rebuild) ditulis ke
+direktori baru <output_dir>/gen-<n>, bukan menimpa file index yang sedang
+dibaca. Setelah generation baru selesai ditulis, pointer <output_dir>/CURRENT
+(berisi nama direktori generation yang aktif) diganti secara atomic (file
+sementara, fsync, lalu os.replace), sehingga reader selalu melihat satu
+generation yang utuh: generation lama atau generation baru, tidak pernah
+campuran keduanya.
+
+BSBIIndex me-resolve output_dir ke direktori generation yang aktif saat
+instance dibuat dan tetap memakai generation tersebut sampai instance-nya
+dibuang (pinned); Searcher berpindah ke generation baru lewat reload (lihat
+Searcher.reload_if_changed). Jika CURRENT tidak ada (layout lama), index
+dibaca langsung dari output_dir.
+
+Generation lama dihapus oleh prune_generations, kecuali keep generation
+terakhir dan generation yang masih dipakai (pinned). Direktori generation
+yang lebih baru dari CURRENT (rebuild yang sedang berjalan) tidak dihapus.
+"""
+
+import os
+import shutil
+
+CURRENT = 'CURRENT'
+GENERATION_PREFIX = 'gen-'
+
+# banyaknya generation terakhir (termasuk yang aktif) yang tidak dihapus
+KEEP_GENERATIONS = 2
+
+
+def generation_name(generation):
+    return f'{GENERATION_PREFIX}{generation:06d}'
+
+
+def generation_dir(output_dir, generation):
+    return os.path.join(output_dir, generation_name(generation))
+
+
+def parse_generation(name):
+    """Nomor generation dari nama direktori, None jika bukan direktori generation"""
+    number = name[len(GENERATION_PREFIX):]
+    if not name.startswith(GENERATION_PREFIX) or not number.isdigit():
+        return None
+    return int(number)
+
+
+def current_generation(output_dir):
+    """Nomor generation yang aktif, None jika output_dir belum memakai generation"""
+    try:
+        with open(os.path.join(output_dir, CURRENT), 'r') as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    generation = parse_generation(name)
+    if generation is None:
+        raise ValueError(f"isi {os.path.join(output_dir, CURRENT)} tidak valid: {name!r}")
+    return generation
+
+
+def resolve(output_dir):
+    """
+    Returns
+    -------
+    Tuple[int, str]
+        nomor generation yang aktif (None untuk layout lama) dan direktori
+        tempat file index-nya
+    """
+    generation = current_generation(output_dir)
+    if generation is None:
+        return None, output_dir
+    return generation, generation_dir(output_dir, generation)
+
+
+def list_generations(output_dir):
+    """Nomor semua direktori generation di output_dir (terurut)"""
+    if not os.path.isdir(output_dir):
+        return []
+    generations = [parse_generation(name) for name in os.listdir(output_dir)
+                   if os.path.isdir(os.path.join(output_dir, name))]
+    return sorted(generation for generation in generations if generation is not None)
+
+
+def create_generation(output_dir):
+    """
+    Membuat direktori generation baru dengan nomor lebih besar dari semua
+    generation yang ada.
+
+    Returns
+    -------
+    Tuple[int, str]
+        nomor generation dan direktorinya
+    """
+    os.makedirs(output_dir, exist_ok = True)
+    generation = max(list_generations(output_dir) + [current_generation(output_dir) or 0]) + 1
+    directory = generation_dir(output_dir, generation)
+    os.mkdir(directory)
+    return generation, directory
+
+
+def publish(output_dir, generation):
+    """Mengganti pointer CURRENT ke generation secara atomic"""
+    path = os.path.join(output_dir, CURRENT)
+    with open(path + '.tmp', 'w') as f:
+        f.write(generation_name(generation) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + '.tmp', path)
+    if hasattr(os, 'O_DIRECTORY'):
+        # rename baru durable setelah direktorinya di-fsync (POSIX)
+        fd = os.open(output_dir, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def prune_generations(output_dir, keep = KEEP_GENERATIONS, pinned = ()):
+    """
+    Menghapus generation yang lebih lama dari CURRENT, kecuali keep generation
+    terakhir (termasuk yang aktif) dan generation di pinned. Generation yang
+    gagal dihapus (misal file-nya masih terbuka di Windows) dilewati dan akan
+    dicoba lagi pada prune berikutnya.
+
+    Returns
+    -------
+    List[int]
+        nomor generation yang dihapus
+    """
+    current = current_generation(output_dir)
+    if current is None:
+        return []
+    older = [generation for generation in list_generations(output_dir) if generation <= current]
+    removed = []
+    for generation in older[:max(0, len(older) - keep)]:
+        if generation in pinned:
+            continue
+        try:
+            shutil.rmtree(generation_dir(output_dir, generation))
+        except OSError:
+            continue
+        removed.append(generation)
+    return removed
+
+
+if __name__ == '__main__':
+
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        assert current_generation(tmp) is None and resolve(tmp) == (None, tmp), "tanpa CURRENT: layout lama"
+        for expected in [1, 2, 3]:
+            generation, directory = create_generation(tmp)
+            assert generation == expected and os.path.isdir(directory), "nomor generation harus naik"
+            publish(tmp, generation)
+        assert resolve(tmp) == (3, generation_dir(tmp, 3)), "CURRENT harus menunjuk generation terakhir"
+        assert not os.path.exists(os.path.join(tmp, CURRENT + '.tmp')), "file sementara harus sudah di-rename"
+
+        building, _ = create_generation(tmp)
+        assert current_generation(tmp) == 3, "generation yang belum di-publish tidak boleh aktif"
+        assert prune_generations(tmp, keep = 1, pinned = {2}) == [1], "generation yang pinned tidak boleh dihapus"
+        assert list_generations(tmp) == [2, 3, building], "generation yang sedang dibangun tidak boleh dihapus"
+        assert prune_generations(tmp, keep = 1) == [2] and list_generations(tmp) == [3, building], "prune salah"
+        assert parse_generation('gen-abc') is None and parse_generation('main_index.dict') is None, "bukan generation"
+
+        # indexing penuh tidak boleh menimpa generation yang aktif (harus lewat rebuild)
+        from .bsbi import BSBIIndex
+        for build in [lambda bsbi: bsbi.index(), lambda bsbi: bsbi.index_shards(2)]:
+            try:
+                build(BSBIIndex(data_dir = tmp, output_dir = tmp))
+                assert False, "index() pada direktori dengan CURRENT harus ditolak"
+            except ValueError:
+                pass
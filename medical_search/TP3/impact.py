@@ -0,0 +1,238 @@
+"""
+Index impact BM25: kontribusi BM25 setiap posting (termasuk IDF) dihitung
+saat indexing dari merged index dan statistik koleksi (lihat stats.py), lalu
+dikuantisasi menjadi integer 1..2**bits - 1 dengan satu skala global:
+
+    impact = round(score / scale),   scale = score maksimum / (2**bits - 1)
+
+Postings setiap term disimpan impact-ordered: dikelompokkan per nilai impact
+(segment), dari impact terbesar ke terkecil, dan docID di setiap segment
+terurut sehingga bisa di-encode dengan postings codec biasa.
+
+    <index_name>.impacts       : docID setiap segment, di-encode dengan codec
+    <index_name>.impacts.dict  : metadata (pickle), termID -> list of
+                                 (impact, posisi, banyaknya docID, panjang bytes)
+
+Query dievaluasi secara score-at-a-time: segment semua term query diurutkan
+berdasarkan impact, lalu diproses dari impact terbesar; score dokumen cukup
+dijumlahkan (integer). Jika max_postings diisi, evaluasi berhenti setelah
+sekitar max_postings posting (early termination, anytime ranking); posting
+yang dilewati adalah yang kontribusinya paling kecil.
+
+Posting dengan score BM25 0 (term yang muncul di semua dokumen) tidak
+disimpan.
+"""
+
+import os
+import math
+import mmap
+import pickle
+import numpy as np
+
+from .compression import VBEPostings, codec_name, get_codec
+from .scoring import ScoreAccumulator, K1
+
+IMPACT_VERSION = 1
+
+
+def impact_paths(index_name, directory=''):
+    """Path file impact dan file metadata-nya"""
+    return (os.path.join(directory, index_name + '.impacts'),
+            os.path.join(directory, index_name + '.impacts.dict'))
+
+
+def bm25_scores(postings, tfs, df, stats, k1 = K1):
+    """
+    Score BM25 (dengan IDF) setiap posting sebuah term, dengan urutan operasi
+    yang sama dengan ScoreAccumulator.add_bm25_norm.
+    """
+    wtq = math.log(stats.num_docs/df, 10)
+    return wtq*(k1+1)*tfs/(stats.bm25_norm[postings]+tfs)
+
+
+def quantize(scores, scale):
+    """round(score / scale); score > 0 paling kecil dikuantisasi menjadi 1"""
+    impacts = np.rint(scores / scale).astype(np.int64)
+    impacts[(impacts == 0) & (scores > 0)] = 1
+    return impacts
+
+
+def write_impact_index(reader, stats, index_name, directory = '', bits = 8, postings_encoding = VBEPostings):
+    """
+    Membangun index impact dari merged index (reader yang sudah dibuka) dan
+    statistik koleksinya. Semua postings di-decode dua kali: pertama untuk
+    mencari score maksimum (skala kuantisasi), kedua untuk menulis segment.
+
+    Returns
+    -------
+    float
+        scale: score = impact * scale
+    """
+    def scores(term):
+        postings, tfs = reader.get_postings_arrays(term)
+        if len(postings) == 0:
+            # semua dokumen term ini dihapus (lihat tombstones.py)
+            return postings, tfs
+        return postings, bm25_scores(postings, tfs, reader.document_frequency(term), stats)
+
+    max_score = 0.0
+    for term in reader.terms:
+        max_score = max(max_score, float(scores(term)[1].max(initial=0.0)))
+    scale = max_score / ((1 << bits) - 1) if max_score > 0 else 1.0
+
+    index_path, metadata_path = impact_paths(index_name, directory)
+    segments = {}
+    with open(index_path, 'wb') as f:
+        for term in reader.terms:
+            postings, term_scores = scores(term)
+            impacts = quantize(term_scores, scale)
+            term_segments = []
+            for impact in np.unique(impacts)[::-1]:
+                if impact == 0:
+                    continue
+                docs = postings[impacts == impact].tolist()
+                encoded = postings_encoding.encode(docs)
+                term_segments.append((int(impact), f.tell(), len(docs), len(encoded)))
+                f.write(encoded)
+            segments[term] = term_segments
+    with open(metadata_path, 'wb') as f:
+        pickle.dump({'version': IMPACT_VERSION, 'bits': bits, 'scale': scale, 'num_docs': len(stats.doc_length),
+                     'codec': codec_name(postings_encoding), 'segments': segments}, f)
+    return scale
+
+
+class ImpactIndex:
+    """
+    Membaca index impact (file di-memory-map).
+
+    Attributes
+    ----------
+    bits: int
+        banyaknya bit kuantisasi
+    scale: float
+        score = impact * scale
+    segments: Dictionary mapping termID -> list of (impact, posisi, banyaknya
+        docID, panjang bytes), terurut dari impact terbesar
+    """
+    def __init__(self, index_name, directory = ''):
+        index_path, metadata_path = impact_paths(index_name, directory)
+        with open(metadata_path, 'rb') as f:
+            metadata = pickle.load(f)
+        if metadata['version'] > IMPACT_VERSION:
+            raise ValueError(f"format index impact {metadata_path} tidak didukung")
+        self.bits = metadata['bits']
+        self.scale = metadata['scale']
+        self.num_docs = metadata['num_docs']
+        self.postings_encoding = get_codec(metadata['codec'])
+        self.segments = metadata['segments']
+        self.file = open(index_path, 'rb')
+        self.mmap = None
+        if os.fstat(self.file.fileno()).st_size > 0:
+            self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.view = memoryview(self.mmap)
+        else:
+            self.view = memoryview(b'')
+
+    def close(self):
+        # memoryview harus di-release sebelum mmap bisa ditutup
+        self.view.release()
+        if self.mmap is not None:
+            self.mmap.close()
+        self.file.close()
+
+    def score_at_a_time(self, term_ids, k, offset = 0, max_postings = None):
+        """
+        Evaluasi score-at-a-time untuk list of termIDs (term yang muncul dua
+        kali dihitung dua kali, seperti pada BSBIIndex.score_bm25).
+
+        Parameters
+        ----------
+        max_postings: int
+            Jika diisi, evaluasi berhenti sebelum segment berikutnya begitu
+            banyaknya posting yang sudah diproses mencapai max_postings.
+
+        Returns
+        -------
+        Tuple[List[(float, int)], int]
+            top-K (score, docID) dengan score = jumlah impact * scale, dan
+            banyaknya posting yang diproses
+        """
+        segments = sorted((segment for term in term_ids for segment in self.segments.get(term, ())), \
+                          key = lambda segment: -segment[0])
+        accumulator = ScoreAccumulator(self.num_docs)
+        processed = 0
+        for impact, start, count, length in segments:
+            if max_postings is not None and processed >= max_postings:
+                break
+            accumulator.add_impacts(self.postings_encoding.decode_array(self.view[start:start + length]), impact)
+            processed += count
+        return [(score * self.scale, doc_id) for score, doc_id in accumulator.top_k(k, offset)], processed
+
+
+if __name__ == '__main__':
+
+    import tempfile
+    from .index import InvertedIndexWriter, InvertedIndexReader
+    from .stats import CollectionStats
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with InvertedIndexWriter('test', VBEPostings, directory = tmp) as index:
+            index.append(1, [2, 3, 4, 8, 10], [2, 4, 2, 3, 30])
+            index.append(2, [3, 4, 5], [34, 23, 56])
+            index.append(3, [2, 3, 4, 5, 8, 10], [1, 1, 1, 1, 1, 1])
+        with InvertedIndexReader('test', directory = tmp) as reader:
+            stats = CollectionStats.from_reader(reader)
+            scale = write_impact_index(reader, stats, 'test', tmp, bits = 8)
+            exact = ScoreAccumulator(len(stats.doc_length))
+            for term in [1, 2]:
+                exact.add_bm25_norm(*reader.get_postings_arrays(term), stats.num_docs, stats.bm25_norm)
+
+        impact_index = ImpactIndex('test', tmp)
+        assert impact_index.segments[3] == [], "posting dengan score 0 tidak disimpan"
+        impacts = [impact for impact, _, _, _ in impact_index.segments[1]]
+        assert impacts == sorted(impacts, reverse = True) and impacts[0] <= 255, "segment harus impact-ordered"
+        top, processed = impact_index.score_at_a_time([1, 2], k = 10)
+        assert processed == 8, "semua posting harus diproses tanpa max_postings"
+        assert [doc_id for _, doc_id in top] == [doc_id for _, doc_id in exact.top_k(10)], "ranking impact salah"
+        for (score, _), (exact_score, _) in zip(top, exact.top_k(10)):
+            assert abs(score - exact_score) <= scale, "error kuantisasi terlalu besar"
+        highest = max(impact_index.segments[1] + impact_index.segments[2])
+        top, processed = impact_index.score_at_a_time([1, 2], k = 10, max_postings = 1)
+        assert processed == highest[2] and len(top) == highest[2], "hanya segment dengan impact terbesar yang diproses"
+        impact_index.close()
+
+    # index impact tidak dipakai selama ada dokumen yang dihapus atau segment
+    # (lihat BSBIIndex.has_current_impact_index), dan dibangun ulang saat compaction
+    from .bsbi import BSBIIndex
+    with tempfile.TemporaryDirectory() as tmp:
+        # path dokumen di doc_id_map harus relatif (lihat docstore.split_path)
+        data_dir, output_dir = os.path.relpath(os.path.join(tmp, 'collection')), os.path.join(tmp, 'index')
+        documents = {os.path.join(data_dir, '1', 'a.txt'): "lipid metabolism in toxemia",
+                     os.path.join(data_dir, '1', 'b.txt'): "lipid lipid pregnancy",
+                     os.path.join(data_dir, '2', 'c.txt'): "normal pregnancy"}
+        def write(documents):
+            for path, text in documents.items():
+                os.makedirs(os.path.dirname(path), exist_ok = True)
+                with open(path, 'w') as f:
+                    f.write(text)
+        write(documents)
+        os.mkdir(output_dir)
+        BSBIIndex(data_dir, output_dir).index()
+        BSBIIndex(data_dir, output_dir).build_impact_index()
+        deleted = os.path.join(data_dir, '1', 'b.txt')
+        assert BSBIIndex(data_dir, output_dir).open().retrieve_bm25_impact('lipid')[0][1] == deleted, "ranking impact salah"
+        BSBIIndex(data_dir, output_dir).delete_documents([deleted])
+        added = os.path.join(data_dir, '3', 'd.txt')
+        write({added: "lipid lipid lipid"})
+        assert BSBIIndex(data_dir, output_dir).add_documents() == 1, "dokumen baru harus di-index"
+        for bsbi in [BSBIIndex(data_dir, output_dir), BSBIIndex(data_dir, output_dir).open()]:
+            result = bsbi.retrieve_bm25_impact('lipid')
+            assert deleted not in [doc for _, doc in result], "dokumen yang dihapus tidak boleh muncul"
+            assert result == bsbi.retrieve_bm25('lipid') and result[0][1] == added, "index impact basi: harus BM25 exact"
+        assert BSBIIndex(data_dir, output_dir).compact(), "compaction harus berjalan"
+        bsbi = BSBIIndex(data_dir, output_dir).open()
+        assert bsbi.impact_index is not None, "index impact harus dibangun ulang saat compaction"
+        result = bsbi.retrieve_bm25_impact('lipid')
+        assert [doc for _, doc in result] == [doc for _, doc in bsbi.retrieve_bm25('lipid')] and deleted not in [doc for _, doc in result], \
+               "ranking impact setelah compaction salah"
+        bsbi.close()
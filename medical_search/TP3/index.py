@@ -1,5 +1,65 @@
 import pickle
 import os
+import mmap
+import json
+import bisect
+import struct
+import threading
+import numpy as np
+
+from .lexicon import Lexicon, lexicon_path
+from .compression import VBEPostings, codec_name, get_codec, encode_positions, decode_positions
+
+# Manifest index: JSON yang ditulis di akhir index file oleh
+# InvertedIndexWriter, diikuti panjangnya (uint32, little endian) dan
+# MANIFEST_MAGIC. Posisi postings di postings_dict tetap relatif terhadap awal
+# file, sehingga manifest tidak mengubah layout postings.
+MANIFEST_MAGIC = b'MSIX'
+FORMAT_VERSION = 1
+# codec untuk index lama yang belum punya manifest
+LEGACY_POSTINGS_ENCODING = VBEPostings
+# Stream posisi (index positional): posisi setiap term di-encode per term
+# (lihat compression.encode_positions) dan disambung di <index_name>.positions,
+# diikuti positions_dict (pickle) lalu posisi awal pickle tersebut (uint64,
+# little endian) dan POSITIONS_MAGIC.
+POSITIONS_MAGIC = b'MSPS'
+POSITIONS_TRAILER = struct.Struct('<Q4s')
+
+
+def positions_path(index_name, directory=''):
+    return os.path.join(directory, index_name + '.positions')
+
+
+def remove_index(index_name, directory=''):
+    """Menghapus file index, metadata, dan posisi (jika ada) sebuah index"""
+    for extension in ['.index', '.dict', '.positions']:
+        path = os.path.join(directory, index_name + extension)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def read_manifest(index_file):
+    """
+    Membaca manifest dari akhir index_file (file object yang dibuka dengan
+    mode 'rb'), lalu mengembalikan file pointer ke awal file.
+
+    Returns
+    -------
+    dict
+        isi manifest, atau None jika index file tidak punya manifest
+        (index lama)
+    """
+    size = os.fstat(index_file.fileno()).st_size
+    manifest = None
+    if size >= 8:
+        index_file.seek(size - 8)
+        length, magic = struct.unpack('<I4s', index_file.read(8))
+        if magic == MANIFEST_MAGIC and length <= size - 8:
+            index_file.seek(size - 8 - length)
+            manifest = json.loads(index_file.read(length))
+    index_file.seek(0)
+    return manifest
+
 
 class InvertedIndex:
     """
@@ -36,19 +96,56 @@ class InvertedIndex:
         List of terms IDs, untuk mengingat urutan terms yang dimasukan ke
         dalam Inverted Index.
 
+    max_tf: Dictionary mapping termID -> TF terbesar di postings list term tersebut
+
+    max_score: Dictionary mapping termID -> upper bound kontribusi BM25 term
+        tersebut TANPA faktor IDF, yaitu nilai maksimum dari
+        (k1 + 1) * tf / (k1 * ((1 - b) + b * dl / avgdl) + tf) untuk semua
+        posting. Dihitung saat indexing (lihat BSBIIndex.merge) dan dipakai
+        untuk dynamic pruning (WAND). Bisa kosong untuk index lama.
+
+    blocks: Dictionary mapping termID -> list of block headers, hanya untuk
+        term yang postings list-nya ditulis per block (lihat
+        InvertedIndexWriter.block_size). Postings list dan TF list term
+        tersebut dipecah menjadi block berukuran tetap; setiap block di-encode
+        sendiri-sendiri lalu disambung, sehingga sebuah block bisa di-decode
+        tanpa men-decode block sebelumnya. Header setiap block adalah 5-tuple:
+           1. last_doc_id : docID terakhir di block (skip pointer)
+           2. postings_end : posisi akhir block pada encoded postings list
+              (dalam bytes, relatif terhadap awal postings list term)
+           3. tf_end : posisi akhir block pada encoded TF list (relatif
+              terhadap awal TF list term)
+           4. max_tf : TF terbesar di block
+           5. max_score : seperti atribut max_score, tetapi untuk block ini
+              saja (None jika tidak diketahui); dipakai oleh Block-Max WAND
+
+    manifest: Dictionary berisi versi format, nama codec (lihat
+        compression.CODECS), banyaknya dokumen dan term, rata-rata panjang
+        dokumen, ukuran postings (bytes), dan parameter build. Ditulis di akhir
+        index file oleh InvertedIndexWriter; None untuk index lama. Index
+        positional juga mencatat 'positional': True.
+
+    positions_dict: Dictionary mapping termID -> (posisi, panjang bytes)
+        encoded posisi term tersebut di file posisi (<index_name>.positions),
+        hanya untuk index positional. Posisi (urutan token di dokumen,
+        dihitung sebelum stopword dibuang) setiap dokumen di postings list
+        disimpan berurutan sesuai postings list, sebanyak TF dokumen tersebut.
+
     """
-    def __init__(self, index_name, postings_encoding, directory=''):
+    def __init__(self, index_name, postings_encoding=None, directory=''):
         """
         Parameters
         ----------
         index_name (str): Nama yang digunakan untuk menyimpan files yang berisi index
         postings_encoding : Lihat di compression.py, kandidatnya adalah StandardPostings,
-                        GapBasedPostings, dsb.
+                        GapBasedPostings, dsb. Reader boleh mengisinya dengan None:
+                        codec dibaca dari manifest index.
         directory (str): directory dimana file index berada
         """
 
         self.index_file_path = os.path.join(directory, index_name+'.index')
         self.metadata_file_path = os.path.join(directory, index_name+'.dict')
+        self.positions_file_path = positions_path(index_name, directory)
 
         self.postings_encoding = postings_encoding
         self.directory = directory
@@ -58,6 +155,11 @@ class InvertedIndex:
         self.doc_length = {}    # key: doc ID (int), value: document length (number of tokens)
                                 # Ini nantinya akan berguna untuk normalisasi Score terhadap panjang
                                 # dokumen saat menghitung score dengan TF-IDF atau BM25
+        self.max_tf = {}
+        self.max_score = {}
+        self.blocks = {}
+        self.manifest = None
+        self.positions_dict = {}
 
     def __enter__(self):
         """
@@ -74,36 +176,192 @@ class InvertedIndex:
 
         Metadata disimpan ke file dengan bantuan library "pickle"
 
+        Index file dibuka dalam mode read-only ('rb'), sehingga banyak proses
+        atau thread dapat membuka index yang sama secara bersamaan.
+
         Perlu memahani juga special method __enter__(..) pada Python dan juga
         konsep Context Manager di Python. Silakan pelajari link berikut:
 
         https://docs.python.org/3/reference/datamodel.html#object.__enter__
         """
-        # Membuka index file
-        self.index_file = open(self.index_file_path, 'rb+')
+        # Membuka index file (read-only)
+        self.index_file = open(self.index_file_path, 'rb')
 
         # Kita muat postings dict dan terms iterator dari file metadata
-        with open(self.metadata_file_path, 'rb') as f:
-            self.postings_dict, self.terms, self.doc_length = pickle.load(f)
-            self.term_iter = self.terms.__iter__()
+        try:
+            self.load_manifest()
+            self.load_metadata()
+            self.check_manifest()
+        except Exception:
+            self.__exit__(None, None, None)
+            raise
+        self.term_iter = self.terms.__iter__()
 
         return self
 
+    def load_manifest(self):
+        """
+        Membaca manifest index file dan memilih codec yang tercatat di sana.
+        Index yang versi formatnya lebih baru dari FORMAT_VERSION, atau yang
+        codec-nya berbeda dengan postings_encoding yang diberikan, ditolak
+        (ValueError) alih-alih di-decode dengan salah. Index lama tanpa
+        manifest memakai postings_encoding, atau LEGACY_POSTINGS_ENCODING
+        jika None.
+        """
+        self.manifest = read_manifest(self.index_file)
+        if self.manifest is None:
+            if self.postings_encoding is None:
+                self.postings_encoding = LEGACY_POSTINGS_ENCODING
+            return
+        if self.manifest['format_version'] > FORMAT_VERSION:
+            raise ValueError(f"{self.index_file_path}: format index versi {self.manifest['format_version']} " \
+                             f"tidak didukung (maksimum {FORMAT_VERSION})")
+        codec = get_codec(self.manifest['codec'])
+        if self.postings_encoding is not None and self.postings_encoding is not codec:
+            raise ValueError(f"{self.index_file_path} ditulis dengan codec {self.manifest['codec']}, " \
+                             f"bukan {self.postings_encoding.__name__}")
+        self.postings_encoding = codec
+
+    def check_manifest(self):
+        """
+        Memastikan metadata yang dimuat berasal dari build yang sama dengan
+        index file (banyaknya term dan dokumen, serta ukuran postings);
+        metadata yang basi ditolak dengan ValueError.
+        """
+        if self.manifest is None:
+            return
+        postings_bytes = 0
+        if len(self.terms) > 0:
+            start, _, postings_length, tf_length = self.postings_dict[self.terms[-1]]
+            postings_bytes = start + postings_length + tf_length
+        if (len(self.terms), len(self.doc_length), postings_bytes) != \
+           (self.manifest['num_terms'], self.manifest['num_docs'], self.manifest['postings_bytes']):
+            raise ValueError(f"metadata {self.index_file_path} tidak cocok dengan manifest index file (index basi?)")
+
+    def load_metadata(self):
+        """
+        Memuat postings_dict, terms, doc_length, max_tf, max_score, dan blocks
+        dari file metadata (pickle). Index lama hanya menyimpan tiga elemen
+        pertama.
+        """
+        with open(self.metadata_file_path, 'rb') as f:
+            metadata = pickle.load(f)
+        self.postings_dict, self.terms, self.doc_length = metadata[:3]
+        if len(metadata) > 3:
+            self.max_tf, self.max_score = metadata[3:5]
+        if len(metadata) > 5:
+            self.blocks = metadata[5]
+
     def __exit__(self, exception_type, exception_value, traceback):
-        """Menutup index_file dan menyimpan postings_dict dan terms ketika keluar context"""
-        # Menutup index file
+        """
+        Menutup index_file ketika keluar context. Metadata TIDAK ditulis ulang di
+        sini; hanya InvertedIndexWriter yang menyimpan metadata (lihat
+        InvertedIndexWriter.__exit__), sehingga reader tidak pernah menulis ke disk.
+        """
         self.index_file.close()
 
-        # Menyimpan metadata (postings dict dan terms) ke file metadata dengan bantuan pickle
-        with open(self.metadata_file_path, 'wb') as f:
-            pickle.dump([self.postings_dict, self.terms, self.doc_length], f)
-
 
 class InvertedIndexReader(InvertedIndex):
     """
     Class yang mengimplementasikan bagaimana caranya scan atau membaca secara
     efisien Inverted Index yang disimpan di sebuah file.
+
+    Satu instance reader boleh dipakai bersama oleh beberapa thread (misal
+    oleh searcher yang berumur panjang di web server). Karena seek + read pada
+    file object yang sama tidak atomic, get_postings_list dilindungi oleh lock.
+
+    Jika use_mmap=True, index file di-memory-map. get_postings_list kemudian
+    cukup mengambil slice (memoryview) dari mapping tersebut dan langsung
+    men-decode-nya: tidak ada syscall seek/read per lookup, tidak ada salinan
+    bytes, dan tidak perlu lock. Halaman index berada di page cache OS sehingga
+    beberapa worker gunicorn berbagi satu salinan fisik index yang sama.
+
+    Jika use_lexicon=True, metadata dibaca dari file lexicon biner
+    (<index_name>.lexicon, lihat lexicon.py) yang di-memory-map, bukan dari
+    file .dict yang di-pickle.
     """
+    def __init__(self, index_name, postings_encoding=None, directory='', use_mmap=False, use_lexicon=False):
+        super().__init__(index_name, postings_encoding, directory)
+        self.lock = threading.Lock()
+        self.use_mmap = use_mmap
+        self.index_mmap = None
+        self.index_view = None
+        self.use_lexicon = use_lexicon
+        self.lexicon_file_path = lexicon_path(index_name, directory)
+        self.lexicon = None
+        self.dense_doc_length = None
+        self.positions_file = None
+        self.positions_mmap = None
+        self.positions_view = None
+
+    def load_metadata(self):
+        if not self.use_lexicon:
+            return super().load_metadata()
+        self.lexicon = Lexicon(self.lexicon_file_path)
+        self.postings_dict = self.lexicon.postings_dict
+        self.terms = self.lexicon.terms
+        self.doc_length = self.lexicon.doc_length
+        self.max_tf = self.lexicon.term_values('max_tf')
+        self.max_score = self.lexicon.term_values('max_score')
+        self.blocks = self.lexicon.blocks
+
+    def __enter__(self):
+        super().__enter__()
+        if self.use_mmap:
+            if os.fstat(self.index_file.fileno()).st_size > 0:
+                self.index_mmap = mmap.mmap(self.index_file.fileno(), 0, access=mmap.ACCESS_READ)
+                self.index_view = memoryview(self.index_mmap)
+            else:
+                # mmap tidak bisa dibuat untuk file kosong (index tanpa term)
+                self.index_view = memoryview(b'')
+        if self.manifest is not None and self.manifest.get('positional'):
+            try:
+                self.load_positions()
+            except Exception:
+                self.__exit__(None, None, None)
+                raise
+        return self
+
+    def load_positions(self):
+        """
+        Memory-map file posisi dan memuat positions_dict dari akhir file
+        tersebut. File posisi yang hilang atau rusak ditolak dengan ValueError.
+        """
+        if not os.path.exists(self.positions_file_path):
+            raise ValueError(f"{self.index_file_path} adalah index positional, tetapi {self.positions_file_path} tidak ada")
+        self.positions_file = open(self.positions_file_path, 'rb')
+        size = os.fstat(self.positions_file.fileno()).st_size
+        if size < POSITIONS_TRAILER.size:
+            raise ValueError(f"{self.positions_file_path} bukan file posisi")
+        self.positions_mmap = mmap.mmap(self.positions_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.positions_view = memoryview(self.positions_mmap)
+        start, magic = POSITIONS_TRAILER.unpack_from(self.positions_mmap, size - POSITIONS_TRAILER.size)
+        if magic != POSITIONS_MAGIC:
+            raise ValueError(f"{self.positions_file_path} bukan file posisi")
+        self.positions_dict = pickle.loads(self.positions_mmap[start:size - POSITIONS_TRAILER.size])
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        # memoryview harus di-release dulu sebelum mmap bisa ditutup
+        if self.index_view is not None:
+            self.index_view.release()
+            self.index_view = None
+        if self.index_mmap is not None:
+            self.index_mmap.close()
+            self.index_mmap = None
+        if self.positions_view is not None:
+            self.positions_view.release()
+            self.positions_view = None
+        if self.positions_mmap is not None:
+            self.positions_mmap.close()
+            self.positions_mmap = None
+        if self.positions_file is not None:
+            self.positions_file.close()
+            self.positions_file = None
+        if self.lexicon is not None:
+            self.lexicon.close()
+            self.lexicon = None
+        super().__exit__(exception_type, exception_value, traceback)
+
     def __iter__(self):
         return self
 
@@ -132,10 +390,28 @@ class InvertedIndexReader(InvertedIndex):
         """
         curr_term = next(self.term_iter)
         pos, number_of_postings, len_in_bytes_of_postings, len_in_bytes_of_tf = self.postings_dict[curr_term]
-        postings_list = self.postings_encoding.decode(self.index_file.read(len_in_bytes_of_postings))
-        tf_list = self.postings_encoding.decode_tf(self.index_file.read(len_in_bytes_of_tf))
+        postings_list, tf_list = self.decode(curr_term, self.index_file.read(len_in_bytes_of_postings), \
+                                             self.index_file.read(len_in_bytes_of_tf))
         return (curr_term, postings_list, tf_list)
 
+    def decode(self, term, encoded_postings, encoded_tf_list):
+        """
+        Decode postings list dan TF list sebuah term. Jika term tersebut
+        ditulis per block (lihat atribut blocks), setiap block di-decode
+        sendiri-sendiri lalu hasilnya disambung.
+        """
+        blocks = self.blocks.get(term)
+        if blocks is None:
+            return (self.postings_encoding.decode(encoded_postings),
+                    self.postings_encoding.decode_tf(encoded_tf_list))
+        postings_list, tf_list = [], []
+        postings_start, tf_start = 0, 0
+        for _, postings_end, tf_end, _, _ in blocks:
+            postings_list.extend(self.postings_encoding.decode(encoded_postings[postings_start:postings_end]))
+            tf_list.extend(self.postings_encoding.decode_tf(encoded_tf_list[tf_start:tf_end]))
+            postings_start, tf_start = postings_end, tf_end
+        return (postings_list, tf_list)
+
     def get_postings_list(self, term):
         """
         Kembalikan sebuah postings list (list of docIDs) beserta list
@@ -148,25 +424,316 @@ class InvertedIndexReader(InvertedIndex):
         list of TF) dari term disimpan.
         """
         # TODO
+        return self.decode(term, *self.get_encoded(term))
+
+    def document_frequency(self, term):
+        """df sebuah term (banyaknya dokumen di postings list-nya)"""
+        return self.postings_dict[term][1]
+
+    def get_encoded(self, term):
+        """
+        Mengembalikan (encoded postings list, encoded TF list) sebuah term
+        tanpa di-decode. Jika index di-memory-map, keduanya adalah slice
+        (memoryview) dari mapping, tanpa salinan bytes.
+        """
         start_pos, num_of_postings, length_postings, length_tf = self.postings_dict[term]
-        self.index_file.seek(start_pos)
-        postings = self.index_file.read(length_postings)
-        decoded_postings = self.postings_encoding.decode(postings)
-        tf_list = self.index_file.read(length_tf)
-        decoded_tf = self.postings_encoding.decode_tf(tf_list)
-        return (decoded_postings, decoded_tf)
+        if self.index_view is not None:
+            # zero-copy: slice langsung dari mmap
+            tf_pos = start_pos + length_postings
+            return (self.index_view[start_pos:tf_pos], self.index_view[tf_pos:tf_pos + length_tf])
+        with self.lock:
+            self.index_file.seek(start_pos)
+            postings = self.index_file.read(length_postings)
+            tf_list = self.index_file.read(length_tf)
+        return (postings, tf_list)
+
+    def cursor(self, term):
+        """
+        Mengembalikan cursor untuk postings list sebuah term, dipakai untuk
+        evaluasi query document-at-a-time (misal WAND). Untuk term yang
+        ditulis per block, dikembalikan BlockPostingsCursor yang hanya
+        men-decode block yang benar-benar dikunjungi.
+        """
+        blocks = self.blocks.get(term)
+        if blocks is None:
+            return PostingsCursor(*self.get_postings_list(term), max_score=self.max_score.get(term))
+        return BlockPostingsCursor(*self.get_encoded(term), blocks, self.postings_encoding)
+
+    def get_postings_arrays(self, term):
+        """
+        Sama seperti get_postings_list, tetapi postings list dan list of TF
+        dikembalikan sebagai NumPy array (dipakai oleh scoring engine).
+        Jika postings_encoding menyediakan decode_array dan decode_tf_array,
+        bytestream langsung di-decode menjadi array tanpa melalui list.
+        """
+        if not hasattr(self.postings_encoding, 'decode_array'):
+            postings_list, tf_list = self.get_postings_list(term)
+            return (np.array(postings_list, dtype=np.int64), np.array(tf_list, dtype=np.float64))
+        encoded_postings, encoded_tf_list = self.get_encoded(term)
+        blocks = self.blocks.get(term)
+        if blocks is None:
+            return (self.postings_encoding.decode_array(encoded_postings),
+                    self.postings_encoding.decode_tf_array(encoded_tf_list).astype(np.float64))
+        postings, tfs = [], []
+        postings_start, tf_start = 0, 0
+        for _, postings_end, tf_end, _, _ in blocks:
+            postings.append(self.postings_encoding.decode_array(encoded_postings[postings_start:postings_end]))
+            tfs.append(self.postings_encoding.decode_tf_array(encoded_tf_list[tf_start:tf_end]))
+            postings_start, tf_start = postings_end, tf_end
+        return (np.concatenate(postings), np.concatenate(tfs).astype(np.float64))
+
+    def has_positions(self):
+        """True jika index ini positional (lihat atribut positions_dict)"""
+        return self.positions_view is not None
+
+    def get_positions(self, term, tf_array):
+        """
+        Posisi term di setiap dokumen postings list-nya (np.ndarray int64,
+        disambung sesuai urutan postings), di-decode dengan bantuan TF list
+        term tersebut (tf_array). Hanya membaca file posisi (tidak
+        mengubah file pointer index file), sehingga aman dipanggil saat
+        iterasi reader (lihat BSBIIndex.merge).
+        """
+        return decode_positions(self.get_encoded_positions(term), np.asarray(tf_array, dtype=np.int64))
+
+    def get_encoded_positions(self, term):
+        """Posisi term yang belum di-decode (slice dari file posisi yang di-memory-map)"""
+        if not self.has_positions():
+            raise ValueError(f"{self.index_file_path} bukan index positional")
+        start, length = self.positions_dict[term]
+        return self.positions_view[start:start + length]
+
+    def get_positional_postings(self, term):
+        """
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray, np.ndarray]
+            postings, TF (int64), dan posisi term (lihat get_positions)
+        """
+        postings, tfs = self.get_postings_arrays(term)
+        tfs = tfs.astype(np.int64)
+        return postings, tfs, self.get_positions(term, tfs)
+
+    def get_dense_doc_length(self):
+        """
+        Mengembalikan doc_length dalam bentuk dense NumPy array (float64)
+        indexed by docID; docID yang tidak ada di index bernilai 0. Array
+        dibuat sekali saja lalu disimpan di self.dense_doc_length.
+        """
+        if self.dense_doc_length is None:
+            if self.lexicon is not None:
+                dense_doc_length = np.asarray(self.lexicon.columns['doc_length'], dtype=np.float64)
+            else:
+                dense_doc_length = np.zeros(max(self.doc_length, default=-1) + 1, dtype=np.float64)
+                dense_doc_length[list(self.doc_length.keys())] = list(self.doc_length.values())
+            self.dense_doc_length = dense_doc_length
+        return self.dense_doc_length
+
+
+class PostingsCursor:
+    """
+    Cursor pada sebuah postings list untuk evaluasi document-at-a-time.
+
+    Attributes
+    ----------
+    doc: int
+        docID pada posisi cursor saat ini, None jika cursor sudah habis
+    tf: int
+        term frequency dari doc
+
+    Untuk Block-Max WAND, seluruh postings list dianggap sebagai satu block
+    dengan max_score term tersebut (lihat BlockPostingsCursor).
+    """
+    def __init__(self, postings_list, tf_list, max_score=None):
+        self.postings_list = postings_list
+        self.tf_list = tf_list
+        self.max_score = max_score
+        self.position = 0
+        self.move(0)
+
+    def move(self, position):
+        self.position = position
+        if position < len(self.postings_list):
+            self.doc = self.postings_list[position]
+            self.tf = self.tf_list[position]
+        else:
+            self.doc, self.tf = None, 0
+
+    def next(self):
+        """Maju ke posting berikutnya"""
+        self.move(self.position + 1)
+
+    def next_geq(self, doc_id):
+        """Maju ke posting pertama dengan docID >= doc_id (binary search)"""
+        if self.doc is not None and self.doc < doc_id:
+            self.move(bisect.bisect_left(self.postings_list, doc_id, self.position + 1))
+
+    def block_for(self, doc_id):
+        """Block yang mungkin memuat doc_id (0), atau 1 jika doc_id melewati akhir list"""
+        return 0 if self.postings_list and doc_id <= self.postings_list[-1] else 1
+
+    def block_last_doc(self, block):
+        return self.postings_list[-1] if block == 0 else None
+
+    def block_max_score(self, block):
+        """max_score block (None jika tidak diketahui), 0 untuk block di luar list"""
+        return self.max_score if block == 0 else 0.0
+
+
+class BlockPostingsCursor:
+    """
+    Cursor pada postings list yang ditulis per block (lihat atribut blocks
+    pada InvertedIndex). Block di-decode secara lazy: next_geq memakai
+    last_doc_id di header setiap block sebagai skip pointer, sehingga block
+    yang dilompati tidak pernah di-decode.
+
+    Jika index di-memory-map, cursor memegang slice dari mapping; cursor
+    harus sudah tidak dipakai (dilepas) sebelum reader ditutup.
+
+    Attributes
+    ----------
+    doc: int
+        docID pada posisi cursor saat ini, None jika cursor sudah habis
+    tf: int
+        term frequency dari doc
+    block: int
+        block tempat cursor berada saat ini
+    decoded_blocks: int
+        banyaknya block yang sudah di-decode
+    """
+    def __init__(self, encoded_postings, encoded_tf_list, blocks, postings_encoding):
+        self.encoded_postings = encoded_postings
+        self.encoded_tf_list = encoded_tf_list
+        self.blocks = blocks
+        self.postings_encoding = postings_encoding
+        self.decoded_blocks = 0
+        self.load_block(0)
+
+    def load_block(self, block):
+        """Decode block ke-block lalu letakkan cursor di posting pertamanya"""
+        self.block = block
+        if block < len(self.blocks):
+            postings_start, tf_start = (0, 0) if block == 0 else self.blocks[block - 1][1:3]
+            _, postings_end, tf_end, _, _ = self.blocks[block]
+            self.postings_list = self.postings_encoding.decode(self.encoded_postings[postings_start:postings_end])
+            self.tf_list = self.postings_encoding.decode_tf(self.encoded_tf_list[tf_start:tf_end])
+            self.decoded_blocks += 1
+        else:
+            self.postings_list, self.tf_list = [], []
+        self.move(0)
+
+    def move(self, position):
+        self.position = position
+        if position < len(self.postings_list):
+            self.doc = self.postings_list[position]
+            self.tf = self.tf_list[position]
+        elif self.block + 1 < len(self.blocks):
+            self.load_block(self.block + 1)
+        else:
+            self.doc, self.tf = None, 0
+
+    def next(self):
+        """Maju ke posting berikutnya"""
+        self.move(self.position + 1)
+
+    def next_geq(self, doc_id):
+        """
+        Maju ke posting pertama dengan docID >= doc_id. Block yang docID
+        terakhirnya < doc_id dilewati tanpa di-decode.
+        """
+        if self.doc is None or self.doc >= doc_id:
+            return
+        block = self.block_for(doc_id)
+        if block != self.block:
+            self.load_block(block)
+        if self.doc is not None:
+            self.move(bisect.bisect_left(self.postings_list, doc_id, self.position))
+
+    def block_for(self, doc_id):
+        """
+        Block pertama (mulai dari block saat ini) yang mungkin memuat doc_id,
+        dicari hanya dari header tanpa decoding ("shallow" move pada
+        Block-Max WAND). len(blocks) jika doc_id melewati akhir list.
+        """
+        block = self.block
+        while block < len(self.blocks) and self.blocks[block][0] < doc_id:
+            block += 1
+        return block
+
+    def block_last_doc(self, block):
+        return self.blocks[block][0] if block < len(self.blocks) else None
+
+    def block_max_score(self, block):
+        """max_score block (None jika tidak diketahui), 0 untuk block di luar list"""
+        return self.blocks[block][4] if block < len(self.blocks) else 0.0
 
 
 class InvertedIndexWriter(InvertedIndex):
     """
     Class yang mengimplementasikan bagaimana caranya menulis secara
     efisien Inverted Index yang disimpan di sebuah file.
+
+    Jika block_size diisi, postings list dan TF list yang lebih panjang dari
+    block_size ditulis per block (lihat atribut blocks pada InvertedIndex).
+    postings_dict tetap mencatat posisi dan panjang total postings list dan
+    TF list setiap term, sehingga layout file tetap "satu postings list
+    diikuti satu TF list per term".
+
+    Saat keluar context, manifest (lihat atribut manifest pada
+    InvertedIndex) ditulis di akhir index file; build_params (dictionary
+    yang bisa di-serialize ke JSON) ikut dicatat di dalamnya.
+
+    Jika positional=True, posisi setiap term (parameter positions pada
+    append) ditulis ke file posisi (lihat atribut positions_dict pada
+    InvertedIndex). Index file dan metadata-nya sama persis dengan index
+    non-positional, kecuali manifest yang mencatat 'positional': True.
     """
+    def __init__(self, index_name, postings_encoding, directory='', block_size=None, build_params=None, positional=False):
+        super().__init__(index_name, postings_encoding, directory)
+        self.codec = codec_name(postings_encoding)
+        self.block_size = block_size
+        self.build_params = build_params or {}
+        self.positional = positional
+
     def __enter__(self):
         self.index_file = open(self.index_file_path, 'wb+')
+        if self.positional:
+            self.positions_file = open(self.positions_file_path, 'wb')
         return self
 
-    def append(self, term, postings_list, tf_list):
+    def __exit__(self, exception_type, exception_value, traceback):
+        """Menutup index_file dan menyimpan postings_dict, terms, doc_length, max_tf, max_score, dan blocks ketika keluar context"""
+        if self.positional:
+            start = self.positions_file.tell()
+            self.positions_file.write(pickle.dumps(self.positions_dict))
+            self.positions_file.write(POSITIONS_TRAILER.pack(start, POSITIONS_MAGIC))
+            self.positions_file.close()
+
+        # Menulis manifest di akhir index file, lalu menutupnya
+        self.write_manifest()
+        self.index_file.close()
+
+        # Menyimpan metadata (postings dict dan terms) ke file metadata dengan bantuan pickle
+        with open(self.metadata_file_path, 'wb') as f:
+            pickle.dump([self.postings_dict, self.terms, self.doc_length, self.max_tf, self.max_score, self.blocks], f)
+
+    def write_manifest(self):
+        num_docs = len(self.doc_length)
+        self.manifest = {'format_version': FORMAT_VERSION,
+                         'codec': self.codec,
+                         'num_docs': num_docs,
+                         'num_terms': len(self.terms),
+                         'avg_doc_length': sum(self.doc_length.values()) / num_docs if num_docs else 0.0,
+                         'postings_bytes': self.index_file.tell(),
+                         'block_size': self.block_size,
+                         'build_params': self.build_params}
+        if self.positional:
+            self.manifest['positional'] = True
+        manifest = json.dumps(self.manifest, sort_keys=True).encode('utf-8')
+        self.index_file.write(manifest)
+        self.index_file.write(struct.pack('<I4s', len(manifest), MANIFEST_MAGIC))
+
+    def append(self, term, postings_list, tf_list, impacts=None, positions=None, encoded_positions=None):
         """
         Menambahkan (append) sebuah term, postings_list, dan juga TF list 
         yang terasosiasi ke posisi akhir index file.
@@ -201,11 +768,33 @@ class InvertedIndexWriter(InvertedIndex):
             List of docIDs dimana term muncul
         tf_list: List[Int]
             List of term frequencies
+        impacts: List[float]
+            Kontribusi BM25 (tanpa IDF) setiap posting, jika diketahui (lihat
+            scoring.bm25_impacts). Nilai maksimumnya disimpan sebagai
+            max_score term ini dan max_score setiap block.
+        positions: List[int]
+            Posisi term di setiap dokumen postings_list (terurut per dokumen),
+            disambung sesuai urutan postings_list; panjangnya sum(tf_list).
+            Wajib diisi jika positional=True, kecuali encoded_positions diisi.
+        encoded_positions: bytes
+            positions yang sudah di-encode (lihat compression.encode_positions),
+            misal sambungan posisi beberapa index saat merging
         """
+        if self.positional:
+            if encoded_positions is None:
+                if positions is None or len(positions) != sum(tf_list):
+                    raise ValueError(f"posisi term {term} harus diisi, sebanyak jumlah TF-nya")
+                encoded_positions = encode_positions(positions, tf_list)
+            self.positions_dict[term] = (self.positions_file.tell(), len(encoded_positions))
+            self.positions_file.write(encoded_positions)
+
         # TODO
         # Encode postings_list menggunakan self.postings_encoding
-        encoded_postings = self.postings_encoding.encode(postings_list)
-        encoded_tf_list = self.postings_encoding.encode_tf(tf_list)
+        if self.block_size is not None and len(postings_list) > self.block_size:
+            encoded_postings, encoded_tf_list = self.encode_blocks(term, postings_list, tf_list, impacts)
+        else:
+            encoded_postings = self.postings_encoding.encode(postings_list)
+            encoded_tf_list = self.postings_encoding.encode_tf(tf_list)
 
         # Menyimpan metadata dalam bentuk self.terms dan self.postings_dict
         last = None
@@ -218,6 +807,9 @@ class InvertedIndexWriter(InvertedIndex):
             start_pos = (self.postings_dict[last][0]+self.postings_dict[last][2]+self.postings_dict[last][3])
         self.postings_dict[term] = (start_pos, len(postings_list), len(encoded_postings), len(encoded_tf_list))
         self.terms.append(term)
+        self.max_tf[term] = max(tf_list)
+        if impacts is not None:
+            self.max_score[term] = float(max(impacts))
 
         for i in range(len(postings_list)):
             if postings_list[i] in self.doc_length:
@@ -229,16 +821,45 @@ class InvertedIndexWriter(InvertedIndex):
         self.index_file.write(encoded_postings)
         self.index_file.write(encoded_tf_list)
 
+    def encode_blocks(self, term, postings_list, tf_list, impacts=None):
+        """
+        Encode postings_list dan tf_list per block berukuran self.block_size
+        dan catat header setiap block di self.blocks[term].
+
+        Returns
+        -------
+        Tuple[bytes, bytes]
+            encoded postings list dan encoded TF list (semua block disambung)
+        """
+        encoded_postings, encoded_tf_list, blocks = [], [], []
+        postings_end, tf_end = 0, 0
+        for start in range(0, len(postings_list), self.block_size):
+            end = start + self.block_size
+            encoded_postings.append(self.postings_encoding.encode(postings_list[start:end]))
+            encoded_tf_list.append(self.postings_encoding.encode_tf(tf_list[start:end]))
+            postings_end += len(encoded_postings[-1])
+            tf_end += len(encoded_tf_list[-1])
+            max_score = float(max(impacts[start:end])) if impacts is not None else None
+            blocks.append((postings_list[min(end, len(postings_list)) - 1], postings_end, tf_end, \
+                           max(tf_list[start:end]), max_score))
+        self.blocks[term] = blocks
+        return b''.join(encoded_postings), b''.join(encoded_tf_list)
+
 
 if __name__ == "__main__":
 
-    from compression import VBEPostings
+    # jalankan dari root repository: python -m medical_search.TP3.index
+    from .compression import VBEPostings
+    from .lexicon import convert
+
+    TMP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tmp')
 
-    with InvertedIndexWriter('test', postings_encoding=VBEPostings, directory='./tmp/') as index:
+    with InvertedIndexWriter('test', postings_encoding=VBEPostings, directory=TMP_DIR) as index:
         index.append(1, [2, 3, 4, 8, 10], [2, 4, 2, 3, 30])
         index.append(2, [3, 4, 5], [34, 23, 56])
         index.index_file.seek(0)
         assert index.terms == [1,2], "terms salah"
+        assert index.max_tf == {1: 30, 2: 56}, "max_tf salah"
         assert index.doc_length == {2:2, 3:38, 4:25, 5:56, 8:3, 10:30}, "doc_length salah"
         assert index.postings_dict == {1: (0, \
                                            5, \
@@ -252,3 +873,145 @@ if __name__ == "__main__":
         index.index_file.seek(index.postings_dict[2][0])
         assert VBEPostings.decode(index.index_file.read(len(VBEPostings.encode([3,4,5])))) == [3,4,5], "terdapat kesalahan"
         assert VBEPostings.decode_tf(index.index_file.read(len(VBEPostings.encode_tf([34,23,56])))) == [34,23,56], "terdapat kesalahan"
+
+    # reader bersifat read-only: metadata tidak boleh ditulis ulang ketika keluar context
+    mtime = os.stat(index.metadata_file_path).st_mtime_ns
+    with InvertedIndexReader('test', postings_encoding=VBEPostings, directory=TMP_DIR) as index:
+        assert index.get_postings_list(2) == ([3, 4, 5], [34, 23, 56]), "terdapat kesalahan"
+        assert index.index_file.mode == 'rb', "reader harus read-only"
+    with InvertedIndexReader('test', postings_encoding=VBEPostings, directory=TMP_DIR, use_mmap=True) as index:
+        assert index.get_postings_list(1) == ([2, 3, 4, 8, 10], [2, 4, 2, 3, 30]), "terdapat kesalahan (mmap)"
+        assert index.get_postings_list(2) == ([3, 4, 5], [34, 23, 56]), "terdapat kesalahan (mmap)"
+        cursor = index.cursor(1)
+        cursor.next_geq(5)
+        assert (cursor.doc, cursor.tf) == (8, 3), "cursor salah"
+        cursor.next()
+        cursor.next()
+        assert cursor.doc is None, "cursor salah"
+    assert os.stat(index.metadata_file_path).st_mtime_ns == mtime, "reader tidak boleh menulis metadata"
+
+    # metadata yang sama dibaca dari lexicon biner (tanpa unpickle)
+    convert('test', TMP_DIR)
+    with InvertedIndexReader('test', postings_encoding=VBEPostings, directory=TMP_DIR, use_lexicon=True) as index:
+        assert list(index.terms) == [1, 2], "terms salah (lexicon)"
+        assert dict(index.doc_length.items()) == {2:2, 3:38, 4:25, 5:56, 8:3, 10:30}, "doc_length salah (lexicon)"
+        assert index.get_postings_list(2) == ([3, 4, 5], [34, 23, 56]), "terdapat kesalahan (lexicon)"
+        index.reset()
+        assert [term for term, _, _ in index] == [1, 2], "iterasi salah (lexicon)"
+    os.remove(lexicon_path('test', TMP_DIR))
+
+    # manifest: codec dipilih otomatis, codec yang salah dan metadata basi ditolak
+    with InvertedIndexReader('test', directory=TMP_DIR) as index:
+        assert index.postings_encoding is VBEPostings and index.manifest['codec'] == 'vbe', "codec salah (manifest)"
+        assert (index.manifest['num_docs'], index.manifest['avg_doc_length']) == (6, 154 / 6), "manifest salah"
+        assert index.get_postings_list(2) == ([3, 4, 5], [34, 23, 56]), "terdapat kesalahan (manifest)"
+    from .compression import StandardPostings
+    try:
+        InvertedIndexReader('test', StandardPostings, directory=TMP_DIR).__enter__()
+        assert False, "codec yang berbeda dengan manifest harus ditolak"
+    except ValueError:
+        pass
+    with InvertedIndexWriter('test_stale', VBEPostings, directory=TMP_DIR) as index:
+        index.append(1, [2, 3], [1, 1])
+    with open(os.path.join(TMP_DIR, 'test.dict'), 'rb') as f, open(os.path.join(TMP_DIR, 'test_stale.dict'), 'wb') as g:
+        g.write(f.read())
+    try:
+        InvertedIndexReader('test_stale', directory=TMP_DIR).__enter__()
+        assert False, "metadata basi harus ditolak"
+    except ValueError:
+        pass
+    # index lama tanpa manifest: memakai LEGACY_POSTINGS_ENCODING
+    with InvertedIndexReader('test', directory=TMP_DIR) as index:
+        postings_bytes = index.manifest['postings_bytes']
+    with open(os.path.join(TMP_DIR, 'test.index'), 'rb') as f, open(os.path.join(TMP_DIR, 'test_stale.index'), 'wb') as g:
+        g.write(f.read()[:postings_bytes])
+    with InvertedIndexReader('test_stale', directory=TMP_DIR) as index:
+        assert index.manifest is None and index.postings_encoding is LEGACY_POSTINGS_ENCODING, "fallback index lama salah"
+        assert index.get_postings_list(2) == ([3, 4, 5], [34, 23, 56]), "terdapat kesalahan (index lama)"
+    for path in ['test_stale.index', 'test_stale.dict']:
+        os.remove(os.path.join(TMP_DIR, path))
+
+    # postings list yang ditulis per block
+    postings_list = list(range(1, 200, 3))
+    tf_list = [doc_id % 5 + 1 for doc_id in postings_list]
+    with InvertedIndexWriter('test_block', postings_encoding=VBEPostings, directory=TMP_DIR, block_size=16) as index:
+        index.append(1, postings_list, tf_list, impacts=[tf / 10 for tf in tf_list])
+        index.append(2, [3, 4, 5], [34, 23, 56])
+    assert len(index.blocks[1]) == 5 and 2 not in index.blocks, "blocks salah"
+    assert index.blocks[1][0] == (postings_list[15], len(VBEPostings.encode(postings_list[:16])), \
+                                  len(VBEPostings.encode_tf(tf_list[:16])), 5, 0.5), "header block salah"
+    assert index.blocks[1][-1][:2] == (postings_list[-1], index.postings_dict[1][2]), "header block salah"
+    convert('test_block', TMP_DIR)
+    for use_mmap, use_lexicon in [(False, False), (True, False), (True, True)]:
+        with InvertedIndexReader('test_block', postings_encoding=VBEPostings, directory=TMP_DIR, \
+                                 use_mmap=use_mmap, use_lexicon=use_lexicon) as index:
+            assert index.get_postings_list(1) == (postings_list, tf_list), "terdapat kesalahan (block)"
+            assert index.get_postings_list(2) == ([3, 4, 5], [34, 23, 56]), "terdapat kesalahan (block)"
+            postings, tfs = index.get_postings_arrays(1)
+            assert postings.tolist() == postings_list and tfs.tolist() == tf_list, "get_postings_arrays salah (block)"
+            index.reset()
+            assert [(term, p, t) for term, p, t in index] == [(1, postings_list, tf_list), (2, [3, 4, 5], [34, 23, 56])], \
+                   "iterasi salah (block)"
+            cursor = index.cursor(1)
+            assert isinstance(cursor, BlockPostingsCursor) and cursor.decoded_blocks == 1, "cursor salah (block)"
+            cursor.next_geq(150)
+            assert (cursor.doc, cursor.tf) == (151, 2) and cursor.decoded_blocks == 2, "skip pointer salah"
+            assert cursor.block_for(190) == 3 and cursor.block_last_doc(4) == 199, "header block salah"
+            while cursor.doc is not None and cursor.doc < 199:
+                cursor.next()
+            assert (cursor.doc, cursor.decoded_blocks) == (199, 3), "cursor salah (block)"
+            cursor.next()
+            assert cursor.doc is None, "cursor salah (block)"
+            del cursor # cursor memegang slice mmap, harus dilepas sebelum reader ditutup
+    for path in ['test_block.index', 'test_block.dict', 'test_block.lexicon']:
+        os.remove(os.path.join(TMP_DIR, path))
+
+    # index positional: posisi disimpan di file terpisah, index file sama persis
+    with InvertedIndexWriter('test_positions', VBEPostings, directory=TMP_DIR, positional=True) as index:
+        index.append(1, [2, 3, 4], [2, 1, 3], positions=[0, 7, 4, 1, 2, 30])
+        index.append(2, [3, 5], [1, 1], positions=[0, 9])
+        try:
+            index.append(3, [4], [2], positions=[1])
+            assert False, "posisi yang tidak sesuai TF harus ditolak"
+        except ValueError:
+            pass
+    assert index.manifest['positional'] is True, "manifest index positional salah"
+    for use_mmap in [False, True]:
+        with InvertedIndexReader('test_positions', directory=TMP_DIR, use_mmap=use_mmap) as index:
+            assert index.has_positions(), "file posisi harus dimuat"
+            postings, tfs, positions = index.get_positional_postings(1)
+            assert postings.tolist() == [2, 3, 4] and positions.tolist() == [0, 7, 4, 1, 2, 30], "posisi salah"
+            assert index.get_positions(2, [1, 1]).tolist() == [0, 9], "posisi salah"
+            index.reset()
+            assert [term for term, _, _ in index] == [1, 2], "iterasi index positional salah"
+    with InvertedIndexReader('test', directory=TMP_DIR) as index:
+        assert not index.has_positions(), "index non-positional tidak punya posisi"
+    os.remove(positions_path('test_positions', TMP_DIR))
+    try:
+        InvertedIndexReader('test_positions', directory=TMP_DIR).__enter__()
+        assert False, "index positional tanpa file posisi harus ditolak"
+    except ValueError:
+        pass
+    remove_index('test_positions', TMP_DIR)
+    assert not os.path.exists(os.path.join(TMP_DIR, 'test_positions.index')), "remove_index salah"
+
+    # merging index positional yang docID-nya tumpang tindih (lihat BSBIIndex.merge):
+    # posisi docID 3 dari kedua index digabung, sesuai TF-nya yang dijumlahkan
+    from .bsbi import BSBIIndex
+    with InvertedIndexWriter('test_part_a', VBEPostings, directory=TMP_DIR, positional=True) as index:
+        index.append(1, [2, 3], [1, 2], positions=[5, 0, 4])
+    with InvertedIndexWriter('test_part_b', VBEPostings, directory=TMP_DIR, positional=True) as index:
+        index.append(1, [3, 6], [1, 1], positions=[2, 7])
+        index.append(2, [6], [1], positions=[1])
+    with InvertedIndexWriter('test_merged', VBEPostings, directory=TMP_DIR, positional=True) as merged_index:
+        with InvertedIndexReader('test_part_a', directory=TMP_DIR) as part_a, \
+             InvertedIndexReader('test_part_b', directory=TMP_DIR) as part_b:
+            BSBIIndex(data_dir=TMP_DIR, output_dir=TMP_DIR).merge([part_a, part_b], merged_index)
+    assert merged_index.doc_length == {2: 1, 3: 3, 6: 2}, "doc_length merging salah"
+    with InvertedIndexReader('test_merged', directory=TMP_DIR) as index:
+        postings, tfs, positions = index.get_positional_postings(1)
+        assert postings.tolist() == [2, 3, 6] and tfs.tolist() == [1, 3, 1], "postings merging salah"
+        assert positions.tolist() == [5, 0, 2, 4, 7], "posisi docID yang tumpang tindih harus digabung"
+        assert index.get_positions(2, [1]).tolist() == [1], "posisi merging salah"
+    for name in ['test_part_a', 'test_part_b', 'test_merged']:
+        remove_index(name, TMP_DIR)
@@ -0,0 +1,335 @@
+"""
+Lexicon biner (compact) sebagai pengganti metadata .dict yang di-pickle.
+
+Metadata .dict berisi python's dictionary termID -> 4-tuple, list terms, dan
+dictionary doc_length. Saat di-unpickle, jutaan object kecil (int, tuple)
+harus dialokasikan, sehingga waktu startup sebanding dengan ukuran vocabulary.
+
+File lexicon (<index_name>.lexicon) menyimpan informasi yang sama dalam bentuk
+array dengan lebar tetap (fixed-width) yang bisa di-memory-map dan diakses
+langsung, tanpa unpickle:
+
+    MAGIC (4 bytes) | panjang header (uint32, little endian) | header (JSON)
+    | padding | kolom 1 | padding | kolom 2 | ...
+
+Setiap kolom adalah array bertipe tetap (kode tipe modul array, byte order
+native mesin yang menulis) dengan posisi yang dicatat di header:
+
+    offset, df, postings_bytes, tf_bytes : indexed by termID (df = 0 artinya
+                                           term tidak ada di index)
+    max_tf, max_score                    : (opsional) indexed by termID, lihat
+                                           InvertedIndex
+    block_start, block_count             : (opsional) indexed by termID, posisi
+                                           dan banyaknya header block term
+                                           tersebut di kolom-kolom block_*
+                                           (block_count = 0 artinya postings
+                                           list term tidak ditulis per block)
+    block_last_doc, block_postings_end,  : (opsional) header block semua term
+    block_tf_end, block_max_tf,            yang disambung, lihat atribut blocks
+    block_max_score                        pada InvertedIndex (max_score < 0
+                                           artinya tidak diketahui)
+    terms                                : termID sesuai urutan di index file
+    doc_length                           : indexed by docID (0 artinya dokumen
+                                           tidak ada di index)
+"""
+
+import os
+import sys
+import json
+import mmap
+import array
+import pickle
+import struct
+
+MAGIC = b'MSLX'
+VERSION = 1
+
+# nama kolom -> kode tipe (lihat https://docs.python.org/3/library/array.html)
+TERM_COLUMNS = [('offset', 'Q'), ('df', 'I'), ('postings_bytes', 'I'), ('tf_bytes', 'I')]
+COLUMNS = TERM_COLUMNS + [('terms', 'I'), ('doc_length', 'I')]
+# kolom opsional per term, hanya ditulis jika datanya ada
+OPTIONAL_TERM_COLUMNS = [('max_tf', 'I'), ('max_score', 'd')]
+# kolom tabel header block (opsional), lihat atribut blocks pada InvertedIndex
+BLOCK_TERM_COLUMNS = [('block_start', 'Q'), ('block_count', 'I')]
+BLOCK_COLUMNS = [('block_last_doc', 'I'), ('block_postings_end', 'I'), ('block_tf_end', 'I'), \
+                 ('block_max_tf', 'I'), ('block_max_score', 'd')]
+
+
+def lexicon_path(index_name, directory=''):
+    return os.path.join(directory, index_name + '.lexicon')
+
+
+def write_lexicon(path, postings_dict, terms, doc_length, max_tf=None, max_score=None, blocks=None):
+    """
+    Menulis metadata sebuah inverted index (postings_dict, terms, doc_length,
+    max_tf, max_score, blocks; lihat InvertedIndex) ke file lexicon biner.
+    """
+    num_terms = max(postings_dict) + 1 if postings_dict else 0
+    num_docs = max(doc_length) + 1 if doc_length else 0
+
+    columns = {name: array.array(code, [0]) * num_terms for name, code in TERM_COLUMNS}
+    for term, record in postings_dict.items():
+        for (name, _), value in zip(TERM_COLUMNS, record):
+            columns[name][term] = value
+    columns['terms'] = array.array('I', terms)
+    columns['doc_length'] = array.array('I', [0]) * num_docs
+    for doc_id, length in doc_length.items():
+        columns['doc_length'][doc_id] = length
+    layout = list(COLUMNS)
+    for (name, code), values in zip(OPTIONAL_TERM_COLUMNS, [max_tf, max_score]):
+        if values:
+            columns[name] = array.array(code, [0]) * num_terms
+            for term, value in values.items():
+                columns[name][term] = value
+            layout.append((name, code))
+    if blocks:
+        for name, code in BLOCK_TERM_COLUMNS:
+            columns[name] = array.array(code, [0]) * num_terms
+        for name, code in BLOCK_COLUMNS:
+            columns[name] = array.array(code)
+        for term in terms:
+            if term not in blocks:
+                continue
+            columns['block_start'][term] = len(columns['block_last_doc'])
+            columns['block_count'][term] = len(blocks[term])
+            for last_doc, postings_end, tf_end, block_max_tf, block_max_score in blocks[term]:
+                columns['block_last_doc'].append(last_doc)
+                columns['block_postings_end'].append(postings_end)
+                columns['block_tf_end'].append(tf_end)
+                columns['block_max_tf'].append(block_max_tf)
+                columns['block_max_score'].append(-1.0 if block_max_score is None else block_max_score)
+        layout += BLOCK_TERM_COLUMNS + BLOCK_COLUMNS
+
+    header = {'version': VERSION, 'byteorder': sys.byteorder,
+              'num_terms': len(terms), 'num_docs': len(doc_length), 'columns': {}}
+    # posisi kolom relatif terhadap awal area data (setelah header + padding)
+    position = 0
+    for name, code in layout:
+        position += -position % 8
+        header['columns'][name] = [code, position, len(columns[name])]
+        position += len(columns[name]) * columns[name].itemsize
+    header_bytes = json.dumps(header).encode('utf-8')
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        data_start = f.tell() + (-f.tell() % 8)
+        for name, code in layout:
+            _, position, _ = header['columns'][name]
+            f.write(b'\0' * (data_start + position - f.tell()))
+            f.write(columns[name].tobytes())
+
+
+def convert(index_name, directory=''):
+    """Konversi metadata <index_name>.dict (pickle) menjadi <index_name>.lexicon"""
+    with open(os.path.join(directory, index_name + '.dict'), 'rb') as f:
+        metadata = pickle.load(f)
+    write_lexicon(lexicon_path(index_name, directory), *metadata)
+
+
+class Lexicon:
+    """
+    Membaca file lexicon dengan mmap. Atribut postings_dict, terms, dan
+    doc_length dapat dipakai sebagai pengganti metadata hasil unpickle pada
+    InvertedIndexReader.
+    """
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.mmap)
+        if self.view[:4] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} bukan file lexicon")
+        header_length, = struct.unpack_from('<I', self.view, 4)
+        header = json.loads(bytes(self.view[8:8 + header_length]))
+        if header['version'] > VERSION or header['byteorder'] != sys.byteorder:
+            self.close()
+            raise ValueError(f"format lexicon {path} tidak didukung")
+
+        data_start = 8 + header_length
+        data_start += -data_start % 8
+        self.columns = {}
+        for name, (code, position, length) in header['columns'].items():
+            start = data_start + position
+            itemsize = array.array(code).itemsize
+            self.columns[name] = self.view[start:start + length * itemsize].cast(code)
+
+        self.postings_dict = PostingsDict(self.columns, header['num_terms'])
+        self.terms = self.columns['terms']
+        self.doc_length = DocLength(self.columns['doc_length'], header['num_docs'])
+        self.blocks = Blocks(self.columns)
+
+    def term_values(self, name):
+        """
+        Kolom opsional per term (misal max_score) dalam bentuk dict-like
+        termID -> nilai. Jika kolom tidak ada, hasilnya berperilaku seperti
+        dictionary kosong.
+        """
+        return TermValues(self.columns.get(name), self.columns['df'])
+
+    def close(self):
+        # semua memoryview harus di-release sebelum mmap bisa ditutup
+        for column in getattr(self, 'columns', {}).values():
+            column.release()
+        self.view.release()
+        self.mmap.close()
+        self.file.close()
+
+
+class PostingsDict:
+    """
+    Pengganti postings_dict (termID -> 4-tuple) yang dibaca langsung dari
+    kolom-kolom lexicon. Mendukung operasi dictionary yang dipakai reader.
+    """
+    def __init__(self, columns, num_terms):
+        self.columns = [columns[name] for name, _ in TERM_COLUMNS]
+        self.df = columns['df']
+        self.terms = columns['terms']
+        self.num_terms = num_terms
+
+    def __contains__(self, term):
+        return type(term) is int and 0 <= term < len(self.df) and self.df[term] > 0
+
+    def __getitem__(self, term):
+        if term not in self:
+            raise KeyError(term)
+        return tuple(column[term] for column in self.columns)
+
+    def get(self, term, default=None):
+        return self[term] if term in self else default
+
+    def __len__(self):
+        return self.num_terms
+
+    def __iter__(self):
+        return iter(self.terms)
+
+    def keys(self):
+        return iter(self.terms)
+
+    def items(self):
+        return ((term, self[term]) for term in self.terms)
+
+
+class TermValues:
+    """Dict-like termID -> nilai sebuah kolom opsional per term di lexicon"""
+    def __init__(self, values, df):
+        self.values = values
+        self.df = df
+
+    def __contains__(self, term):
+        return self.values is not None and type(term) is int and 0 <= term < len(self.df) and self.df[term] > 0
+
+    def __getitem__(self, term):
+        if term not in self:
+            raise KeyError(term)
+        return self.values[term]
+
+    def get(self, term, default=None):
+        return self[term] if term in self else default
+
+    def __len__(self):
+        return 0 if self.values is None else sum(1 for df in self.df if df > 0)
+
+
+class Blocks:
+    """
+    Dict-like termID -> list of block headers (lihat atribut blocks pada
+    InvertedIndex) yang dibaca dari tabel block di lexicon. Term yang tidak
+    ditulis per block tidak ada di dalamnya.
+    """
+    def __init__(self, columns):
+        self.start = columns.get('block_start')
+        self.count = columns.get('block_count')
+        self.columns = [columns.get(name) for name, _ in BLOCK_COLUMNS]
+
+    def __contains__(self, term):
+        return self.count is not None and type(term) is int and 0 <= term < len(self.count) and self.count[term] > 0
+
+    def __getitem__(self, term):
+        if term not in self:
+            raise KeyError(term)
+        blocks = []
+        start = self.start[term]
+        last_docs, postings_ends, tf_ends, max_tfs, max_scores = self.columns
+        for i in range(start, start + self.count[term]):
+            blocks.append((last_docs[i], postings_ends[i], tf_ends[i], max_tfs[i], \
+                           max_scores[i] if max_scores[i] >= 0 else None))
+        return blocks
+
+    def get(self, term, default=None):
+        return self[term] if term in self else default
+
+    def __len__(self):
+        return 0 if self.count is None else sum(1 for count in self.count if count > 0)
+
+
+class DocLength:
+    """
+    Pengganti doc_length (docID -> panjang dokumen) yang dibaca langsung dari
+    kolom doc_length pada lexicon.
+    """
+    def __init__(self, lengths, num_docs):
+        self.lengths = lengths
+        self.num_docs = num_docs
+
+    def __contains__(self, doc_id):
+        return type(doc_id) is int and 0 <= doc_id < len(self.lengths) and self.lengths[doc_id] > 0
+
+    def __getitem__(self, doc_id):
+        if doc_id not in self:
+            raise KeyError(doc_id)
+        return self.lengths[doc_id]
+
+    def get(self, doc_id, default=None):
+        return self[doc_id] if doc_id in self else default
+
+    def __len__(self):
+        return self.num_docs
+
+    def __iter__(self):
+        return (doc_id for doc_id, length in enumerate(self.lengths) if length > 0)
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        return (length for length in self.lengths if length > 0)
+
+    def items(self):
+        return ((doc_id, length) for doc_id, length in enumerate(self.lengths) if length > 0)
+
+
+if __name__ == '__main__':
+
+    import tempfile
+
+    postings_dict = {1: (0, 5, 5, 5), 3: (10, 3, 3, 4)}
+    terms = [1, 3]
+    doc_length = {2: 2, 3: 38, 4: 25, 5: 56, 8: 3, 10: 30}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'test.lexicon')
+        write_lexicon(path, postings_dict, terms, doc_length)
+        lexicon = Lexicon(path)
+        assert 1 not in lexicon.term_values('max_score') and len(lexicon.term_values('max_score')) == 0, "kolom opsional salah"
+        assert lexicon.blocks.get(1) is None and len(lexicon.blocks) == 0, "tabel block salah"
+        lexicon.close()
+
+        write_lexicon(path, postings_dict, terms, doc_length, {1: 7, 3: 2}, {1: 1.5, 3: 0.25})
+        lexicon = Lexicon(path)
+        assert lexicon.term_values('max_tf')[3] == 2 and lexicon.term_values('max_score')[1] == 1.5, "kolom opsional salah"
+        assert dict(lexicon.postings_dict.items()) == postings_dict, "postings_dict salah"
+        assert 0 not in lexicon.postings_dict and 2 not in lexicon.postings_dict, "term yang tidak ada salah"
+        assert list(lexicon.terms) == terms, "terms salah"
+        assert dict(lexicon.doc_length.items()) == doc_length, "doc_length salah"
+        assert len(lexicon.doc_length) == 6 and lexicon.doc_length[3] == 38, "doc_length salah"
+        assert sum(lexicon.doc_length.values()) == sum(doc_length.values()), "doc_length salah"
+        lexicon.close()
+
+        blocks = {3: [(4, 2, 2, 25, 0.5), (10, 3, 4, 30, None)]}
+        write_lexicon(path, postings_dict, terms, doc_length, {1: 7, 3: 30}, None, blocks)
+        lexicon = Lexicon(path)
+        assert lexicon.blocks[3] == blocks[3] and 1 not in lexicon.blocks, "tabel block salah"
+        assert len(lexicon.term_values('max_score')) == 0, "kolom opsional salah"
+        lexicon.close()
@@ -0,0 +1,191 @@
+"""
+Scoring engine TaaT (Term-at-a-Time) berbasis NumPy.
+
+Postings list dan TF list sebuah term di-decode menjadi NumPy array, panjang
+dokumen disimpan dalam dense array (indexed by docID), dan kontribusi setiap
+term diakumulasikan ke dense score vector secara vectorized; tidak ada loop
+Python per posting. Top-K dipilih dengan np.argpartition sehingga tidak perlu
+mengurutkan seluruh dokumen yang match.
+
+Urutan operasi floating point sengaja dibuat sama dengan implementasi loop
+sebelumnya (lihat BSBIIndex.retrieve_bm25 dan retrieve_tfidf), sehingga score
+yang dihasilkan identik.
+"""
+
+import math
+import numpy as np
+
+# parameter BM25
+K1 = 1.6
+B = 0.75
+
+
+class ScoreAccumulator:
+    """
+    Dense score vector beserta penanda dokumen mana saja yang match (muncul
+    di postings list paling tidak satu term query).
+
+    Attributes
+    ----------
+    scores: np.ndarray[float64]
+        score akumulasi, indexed by docID
+    matched: np.ndarray[bool]
+        True untuk docID yang muncul di postings list salah satu term query
+    """
+    def __init__(self, num_docs):
+        self.scores = np.zeros(num_docs, dtype=np.float64)
+        self.matched = np.zeros(num_docs, dtype=bool)
+
+    def add_tfidf(self, postings, tfs, N, df = None):
+        """
+        w(t, D) = 1 + log tf(t, D), w(t, Q) = log (N / df(t)); akumulasikan
+        w(t, Q) * w(t, D) ke semua dokumen di postings. df default:
+        len(postings); diisi jika postings hanya sebagian dari postings list
+        term (misal satu shard, lihat shards.py).
+        """
+        wtq = math.log(N/(len(postings) if df is None else df), 10)
+        wtd = 1 + np.log(tfs) / math.log(10)
+        self.scores[postings] += wtd*wtq
+        self.matched[postings] = True
+
+    def add_bm25(self, postings, tfs, N, doc_length, avg_doc_length, k1 = K1, b = B):
+        """
+        Akumulasikan score Okapi BM25 sebuah term ke semua dokumen di postings.
+
+        Parameters
+        ----------
+        postings, tfs: np.ndarray
+            postings list (docIDs) dan TF list sebuah term
+        N: int
+            banyaknya dokumen di koleksi
+        doc_length: np.ndarray
+            dense array panjang dokumen, indexed by docID
+        avg_doc_length: float
+            rata-rata panjang dokumen di koleksi
+        """
+        wtq = math.log(N/len(postings), 10)
+        normalization = (1-b)+b*(doc_length[postings]/avg_doc_length)
+        self.scores[postings] += wtq*(k1+1)*tfs/((k1*normalization)+tfs)
+        self.matched[postings] = True
+
+    def add_bm25_norm(self, postings, tfs, N, bm25_norm, k1 = K1, df = None):
+        """
+        Sama seperti add_bm25, tetapi faktor normalisasi panjang dokumen
+        k1 * ((1 - b) + b * dl / avgdl) sudah dihitung sebelumnya (lihat
+        bm25_norms dan stats.py), dalam dense array indexed by docID. df
+        seperti pada add_tfidf.
+        """
+        wtq = math.log(N/(len(postings) if df is None else df), 10)
+        self.scores[postings] += wtq*(k1+1)*tfs/(bm25_norm[postings]+tfs)
+        self.matched[postings] = True
+
+    def add_impacts(self, postings, impact):
+        """
+        Menambahkan impact (score yang sudah dikuantisasi, lihat impact.py)
+        yang sama ke semua dokumen di postings.
+        """
+        self.scores[postings] += impact
+        self.matched[postings] = True
+
+    def restrict(self, doc_ids):
+        """
+        Hanya docID di doc_ids (np.ndarray, misal hasil query boolean, lihat
+        boolean.py) yang dianggap match, walaupun score-nya 0.
+
+        Returns
+        -------
+        ScoreAccumulator
+            self
+        """
+        self.matched[:] = False
+        self.matched[doc_ids] = True
+        return self
+
+    def num_matched(self):
+        """Banyaknya dokumen yang match"""
+        return int(np.count_nonzero(self.matched))
+
+    def top_k(self, k, offset = 0):
+        """
+        Mengembalikan top-K (score, docID) dari dokumen yang match, terurut
+        mengecil berdasarkan score (docID lebih kecil didahulukan jika score sama).
+
+        Jika offset > 0, yang dikembalikan adalah "halaman" rank offset+1 s.d.
+        offset+K. Hanya offset+K dokumen teratas yang dipilih dan diurutkan;
+        sisa dokumen yang match tidak pernah diurutkan.
+        """
+        if k <= 0:
+            return []
+        n = offset + k
+        candidates = np.flatnonzero(self.matched)
+        if n < len(candidates):
+            # hanya offset+K kandidat terbaik yang dipilih, tanpa sort keseluruhan.
+            # Kandidat dengan score sama dengan batas (score ke-n) diambil
+            # berdasarkan docID terkecil supaya hasilnya deterministik.
+            negated = -self.scores[candidates]
+            kth = np.partition(negated, n - 1)[n - 1]
+            above = candidates[negated < kth]
+            ties = candidates[negated == kth]
+            candidates = np.concatenate([above, ties[:n - len(above)]])
+        order = np.lexsort((candidates, -self.scores[candidates]))
+        top = candidates[order][offset:]
+        return list(zip(self.scores[top].tolist(), top.tolist()))
+
+
+def bm25_impacts(tfs, doc_length, avg_doc_length, k1 = K1, b = B):
+    """
+    Kontribusi BM25 setiap posting sebuah term tanpa faktor IDF, yaitu
+    (k1 + 1) * tf / (k1 * ((1 - b) + b * dl / avgdl) + tf). Nilai maksimumnya
+    adalah upper bound kontribusi term tersebut (lihat atribut max_score dan
+    blocks pada InvertedIndex).
+
+    Parameters
+    ----------
+    tfs, doc_length: np.ndarray
+        TF list sebuah term dan panjang dokumen dari setiap posting-nya
+
+    Returns
+    -------
+    np.ndarray[float64]
+    """
+    normalization = (1-b)+b*(doc_length/avg_doc_length)
+    return (k1+1)*tfs/((k1*normalization)+tfs)
+
+
+def bm25_norms(doc_length, avg_doc_length, k1 = K1, b = B):
+    """
+    Faktor normalisasi panjang dokumen BM25, k1 * ((1 - b) + b * dl / avgdl),
+    untuk setiap panjang dokumen di doc_length (np.ndarray). Urutan operasinya
+    sama dengan add_bm25 sehingga score yang dihasilkan identik.
+    """
+    return k1*((1-b)+b*(doc_length/avg_doc_length))
+
+
+if __name__ == '__main__':
+
+    acc = ScoreAccumulator(6)
+    acc.add_tfidf(np.array([1, 3, 4]), np.array([1, 10, 100]), N = 6)
+    assert np.allclose(acc.scores[[1, 3, 4]], np.array([1, 2, 3]) * math.log(2, 10)), "tfidf salah"
+    assert acc.top_k(2) == [(acc.scores[4], 4), (acc.scores[3], 3)], "top_k salah"
+    assert [doc_id for _, doc_id in acc.top_k(10)] == [4, 3, 1], "top_k salah"
+    assert [doc_id for _, doc_id in acc.top_k(1, offset = 1)] == [3], "top_k dengan offset salah"
+    assert acc.top_k(5, offset = 3) == [] and acc.num_matched() == 3, "top_k dengan offset salah"
+
+    acc = ScoreAccumulator(4)
+    doc_length = np.array([0, 10, 20, 30], dtype=np.float64)
+    acc.add_bm25(np.array([1, 2]), np.array([2, 2]), N = 4, doc_length = doc_length, avg_doc_length = 20)
+    expected = [math.log(2, 10)*(K1+1)*2/((K1*((1-B)+B*(dl/20)))+2) for dl in [10, 20]]
+    assert acc.scores[1:3].tolist() == expected, "bm25 salah"
+    assert acc.top_k(10)[0][1] == 1, "dokumen yang lebih pendek harus lebih tinggi"
+
+    impacts = bm25_impacts(np.array([2, 2]), doc_length[1:3], 20)
+    assert np.allclose(impacts * math.log(2, 10), expected), "bm25_impacts salah"
+
+    norm_acc = ScoreAccumulator(4)
+    norm_acc.add_bm25_norm(np.array([1, 2]), np.array([2, 2]), N = 4, bm25_norm = bm25_norms(doc_length, 20))
+    assert norm_acc.scores.tolist() == acc.scores.tolist(), "bm25 dengan bm25_norms harus identik"
+
+    restricted = ScoreAccumulator(4)
+    restricted.add_bm25_norm(np.array([1, 2]), np.array([2, 2]), N = 4, bm25_norm = bm25_norms(doc_length, 20))
+    restricted.restrict(np.array([0, 2]))
+    assert restricted.top_k(10) == [(expected[1], 2), (0.0, 0)], "restrict salah"
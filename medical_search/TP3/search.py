@@ -1,34 +1,49 @@
-import os
-
 from .bsbi import BSBIIndex
-from .compression import VBEPostings
+from .searcher import get_searcher
+from .cache import LocalCache, DjangoCache
 
-def search_bm25(query):
-    BSBI_instance = BSBIIndex(data_dir = 'collection', \
-                            postings_encoding = VBEPostings, \
-                            output_dir = 'index')
-    
-    documents = []
-    FILE_DIR = os.path.dirname(os.path.abspath(__file__))
-    PARENT_DIR = os.path.join(FILE_DIR, os.pardir, os.pardir) 
-
-    for (score, doc) in BSBI_instance.retrieve_bm25(query, k=1000):
-        doc1 = doc.replace("\\", "/")
-        with open(os.path.join(PARENT_DIR, doc1), 'r') as f:
-            doc_content = f.read()
-            if len(doc_content) > 500:
-                doc_content = doc_content[:500] + " ..."
-            documents.append((doc.split("\\"), doc_content))
-            
-    return documents
-        
+# banyaknya hasil maksimum yang bisa dijelajahi lewat paginasi
+MAX_RESULTS = 1000
+
+def result_cache():
+    """
+    Backend cache hasil query (lihat cache.py) sesuai setting Django
+    SEARCH_RESULT_CACHE: 'local' (default, di memori setiap worker),
+    'django' (cache framework Django), atau None (tanpa cache). TTL diatur
+    dengan SEARCH_RESULT_CACHE_TTL (detik).
+    """
+    from django.conf import settings
+    backend = getattr(settings, 'SEARCH_RESULT_CACHE', 'local') if settings.configured else 'local'
+    ttl = getattr(settings, 'SEARCH_RESULT_CACHE_TTL', 3600) if settings.configured else 3600
+    if backend == 'django':
+        return DjangoCache(ttl = ttl)
+    if backend == 'local':
+        return LocalCache(ttl = ttl)
+    return None
+
+def search_bm25(query, offset = 0, limit = MAX_RESULTS):
+    """
+    Mengembalikan (total, hits): total adalah banyaknya hasil (maksimum
+    MAX_RESULTS), hits adalah hasil rank offset+1 s.d. offset+limit dalam
+    bentuk list of Hit (lihat snippets.py). Isi dokumen hanya dibaca ketika
+    snippet sebuah Hit diakses, yaitu untuk halaman yang dirender saja.
+    """
+    searcher = get_searcher(cache_factory = result_cache)
+    searcher.reload_if_changed()
+    return searcher.search_bm25(query, offset = offset, limit = limit, max_results = MAX_RESULTS)
+
+
+def document_content(path):
+    """Isi dokumen dengan path tersebut (lihat Searcher.document_text)"""
+    searcher = get_searcher(cache_factory = result_cache)
+    searcher.reload_if_changed()
+    return searcher.document_text(path)
 
 
 if __name__ == '__main__':
     # sebelumnya sudah dilakukan indexing
     # BSBIIndex hanya sebagai abstraksi untuk index tersebut
     BSBI_instance = BSBIIndex(data_dir = 'collection', \
-                            postings_encoding = VBEPostings, \
                             output_dir = 'index')
 
     queries = ["alkylated with radioactive iodoacetate", \
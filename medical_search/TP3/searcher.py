@@ -0,0 +1,366 @@
+import os
+import time
+import pickle
+import logging
+import threading
+import contextlib
+
+from .bsbi import BSBIIndex
+from .snippets import Hit
+from .docstore import split_path
+from .segments import state_mtime
+from .generations import resolve, prune_generations, KEEP_GENERATIONS
+from .boolean import is_boolean_query, parse_query, query_terms
+
+logger = logging.getLogger(__name__)
+
+# reload yang gagal membuka index (misal file index sedang diganti oleh proses
+# lain) dicoba lagi RELOAD_ATTEMPTS kali dengan jeda RELOAD_RETRY_DELAY detik
+RELOAD_ATTEMPTS = 3
+RELOAD_RETRY_DELAY = 0.05
+
+# root repository: path dokumen di index (misal collection/1/2.txt) relatif
+# terhadap direktori ini, tidak tergantung working directory proses
+BASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir)
+
+
+class Searcher:
+    """
+    Searcher yang berumur panjang (long-lived) dan dipakai bersama oleh semua
+    request di satu proses (misal satu worker gunicorn).
+
+    Sebelumnya setiap request membuat BSBIIndex baru, sehingga terms.dict,
+    docs.dict, dan metadata main_index di-unpickle ulang untuk setiap query.
+    Searcher memuat semua itu SEKALI (lazy, saat pertama kali dipakai) lalu
+    menyimpannya tetap di memori bersama file handle index yang terbuka.
+
+    Reload dilakukan secara eksplisit lewat reload(), atau otomatis ketika
+    generation yang aktif (lihat generations.py) atau file metadata index
+    berubah (lihat reload_if_changed). Reload membangun BSBIIndex baru
+    terlebih dahulu, baru kemudian menukar referensinya; request yang sedang
+    berjalan tetap memakai instance lama (beserta generation-nya) sampai
+    selesai. Selama query, generation instance tersebut di-pin (lihat
+    pinned) sehingga tidak dihapus oleh prune_generations.
+
+    Jika cache diisi (lihat cache.py), ranking hasil query disimpan di cache
+    dengan key (model scoring, versi index, term query hasil analisis atau
+    tree query boolean);
+    paginasi dan query yang berulang dilayani dari cache tanpa scoring ulang.
+
+    Attributes
+    ----------
+    current(Tuple[BSBIIndex, Tuple[int, float]]): BSBIIndex yang sudah
+        dibuka (lihat BSBIIndex.open) beserta versinya saat dimuat (nomor
+        generation dan waktu modifikasi file metadata-nya, lihat
+        index_version). Keduanya disimpan dalam satu tuple supaya ditukar
+        secara atomic saat reload.
+    pins(Dict[int, int]): generation -> banyaknya query yang sedang memakainya
+    cache(ResultCache): Cache ranking hasil query, None jika tanpa cache
+    query_workers(int): Banyaknya thread untuk scoring paralel per shard
+        (lihat BSBIIndex.open)
+    base_dir(str): Direktori tempat path dokumen yang relatif di-resolve
+        saat isinya dibaca dari file (lihat document_text)
+    background_errors(Dict[str, Exception]): exception terakhir dari
+        compaction atau rebuild di background ('compact' atau 'rebuild'),
+        dihapus setelah operasi yang sama berhasil (lihat background)
+    """
+    def __init__(self, data_dir, output_dir, postings_encoding = None, index_name = "main_index", cache = None, \
+                 query_workers = 1, base_dir = ''):
+        self.data_dir = data_dir
+        self.output_dir = output_dir
+        self.postings_encoding = postings_encoding
+        self.index_name = index_name
+        self.cache = cache
+        self.query_workers = query_workers
+        self.base_dir = base_dir
+        self.background_errors = {}
+
+        self.lock = threading.Lock()
+        # lock terpisah, supaya query tidak menunggu reload yang sedang membuka index
+        self.pin_lock = threading.Lock()
+        self.pins = {}
+        self.current = (None, None)
+        self.reload()
+
+    @property
+    def index(self):
+        return self.current[0]
+
+    @property
+    def version(self):
+        return self.current[1]
+
+    def index_version(self):
+        """
+        Nomor generation yang aktif (None untuk layout lama) dan waktu
+        modifikasi file metadata (.dict) dari merged index-nya, atau file
+        daftar segment dan tombstone (lihat segments.state_mtime) jika lebih
+        baru
+        """
+        generation, directory = resolve(self.output_dir)
+        return generation, state_mtime(self.index_name, directory)
+
+    def reload(self, if_changed = False):
+        """
+        Memuat ulang index dari disk dan menukar index yang aktif secara atomic.
+        Instance lama tidak ditutup secara eksplisit karena mungkin masih dipakai
+        oleh request lain; file handle-nya akan ditutup oleh garbage collector
+        setelah tidak ada lagi yang mereferensikannya.
+
+        Jika index gagal dibuka (misal file-nya tidak konsisten karena sedang
+        ditulis), reload dicoba lagi sampai RELOAD_ATTEMPTS kali. Jika tetap
+        gagal, index yang aktif tetap dipakai (versinya tidak berubah, sehingga
+        reload_if_changed akan mencoba lagi); error hanya diteruskan jika belum
+        ada index yang aktif.
+
+        Parameters
+        ----------
+        if_changed: bool
+            Jika True, versi index dicek lagi setelah lock didapat dan reload
+            dilewati jika index yang aktif sudah versi terbaru (misal sudah
+            di-reload oleh request lain yang menunggu lock yang sama)
+
+        Returns
+        -------
+        bool
+            True jika index berhasil dimuat ulang
+        """
+        with self.lock:
+            if if_changed and self.index_version() == self.version:
+                return False
+            for attempt in range(RELOAD_ATTEMPTS):
+                try:
+                    self.current = self.open_index()
+                    return True
+                except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+                    if attempt + 1 == RELOAD_ATTEMPTS:
+                        if self.index is None:
+                            raise
+                        return False
+                    time.sleep(RELOAD_RETRY_DELAY)
+
+    def open_index(self):
+        """BSBIIndex baru yang sudah dibuka, beserta versinya"""
+        index = BSBIIndex(data_dir = self.data_dir, \
+                          output_dir = self.output_dir, \
+                          postings_encoding = self.postings_encoding, \
+                          index_name = self.index_name)
+        # versi dari generation yang benar-benar dibuka oleh index
+        version = (index.generation, state_mtime(self.index_name, index.output_dir))
+        index.open(query_workers = self.query_workers)
+        return index, version
+
+    def reload_if_changed(self):
+        """
+        Reload jika generation yang aktif atau file metadata index berubah
+        sejak terakhir dimuat. Pengecekan pertama tanpa lock (murah, dilakukan
+        di setiap request); versi dicek lagi di dalam lock (lihat reload
+        if_changed), sehingga request-request yang bersamaan melihat perubahan
+        hanya me-reload index sekali.
+        """
+        if self.index_version() != self.version:
+            self.reload(if_changed = True)
+
+    @contextlib.contextmanager
+    def pinned(self):
+        """
+        Context manager yang menghasilkan (BSBIIndex, versi) yang aktif dan
+        mem-pin generation-nya sampai context selesai, walaupun di tengah
+        jalan terjadi reload ke generation lain.
+        """
+        with self.pin_lock:
+            index, version = self.current
+            self.pins[index.generation] = self.pins.get(index.generation, 0) + 1
+        try:
+            yield index, version
+        finally:
+            with self.pin_lock:
+                self.pins[index.generation] -= 1
+                if self.pins[index.generation] == 0:
+                    del self.pins[index.generation]
+
+    def pinned_generations(self):
+        """Generation yang sedang dipakai oleh query atau oleh index yang aktif"""
+        with self.pin_lock:
+            return set(self.pins) | {self.index.generation}
+
+    def compact(self):
+        """
+        Menjalankan compaction segment (lihat BSBIIndex.compact) ke generation
+        baru di background thread dengan instance BSBIIndex tersendiri, lalu
+        reload dan menghapus generation lama yang tidak lagi dipakai. Query
+        tetap dilayani oleh index yang aktif selama compaction berjalan.
+        Index yang tidak bisa di-compact (misal di-shard) ditolak dengan
+        ValueError sebelum thread dijalankan.
+
+        Returns
+        -------
+        threading.Thread
+            thread compaction (sudah dijalankan)
+        """
+        index = BSBIIndex(data_dir = self.data_dir, \
+                          output_dir = self.output_dir, \
+                          postings_encoding = self.postings_encoding, \
+                          index_name = self.index_name)
+        index.check_compactable()
+        def run():
+            if index.compact(pinned = self.pinned_generations()):
+                self.reload()
+                prune_generations(self.output_dir, KEEP_GENERATIONS, self.pinned_generations())
+        return self.background('compact', run)
+
+    def rebuild(self, workers = 1, memory_budget = None, keep = KEEP_GENERATIONS):
+        """
+        Menjalankan rebuild penuh ke generation baru (lihat BSBIIndex.rebuild)
+        di background thread, lalu reload dan menghapus generation lama yang
+        tidak lagi dipakai. Query tetap dilayani oleh generation yang aktif
+        selama rebuild berjalan.
+
+        Returns
+        -------
+        threading.Thread
+            thread rebuild (sudah dijalankan)
+        """
+        def run():
+            index = BSBIIndex(data_dir = self.data_dir, \
+                              output_dir = self.output_dir, \
+                              postings_encoding = self.postings_encoding, \
+                              index_name = self.index_name)
+            index.rebuild(workers, memory_budget, keep, self.pinned_generations())
+            self.reload()
+            prune_generations(self.output_dir, keep, self.pinned_generations())
+        return self.background('rebuild', run)
+
+    def background(self, name, run):
+        """
+        Menjalankan run di daemon thread. Exception di thread tersebut tidak
+        hilang: dicatat ke log dan disimpan di background_errors[name].
+
+        Returns
+        -------
+        threading.Thread
+            thread yang sudah dijalankan
+        """
+        def target():
+            try:
+                run()
+            except Exception as error:
+                logger.exception("%s index %s di background gagal", name, self.output_dir)
+                self.background_errors[name] = error
+            else:
+                self.background_errors.pop(name, None)
+        thread = threading.Thread(target = target, daemon = True)
+        thread.start()
+        return thread
+
+    def retrieve_bm25(self, query, k = 10, offset = 0):
+        """Lihat BSBIIndex.retrieve_bm25"""
+        return self.index.retrieve_bm25(query, k = k, offset = offset)
+
+    def retrieve_tfidf(self, query, k = 10, offset = 0):
+        """Lihat BSBIIndex.retrieve_tfidf"""
+        return self.index.retrieve_tfidf(query, k = k, offset = offset)
+
+    def search_bm25(self, query, offset = 0, limit = 10, max_results = None):
+        """
+        Mengambil satu halaman hasil BM25 (rank offset+1 s.d. offset+limit)
+        beserta banyaknya dokumen yang match, sehingga caller (misal view
+        Django) tidak perlu mengambil dan mengurutkan seluruh hasil hanya untuk
+        menampilkan satu halaman.
+
+        Hasilnya berupa Hit yang ringan (lihat snippets.py): isi dokumen baru
+        dibaca (dari document store, lihat BSBIIndex.document_text) ketika
+        snippet sebuah Hit diakses.
+
+        Query dengan operator boolean atau phrase (lihat
+        boolean.is_boolean_query) dijawab dengan BSBIIndex.score_boolean;
+        tanda kurung saja tidak mengubah query biasa menjadi query boolean.
+        Jika index tidak positional, phrase dicocokkan sebagai AND semua
+        term-nya (lihat BooleanEvaluator.phrase).
+
+        Parameters
+        ----------
+        max_results: int
+            Jika diisi, banyaknya hasil dibatasi sampai max_results teratas
+            (total juga dibatasi)
+
+        Returns
+        -------
+        Tuple[int, List[Hit]]
+            (total dokumen yang match, list of Hit)
+        """
+        with self.pinned() as (index, version):
+            depth = offset + limit if max_results is None else max_results
+            node = parse_query(query) if is_boolean_query(query) else None
+            if node is not None:
+                query_list = query_terms(node)
+                total, top = self.ranking(index, version, 'boolean', node, depth)
+            else:
+                query_list = index.preprocess_query(query)
+                total, top = self.ranking(index, version, 'bm25', query_list, depth)
+        if max_results is not None:
+            total = min(total, max_results)
+        loader = lambda hit: index.document_text(hit.doc_id)
+        return total, [Hit(doc_id, score, index.doc_id_map[doc_id], query_list, loader) \
+                       for (score, doc_id) in top[offset:offset + limit]]
+
+    def document_text(self, path):
+        """
+        Isi dokumen dengan path tersebut (separator '/' atau '\\'), dari
+        document store index jika dokumennya ada di index, atau dari file-nya
+        (path relatif di-resolve terhadap base_dir).
+        """
+        with self.pinned() as (index, _):
+            doc_id = index.find_doc_id(path)
+            if doc_id is not None:
+                return index.document_text(doc_id)
+        with open(os.path.join(self.base_dir, *split_path(path)), 'r') as f:
+            return f.read()
+
+    def ranking(self, index, version, model, query_list, depth):
+        """
+        Ranking untuk query_list dengan model scoring 'bm25' atau 'tfidf',
+        atau untuk tree query boolean (query_list hasil boolean.parse_query)
+        dengan model 'boolean', diambil dari cache jika ada (dan cukup dalam).
+
+        Returns
+        -------
+        Tuple[int, List[(float, int)]]
+            (total dokumen yang match, top-depth (score, docID))
+        """
+        key = (model, version, tuple(query_list))
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None and len(cached[1]) >= min(cached[0], depth):
+                return cached
+        if model == 'bm25':
+            accumulator = index.score_bm25(query_list)
+        elif model == 'boolean':
+            accumulator = index.score_boolean(query_list)
+        else:
+            accumulator = index.score_tfidf(query_list)
+        result = (accumulator.num_matched(), accumulator.top_k(depth))
+        if self.cache is not None:
+            self.cache.set(key, result)
+        return result
+
+
+_searcher = None
+_searcher_lock = threading.Lock()
+
+def get_searcher(cache_factory = None):
+    """
+    Mengembalikan Searcher yang dipakai bersama di proses ini. Searcher dibuat
+    secara lazy pada pemanggilan pertama (double-checked locking supaya hanya
+    satu thread yang memuat index). cache_factory (jika ada) dipanggil sekali
+    saat Searcher dibuat untuk membuat cache hasil query-nya.
+    """
+    global _searcher
+    if _searcher is None:
+        with _searcher_lock:
+            if _searcher is None:
+                _searcher = Searcher(data_dir = 'collection', \
+                                     output_dir = 'index', \
+                                     cache = cache_factory() if cache_factory else None, \
+                                     base_dir = BASE_DIR)
+    return _searcher
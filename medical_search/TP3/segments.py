@@ -0,0 +1,303 @@
+"""
+Index bersegmen untuk incremental indexing.
+
+Dokumen baru tidak memerlukan rebuild seluruh index: dokumen yang belum ada
+di doc_id_map di-index menjadi satu segment baru (lihat
+BSBIIndex.add_documents), yaitu index biasa (InvertedIndexWriter) bernama
+<index_name>.seg<n>. termID dan docID tetap global (term_id_map dan
+doc_id_map yang sama), dan docID dokumen baru selalu lebih besar dari docID
+yang sudah ada, sehingga rentang docID merged index dan setiap segment
+saling lepas dan terurut.
+
+Daftar segment yang aktif disimpan di <index_name>.segments (JSON). File ini
+ditulis ulang secara atomic (file sementara lalu os.replace) setelah file
+segment selesai ditulis, sehingga reader tidak pernah melihat segment yang
+setengah jadi.
+
+Saat query, SegmentedIndexReader menggabungkan merged index dan semua
+segment-nya menjadi satu reader, sekaligus membuang postings dokumen yang
+dihapus (lihat tombstones.py). Compaction (BSBIIndex.compact) me-merge
+semuanya kembali menjadi satu merged index tanpa segment di generation baru
+(lihat generations.py).
+"""
+
+import os
+import json
+import numpy as np
+
+from .index import PostingsCursor
+from .tombstones import tombstones_path
+from .shards import shards_path, read_shards
+
+SEGMENTS_VERSION = 1
+
+
+def segments_path(index_name, directory=''):
+    return os.path.join(directory, index_name + '.segments')
+
+
+def segment_name(index_name, number):
+    return f'{index_name}.seg{number}'
+
+
+def read_segments(index_name, directory=''):
+    """
+    Returns
+    -------
+    Tuple[List[str], int]
+        nama segment yang aktif (sesuai urutan docID) dan nomor segment
+        berikutnya; ([], 1) jika belum ada segment
+    """
+    path = segments_path(index_name, directory)
+    if not os.path.exists(path):
+        return [], 1
+    with open(path, 'r') as f:
+        state = json.load(f)
+    if state['version'] > SEGMENTS_VERSION:
+        raise ValueError(f"format {path} tidak didukung")
+    return state['segments'], state['next']
+
+
+def state_mtime(index_name, directory=''):
+    """
+    Waktu modifikasi terakhir dari file-file yang menentukan isi index yang
+    terlihat saat query: metadata merged index, daftar shard (lihat
+    shards.py), daftar segment, dan file tombstone merged index (atau setiap
+    shard) serta setiap segment.
+    """
+    segments, _ = read_segments(index_name, directory)
+    base = read_shards(index_name, directory) or [index_name]
+    paths = [os.path.join(directory, index_name + '.dict'), shards_path(index_name, directory),
+             segments_path(index_name, directory)] + \
+            [tombstones_path(name, directory) for name in base + segments]
+    return max(os.path.getmtime(path) for path in paths if os.path.exists(path))
+
+
+def write_segments(index_name, directory, segments, next_number):
+    """Menulis daftar segment secara atomic"""
+    path = segments_path(index_name, directory)
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'version': SEGMENTS_VERSION, 'segments': segments, 'next': next_number}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + '.tmp', path)
+
+
+class SegmentedIndexReader:
+    """
+    Reader gabungan untuk merged index dan segment-segmennya (semuanya
+    InvertedIndexReader yang sudah dibuka), dengan interface yang dipakai
+    oleh scoring di BSBIIndex (postings_dict, terms, doc_length,
+    get_postings_arrays, cursor, document_frequency, dst).
+
+    Postings list sebuah term adalah sambungan postings list term tersebut
+    di setiap reader (rentang docID saling lepas dan terurut), tanpa
+    dokumen yang dihapus (tombstones). doc_length hanya memuat dokumen yang
+    masih ada, sehingga N dan avgdl (lihat stats.py) ikut menyesuaikan.
+    Entry postings_dict berupa (None, df, None, None) dengan df termasuk
+    dokumen yang dihapus (upper bound); df yang sebenarnya dihitung dari
+    postings list oleh document_frequency (dan oleh scoring, yang memakai
+    panjang postings list).
+
+    max_score tidak digabung karena dihitung dengan rata-rata panjang
+    dokumen masing-masing segment; WAND memakai bound IDF * (k1 + 1).
+
+    Reader yang rentang docID-nya sudah tercakup oleh reader sebelumnya
+    (segment yang sudah di-compact ke merged index tetapi masih terdaftar)
+    diabaikan.
+    """
+    def __init__(self, readers, tombstones = None):
+        """
+        Parameters
+        ----------
+        readers: List[InvertedIndexReader]
+            merged index lalu segment-segmennya, sesuai urutan docID
+        tombstones: List[Tombstones]
+            tombstone setiap reader (None jika tidak ada)
+        """
+        self.readers = []
+        self.ranges = []
+        self.deleted = None
+        last_doc_id = -1
+        deleted = []
+        for reader, reader_tombstones in zip(readers, tombstones or [None] * len(readers)):
+            if len(reader.doc_length) > 0 and min(reader.doc_length) <= last_doc_id:
+                continue
+            self.readers.append(reader)
+            self.ranges.append((min(reader.doc_length, default=last_doc_id + 1), max(reader.doc_length, default=last_doc_id) + 1))
+            last_doc_id = max(reader.doc_length, default=last_doc_id)
+            if reader_tombstones is not None and len(reader_tombstones) > 0:
+                deleted.append(reader_tombstones.doc_ids())
+        if len(deleted) > 0:
+            deleted = np.concatenate(deleted)
+            self.deleted = np.zeros(max(last_doc_id, int(deleted.max())) + 1, dtype=bool)
+            self.deleted[deleted] = True
+        self.postings_dict = {}
+        self.doc_length = {}
+        self.max_tf = {}
+        self.max_score = {}
+        self.blocks = {}
+        for reader in self.readers:
+            for term in reader.terms:
+                df = reader.postings_dict[term][1]
+                if term in self.postings_dict:
+                    df += self.postings_dict[term][1]
+                self.postings_dict[term] = (None, df, None, None)
+                self.max_tf[term] = max(self.max_tf.get(term, 0), reader.max_tf.get(term, 0))
+            self.doc_length.update(reader.doc_length)
+        if self.deleted is not None:
+            for doc_id in np.flatnonzero(self.deleted).tolist():
+                self.doc_length.pop(doc_id, None)
+        self.terms = sorted(self.postings_dict)
+        self.dense_doc_length = None
+        self.live_df = {}
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        for reader in self.readers:
+            reader.__exit__(exception_type, exception_value, traceback)
+
+    def __iter__(self):
+        for term in self.terms:
+            yield (term, *self.get_postings_list(term))
+
+    def reset(self):
+        pass
+
+    def get_postings_list(self, term):
+        postings_list, tf_list = [], []
+        for reader in self.readers:
+            if term in reader.postings_dict:
+                postings, tfs = reader.get_postings_list(term)
+                postings_list.extend(postings)
+                tf_list.extend(tfs)
+        if self.deleted is not None:
+            live = [i for i, doc_id in enumerate(postings_list) if not self.is_deleted(doc_id)]
+            if len(live) < len(postings_list):
+                postings_list = [postings_list[i] for i in live]
+                tf_list = [tf_list[i] for i in live]
+        return postings_list, tf_list
+
+    def get_postings_arrays(self, term):
+        parts = [reader.get_postings_arrays(term) for reader in self.readers if term in reader.postings_dict]
+        if len(parts) == 1:
+            postings, tfs = parts[0]
+        else:
+            postings, tfs = (np.concatenate([postings for postings, _ in parts]), np.concatenate([tfs for _, tfs in parts]))
+        return self.filter_deleted(postings, tfs)
+
+    def filter_deleted(self, postings, tfs):
+        """Membuang postings (np.ndarray) dokumen yang dihapus"""
+        if self.deleted is not None:
+            live = ~self.deleted[postings]
+            if not live.all():
+                postings, tfs = postings[live], tfs[live]
+        return postings, tfs
+
+    def has_positions(self):
+        """True jika semua reader positional (lihat InvertedIndex.positions_dict)"""
+        return all(reader.has_positions() for reader in self.readers)
+
+    def get_positional_postings(self, term):
+        """
+        Seperti InvertedIndexReader.get_positional_postings, disambung dari
+        semua reader, tanpa dokumen yang dihapus.
+        """
+        parts = [reader.get_positional_postings(term) for reader in self.readers if term in reader.postings_dict]
+        if len(parts) == 1:
+            postings, tfs, positions = parts[0]
+        else:
+            postings, tfs, positions = (np.concatenate(arrays) for arrays in zip(*parts))
+        if self.deleted is not None:
+            live = ~self.deleted[postings]
+            if not live.all():
+                positions = positions[np.repeat(live, tfs)]
+                postings, tfs = postings[live], tfs[live]
+        return postings, tfs, positions
+
+    def partitions(self):
+        """
+        (reader, docID pertama, docID terakhir + 1) untuk setiap reader,
+        sesuai urutan docID. Dipakai untuk scoring setiap reader secara
+        paralel (lihat shards.py).
+        """
+        return [(reader, first, end) for reader, (first, end) in zip(self.readers, self.ranges)]
+
+    def is_deleted(self, doc_id):
+        return self.deleted is not None and doc_id < len(self.deleted) and bool(self.deleted[doc_id])
+
+    def document_frequency(self, term):
+        """df term, tanpa dokumen yang dihapus"""
+        if self.deleted is None:
+            return self.postings_dict[term][1]
+        if term not in self.live_df:
+            self.live_df[term] = len(self.get_postings_arrays(term)[0])
+        return self.live_df[term]
+
+    def cursor(self, term):
+        return PostingsCursor(*self.get_postings_list(term))
+
+    def get_dense_doc_length(self):
+        if self.dense_doc_length is None:
+            dense_doc_length = np.zeros(max(self.doc_length, default=-1) + 1, dtype=np.float64)
+            for reader in self.readers:
+                lengths = reader.get_dense_doc_length()
+                dense_doc_length[:len(lengths)] += lengths
+            if self.deleted is not None:
+                dense_doc_length[self.deleted[:len(dense_doc_length)]] = 0
+            self.dense_doc_length = dense_doc_length
+        return self.dense_doc_length
+
+
+if __name__ == '__main__':
+
+    import tempfile
+    from .index import InvertedIndexWriter, InvertedIndexReader
+    from .compression import VBEPostings
+    from .tombstones import Tombstones
+
+    with tempfile.TemporaryDirectory() as tmp:
+        assert read_segments('test', tmp) == ([], 1), "tanpa file segments: tidak ada segment"
+        write_segments('test', tmp, [segment_name('test', 1)], 2)
+        assert read_segments('test', tmp) == (['test.seg1'], 2), "daftar segment salah"
+
+        with InvertedIndexWriter('test', VBEPostings, directory = tmp) as index:
+            index.append(1, [0, 2], [2, 1])
+            index.append(3, [1], [4])
+        with InvertedIndexWriter('test.seg1', VBEPostings, directory = tmp) as index:
+            index.append(1, [3, 4], [1, 5])
+            index.append(2, [4], [2])
+        readers = [InvertedIndexReader(name, directory = tmp).__enter__() for name in ['test', 'test.seg1', 'test']]
+        reader = SegmentedIndexReader(readers)
+        assert len(reader.readers) == 2, "reader dengan docID yang sudah tercakup harus diabaikan"
+        assert [(first, end) for _, first, end in reader.partitions()] == [(0, 3), (3, 5)], "rentang docID reader salah"
+        assert reader.terms == [1, 2, 3] and reader.postings_dict[1][1] == 4, "terms/df salah"
+        assert reader.get_postings_list(1) == ([0, 2, 3, 4], [2, 1, 1, 5]), "postings list gabungan salah"
+        postings, tfs = reader.get_postings_arrays(1)
+        assert postings.tolist() == [0, 2, 3, 4] and tfs.tolist() == [2, 1, 1, 5], "postings array gabungan salah"
+        assert reader.get_dense_doc_length().tolist() == [2, 4, 1, 1, 7], "doc_length gabungan salah"
+        assert [term for term, _, _ in reader] == [1, 2, 3], "iterasi reader gabungan salah"
+
+        tombstones = Tombstones()
+        tombstones.add([2, 3])
+        deleted = SegmentedIndexReader(readers[:2], [None, tombstones])
+        assert sorted(deleted.doc_length) == [0, 1, 4], "doc_length tidak boleh memuat dokumen yang dihapus"
+        assert deleted.get_postings_list(1) == ([0, 4], [2, 5]), "postings dokumen yang dihapus harus dibuang"
+        assert deleted.get_postings_arrays(1)[0].tolist() == [0, 4], "postings dokumen yang dihapus harus dibuang"
+        assert deleted.document_frequency(1) == 2 and deleted.postings_dict[1][1] == 4, "df tanpa dokumen yang dihapus salah"
+        assert deleted.get_dense_doc_length().tolist() == [2, 4, 0, 0, 7], "panjang dokumen yang dihapus harus 0"
+        assert deleted.cursor(1).postings_list == [0, 4], "cursor tidak boleh memuat dokumen yang dihapus"
+        reader.__exit__(None, None, None)
+        readers[2].__exit__(None, None, None)
+
+        # positional: posisi disambung dan posisi dokumen yang dihapus dibuang
+        for name, postings in [('pos', {1: ([0, 2], [2, 1], [3, 9, 4])}), ('pos.seg1', {1: ([3, 4], [1, 2], [0, 5, 6])})]:
+            with InvertedIndexWriter(name, VBEPostings, directory = tmp, positional = True) as index:
+                for term, (docs, tfs, positions) in postings.items():
+                    index.append(term, docs, tfs, positions = positions)
+        readers = [InvertedIndexReader(name, directory = tmp).__enter__() for name in ['pos', 'pos.seg1']]
+        positional = SegmentedIndexReader(readers, [None, tombstones])
+        assert positional.has_positions(), "semua reader positional"
+        postings, tfs, positions = positional.get_positional_postings(1)
+        assert postings.tolist() == [0, 4] and tfs.tolist() == [2, 2] and positions.tolist() == [3, 9, 5, 6], \
+               "posisi dokumen yang dihapus harus dibuang"
+        positional.__exit__(None, None, None)
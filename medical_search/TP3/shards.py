@@ -0,0 +1,223 @@
+"""
+Index yang dipartisi per dokumen (sharding) dan eksekusi query
+scatter-gather.
+
+BSBIIndex.index_shards membagi block-block di collection/ (terurut) menjadi
+beberapa rentang yang berurutan, lalu me-merge intermediate index setiap
+rentang menjadi satu shard, yaitu index biasa bernama <index_name>.shard<i>.
+termID dan docID tetap global (term_id_map dan doc_id_map yang sama),
+sehingga rentang docID setiap shard saling lepas dan terurut, sama seperti
+segment (lihat segments.py). Daftar shard disimpan di <index_name>.shards
+(JSON, ditulis secara atomic).
+
+Saat query, semua shard (beserta segment-nya) dibuka sebagai satu
+SegmentedIndexReader, sehingga statistik koleksi (N, avgdl, df; lihat
+stats.py) dihitung secara global dan konsisten untuk semua shard. Scoring
+(score_partitions) dijalankan paralel per shard di thread pool: setiap shard
+mengakumulasikan score dokumennya sendiri (dense array sebesar rentang docID
+shard) dengan IDF dan normalisasi panjang dokumen global, lalu top-K setiap
+shard di-merge (ShardedScores). Score yang dihasilkan identik dengan index
+tunggal.
+
+Thread pool efektif karena sebagian besar waktu scoring dihabiskan di
+operasi NumPy dan decoding postings yang melepas GIL; overhead per query
+(submit ke thread pool dan merging top-K) membuat sharding hanya
+menguntungkan untuk koleksi yang cukup besar.
+"""
+
+import os
+import json
+import heapq
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .scoring import ScoreAccumulator
+
+SHARDS_VERSION = 1
+
+
+def shards_path(index_name, directory=''):
+    return os.path.join(directory, index_name + '.shards')
+
+
+def shard_name(index_name, number):
+    return f'{index_name}.shard{number}'
+
+
+def read_shards(index_name, directory=''):
+    """Nama shard (sesuai urutan docID), [] jika index tidak di-shard"""
+    path = shards_path(index_name, directory)
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        state = json.load(f)
+    if state['version'] > SHARDS_VERSION:
+        raise ValueError(f"format {path} tidak didukung")
+    return state['shards']
+
+
+def write_shards(index_name, directory, shards):
+    """Menulis daftar shard secara atomic"""
+    path = shards_path(index_name, directory)
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'version': SHARDS_VERSION, 'shards': shards}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + '.tmp', path)
+
+
+def split_ranges(items, num_shards):
+    """Membagi items menjadi (paling banyak) num_shards bagian berurutan yang hampir sama besar"""
+    if num_shards <= 0:
+        raise ValueError("banyaknya shard harus positif")
+    size, rest = divmod(len(items), num_shards)
+    parts, start = [], 0
+    for i in range(num_shards):
+        end = start + size + (1 if i < rest else 0)
+        if end > start:
+            parts.append(items[start:end])
+        start = end
+    return parts
+
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+def get_executor(workers):
+    """
+    Thread pool dengan workers thread yang dipakai bersama di proses ini
+    (satu per banyaknya worker), sehingga BSBIIndex yang dibuang (misal
+    setelah reload) tidak meninggalkan thread.
+    """
+    with _executors_lock:
+        if workers not in _executors:
+            _executors[workers] = ThreadPoolExecutor(workers, thread_name_prefix = 'shard')
+        return _executors[workers]
+
+
+class ShardedScores:
+    """
+    Hasil scoring scatter-gather, dengan interface yang sama dengan
+    ScoreAccumulator (num_matched dan top_k).
+
+    Attributes
+    ----------
+    parts: List[Tuple[int, ScoreAccumulator]]
+        docID pertama setiap shard dan accumulator-nya (indexed by docID -
+        docID pertama)
+    """
+    def __init__(self, parts):
+        self.parts = parts
+
+    def num_matched(self):
+        return sum(accumulator.num_matched() for _, accumulator in self.parts)
+
+    def top_k(self, k, offset = 0):
+        """
+        top-K setiap shard di-merge, dengan urutan yang sama dengan
+        ScoreAccumulator.top_k (score mengecil, docID lebih kecil
+        didahulukan jika score sama)
+        """
+        if k <= 0:
+            return []
+        tops = [[(score, doc_id + first) for score, doc_id in accumulator.top_k(offset + k)]
+                for first, accumulator in self.parts]
+        merged = heapq.merge(*tops, key = lambda entry: (-entry[0], entry[1]))
+        return list(itertools.islice(merged, offset, offset + k))
+
+
+def score_partitions(reader, stats, term_ids, model = 'bm25', executor = None):
+    """
+    Scatter-gather: scoring setiap partisi SegmentedIndexReader (shard atau
+    segment, lihat SegmentedIndexReader.partitions) secara paralel di
+    executor, dengan statistik koleksi global.
+
+    Parameters
+    ----------
+    reader: SegmentedIndexReader
+    stats: CollectionStats
+        statistik koleksi global dari reader (lihat BSBIIndex.collection_stats)
+    term_ids: List[int]
+        termID query (term yang tidak ada di index sudah dibuang)
+    model: str
+        'bm25' atau 'tfidf'
+
+    Returns
+    -------
+    ShardedScores
+    """
+    # df global dihitung sekali di coordinator (tanpa dokumen yang dihapus)
+    dfs = {term_id: reader.document_frequency(term_id) for term_id in set(term_ids)}
+    N = stats.num_docs
+
+    def score(partition):
+        partition_reader, first, end = partition
+        accumulator = ScoreAccumulator(end - first)
+        bm25_norm = stats.bm25_norm[first:end]
+        for term_id in term_ids:
+            if term_id not in partition_reader.postings_dict or dfs[term_id] == 0:
+                continue
+            postings, tfs = reader.filter_deleted(*partition_reader.get_postings_arrays(term_id))
+            if len(postings) == 0:
+                continue
+            if model == 'bm25':
+                accumulator.add_bm25_norm(postings - first, tfs, N, bm25_norm, df = dfs[term_id])
+            else:
+                accumulator.add_tfidf(postings - first, tfs, N, df = dfs[term_id])
+        return first, accumulator
+
+    partitions = reader.partitions()
+    if executor is None or len(partitions) == 1:
+        return ShardedScores([score(partition) for partition in partitions])
+    return ShardedScores(list(executor.map(score, partitions)))
+
+
+if __name__ == '__main__':
+
+    import tempfile
+    import numpy as np
+    from .index import InvertedIndexWriter, InvertedIndexReader
+    from .compression import VBEPostings
+    from .segments import SegmentedIndexReader
+    from .stats import CollectionStats
+
+    assert split_ranges(list(range(7)), 3) == [[0, 1, 2], [3, 4], [5, 6]], "pembagian shard salah"
+    assert split_ranges([0, 1], 4) == [[0], [1]], "shard kosong tidak boleh dibuat"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_shards('test', tmp, [shard_name('test', 0), shard_name('test', 1)])
+        assert read_shards('test', tmp) == ['test.shard0', 'test.shard1'] and read_shards('lain', tmp) == [], "daftar shard salah"
+
+        postings = {1: ([0, 2, 3, 4], [2, 1, 1, 5]), 2: ([1, 4], [2, 2]), 3: ([0, 1, 2, 3, 4], [1, 1, 3, 1, 1])}
+        with InvertedIndexWriter('test', VBEPostings, directory = tmp) as index:
+            for term, (docs, tfs) in postings.items():
+                index.append(term, docs, tfs)
+        for name, (first, end) in [('test.shard0', (0, 3)), ('test.shard1', (3, 5))]:
+            with InvertedIndexWriter(name, VBEPostings, directory = tmp) as index:
+                for term, (docs, tfs) in postings.items():
+                    part = [(doc, tf) for doc, tf in zip(docs, tfs) if first <= doc < end]
+                    if part:
+                        index.append(term, [doc for doc, _ in part], [tf for _, tf in part])
+
+        with InvertedIndexReader('test', directory = tmp) as single:
+            stats = CollectionStats.from_reader(single, with_cf = False)
+            expected = {}
+            for model in ['bm25', 'tfidf']:
+                accumulator = ScoreAccumulator(len(stats.bm25_norm))
+                for term in [1, 2, 1]:
+                    if model == 'bm25':
+                        accumulator.add_bm25_norm(*single.get_postings_arrays(term), stats.num_docs, stats.bm25_norm)
+                    else:
+                        accumulator.add_tfidf(*single.get_postings_arrays(term), stats.num_docs)
+                expected[model] = (accumulator.num_matched(), accumulator.top_k(10), accumulator.top_k(2, offset = 1))
+
+        readers = [InvertedIndexReader(name, directory = tmp).__enter__() for name in read_shards('test', tmp)]
+        sharded = SegmentedIndexReader(readers)
+        sharded_stats = CollectionStats.from_reader(sharded, with_cf = False)
+        assert np.array_equal(sharded_stats.bm25_norm, stats.bm25_norm), "statistik global shard salah"
+        for model, executor in [('bm25', None), ('tfidf', get_executor(2)), ('bm25', get_executor(2))]:
+            scores = score_partitions(sharded, sharded_stats, [1, 2, 1], model, executor)
+            result = (scores.num_matched(), scores.top_k(10), scores.top_k(2, offset = 1))
+            assert result == expected[model], f"scatter-gather {model} harus identik dengan index tunggal"
+        sharded.__exit__(None, None, None)
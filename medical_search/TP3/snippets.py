@@ -0,0 +1,129 @@
+"""
+Hasil pencarian yang ringan (Hit) dan snippet yang dibuat secara lazy.
+
+Searcher hanya mengembalikan (docID, score, path) untuk setiap hasil. Isi
+dokumen baru dibaca, dan snippet-nya baru dibuat, ketika atribut snippet
+sebuah Hit diakses, yaitu saat template merender halaman yang ditampilkan.
+
+Snippet bersifat query-biased: dipilih potongan teks sepanjang SNIPPET_LENGTH
+karakter yang memuat paling banyak term query yang berbeda (dicocokkan
+setelah stemming, lihat analysis.py). Jika tidak ada term query di dokumen,
+dipakai awal dokumen seperti sebelumnya.
+"""
+
+import re
+
+from .analysis import stem
+from .docstore import split_path
+
+SNIPPET_LENGTH = 500
+
+_word = re.compile(r'\w+')
+
+
+def make_snippet(text, query_terms, length = SNIPPET_LENGTH):
+    """
+    Parameters
+    ----------
+    text: str
+        isi dokumen
+    query_terms: Iterable[str]
+        term query hasil analisis (sudah di-stem)
+    length: int
+        panjang maksimum snippet (tanpa tanda " ...")
+
+    Returns
+    -------
+    str
+        potongan text sepanjang paling banyak length karakter, diawali
+        "... " jika tidak dimulai dari awal dokumen dan diakhiri " ..." jika
+        terpotong sebelum akhir dokumen
+    """
+    query_terms = set(query_terms)
+    start = 0
+    if len(text) > length and query_terms:
+        matches = [(match.start(), term) for match in _word.finditer(text) \
+                   for term in [stem(match.group())] if term in query_terms]
+        # jendela dimulai di awal dokumen dan di setiap kemunculan term query
+        # (tanpa melewati akhir dokumen); ambil jendela dengan term berbeda
+        # terbanyak, lalu kemunculan terbanyak, lalu yang paling awal. Posisi
+        # awal jendela menaik, sehingga isi jendela cukup digeser (two pointers).
+        best = None
+        counts = {}
+        left = right = 0
+        for position in [0] + [min(match_start, len(text) - length) for match_start, _ in matches]:
+            while right < len(matches) and matches[right][0] < position + length:
+                counts[matches[right][1]] = counts.get(matches[right][1], 0) + 1
+                right += 1
+            while left < right and matches[left][0] < position:
+                counts[matches[left][1]] -= 1
+                if counts[matches[left][1]] == 0:
+                    del counts[matches[left][1]]
+                left += 1
+            candidate = (len(counts), right - left)
+            if best is None or candidate > best:
+                start, best = position, candidate
+    snippet = text[start:start + length]
+    if start > 0:
+        snippet = "... " + snippet
+    if start + length < len(text):
+        snippet = snippet + " ..."
+    return snippet
+
+
+class Hit:
+    """
+    Satu hasil pencarian.
+
+    Attributes
+    ----------
+    doc_id: int
+    score: float
+    path: str
+        nama dokumen di doc_id_map (path relatif dokumen)
+    parts: List[str]
+        komponen path (lihat split_path), dipakai untuk URL dokumen
+    snippet: str
+        snippet query-biased, dibuat saat pertama kali diakses dari isi
+        dokumen yang dibaca dengan loader(hit)
+    """
+    __slots__ = ('doc_id', 'score', 'path', 'query_terms', 'loader', '_snippet')
+
+    def __init__(self, doc_id, score, path, query_terms = (), loader = None):
+        self.doc_id = doc_id
+        self.score = score
+        self.path = path
+        self.query_terms = query_terms
+        self.loader = loader
+        self._snippet = None
+
+    @property
+    def parts(self):
+        return split_path(self.path)
+
+    @property
+    def snippet(self):
+        if self._snippet is None:
+            self._snippet = make_snippet(self.loader(self), self.query_terms)
+        return self._snippet
+
+    def __repr__(self):
+        return f"Hit({self.doc_id}, {self.score!r}, {self.path!r})"
+
+
+if __name__ == '__main__':
+
+    text = "alpha beta. " * 50 + "the thiol group was alkylated with radioactive iodoacetate." + " gamma" * 100
+    snippet = make_snippet(text, ['alkyl', 'radioact', 'iodoacet'], length = 100)
+    assert snippet.startswith("... ") and snippet.endswith(" ...") and len(snippet) == 108, "snippet salah"
+    assert "alkylated with radioactive iodoacetate" in snippet, "snippet harus memuat term query"
+    assert make_snippet(text, ['tidakada'], length = 100) == text[:100] + " ...", "tanpa term query: awal dokumen"
+    assert make_snippet("pendek", ['pendek']) == "pendek", "dokumen pendek tidak dipotong"
+    assert make_snippet(text + " omega", ['omega'], length = 100) == "... " + (text + " omega")[-100:], \
+           "jendela tidak boleh melewati akhir dokumen"
+
+    loads = []
+    hit = Hit(3, 1.5, 'collection\\1\\3.txt', ['alkyl'], loader = lambda hit: loads.append(hit.doc_id) or text)
+    assert loads == [], "isi dokumen tidak boleh dibaca sebelum snippet diakses"
+    assert hit.snippet == hit.snippet and loads == [3], "snippet harus dibuat sekali saja"
+    assert hit.parts[2] == '3.txt', "parts salah"
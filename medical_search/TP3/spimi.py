@@ -0,0 +1,228 @@
+"""
+Indexing SPIMI (single-pass in-memory indexing) dengan batas memori.
+
+Dokumen dibaca satu per satu (streaming) dari seluruh isi data_dir, termasuk
+sub-direktori di kedalaman berapa pun, sehingga batas block tidak lagi
+ditentukan oleh struktur folder collection/. Postings setiap term
+diakumulasikan di memori dalam dua array.array (docID dan TF) yang ringkas;
+karena docID diberikan menaik sesuai urutan dokumen, postings list selalu
+terurut tanpa perlu sorting.
+
+Begitu perkiraan memori yang dipakai postings mencapai memory_budget, semua
+postings ditulis sebagai satu intermediate index lalu dikosongkan. Rentang
+docID setiap intermediate index saling lepas dan terurut, sehingga merging
+(BSBIIndex.merge) cukup menyambung postings list.
+
+Untuk index positional, posisi setiap term di dokumen (lihat
+analysis.analyze_positions) diakumulasikan di array.array ketiga.
+
+Perkiraan memori hanya menghitung postings yang belum ditulis (lihat
+POSTING_BYTES, POSITION_BYTES, dan TERM_OVERHEAD_BYTES); term_id_map dan doc_id_map tetap
+tumbuh sepanjang indexing seperti pada BSBI.
+
+Urutan dokumen sama dengan BSBIIndex.parse_block untuk collection/ (folder
+terurut, file sesuai urutan os.listdir), dan dokumen tanpa term tidak
+mendapat docID, sehingga dengan memory_budget yang cukup besar termID,
+docID, dan merged index yang dihasilkan identik dengan indexing BSBI.
+"""
+
+import os
+import sys
+import array
+
+from .analysis import analyze, analyze_positions
+from .index import InvertedIndexWriter
+
+# batas memori default untuk postings di memori (bytes)
+DEFAULT_MEMORY_BUDGET = 64 << 20
+
+# satu posting = satu docID + satu TF (array.array('I'))
+POSTING_BYTES = 2 * array.array('I').itemsize
+# satu posisi (index positional)
+POSITION_BYTES = array.array('I').itemsize
+# dua array.array kosong ditambah perkiraan entry dictionary dan tuple per term
+TERM_OVERHEAD_BYTES = 2 * sys.getsizeof(array.array('I')) + 100
+
+INDEX_PREFIX = 'intermediate_index_spimi_'
+
+
+def document_paths(data_dir):
+    """
+    Path setiap file di data_dir dan semua sub-direktorinya. Sub-direktori
+    dikunjungi terurut, file di setiap direktori sesuai urutan os.listdir
+    (seperti BSBIIndex.parse_block).
+    """
+    for root, dirs, files in os.walk(data_dir):
+        dirs.sort()
+        for file in files:
+            yield os.path.join(root, file)
+
+
+def iter_documents(data_dir, paths = None):
+    """
+    Menghasilkan (path, isi dokumen) untuk setiap path di paths (default:
+    semua file di data_dir, lihat document_paths). Setiap file baru dibaca
+    saat gilirannya.
+    """
+    for path in document_paths(data_dir) if paths is None else paths:
+        with open(path, 'r') as f:
+            yield path, f.read()
+
+
+class SPIMIInverter:
+    """
+    Attributes
+    ----------
+    postings: Dictionary mapping termID -> (array docID, array TF) yang
+        belum ditulis ke disk, ditambah array posisi jika positional
+    memory_used: int
+        perkiraan memori (bytes) postings yang belum ditulis
+    intermediate_indices: List[str]
+        nama intermediate index yang sudah ditulis, sesuai urutan docID
+    """
+    def __init__(self, term_id_map, doc_id_map, output_dir, postings_encoding, \
+                 memory_budget = DEFAULT_MEMORY_BUDGET, index_prefix = INDEX_PREFIX, positional = False):
+        if memory_budget <= 0:
+            raise ValueError("memory_budget harus positif")
+        self.term_id_map = term_id_map
+        self.doc_id_map = doc_id_map
+        self.output_dir = output_dir
+        self.postings_encoding = postings_encoding
+        self.memory_budget = memory_budget
+        self.index_prefix = index_prefix
+        self.positional = positional
+        self.postings = {}
+        self.memory_used = 0
+        self.intermediate_indices = []
+
+    def add_document(self, path, terms, positions = None):
+        """
+        Menambahkan satu dokumen (list of terms hasil analisis, beserta
+        posisinya jika positional) dan menulis intermediate index jika
+        memory_budget tercapai.
+        """
+        if len(terms) == 0:
+            return
+        if self.positional:
+            self.add_positions(path, terms, positions)
+        else:
+            # termID diberikan sesuai urutan kemunculan pertama, seperti parse_block
+            counts = {}
+            for term in terms:
+                term_id = self.term_id_map[term]
+                counts[term_id] = counts.get(term_id, 0) + 1
+            doc_id = self.doc_id_map[path]
+            for term_id, tf in counts.items():
+                lists = self.postings.get(term_id)
+                if lists is None:
+                    lists = self.postings[term_id] = (array.array('I'), array.array('I'))
+                    self.memory_used += TERM_OVERHEAD_BYTES
+                lists[0].append(doc_id)
+                lists[1].append(tf)
+            self.memory_used += POSTING_BYTES * len(counts)
+        if self.memory_used >= self.memory_budget:
+            self.flush()
+
+    def add_positions(self, path, terms, positions):
+        """add_document untuk index positional"""
+        term_positions = {}
+        for term, position in zip(terms, positions):
+            term_positions.setdefault(self.term_id_map[term], []).append(position)
+        doc_id = self.doc_id_map[path]
+        for term_id, term_position in term_positions.items():
+            lists = self.postings.get(term_id)
+            if lists is None:
+                lists = self.postings[term_id] = (array.array('I'), array.array('I'), array.array('I'))
+                self.memory_used += TERM_OVERHEAD_BYTES + sys.getsizeof(lists[2])
+            lists[0].append(doc_id)
+            lists[1].append(len(term_position))
+            lists[2].extend(term_position)
+        self.memory_used += POSTING_BYTES * len(term_positions) + POSITION_BYTES * len(terms)
+
+    def flush(self):
+        """Menulis semua postings di memori sebagai satu intermediate index"""
+        if len(self.postings) == 0:
+            return
+        index_id = self.index_prefix + str(len(self.intermediate_indices))
+        with InvertedIndexWriter(index_id, self.postings_encoding, directory = self.output_dir, \
+                                 positional = self.positional) as index:
+            for term_id in sorted(self.postings):
+                lists = self.postings[term_id]
+                positions = lists[2].tolist() if self.positional else None
+                index.append(term_id, lists[0].tolist(), lists[1].tolist(), positions = positions)
+        self.intermediate_indices.append(index_id)
+        self.postings = {}
+        self.memory_used = 0
+
+    def invert(self, documents):
+        """
+        Parameters
+        ----------
+        documents: Iterable[Tuple[str, str]]
+            (path, isi dokumen), misal dari iter_documents
+
+        Returns
+        -------
+        List[str]
+            nama semua intermediate index yang ditulis
+        """
+        for path, text in documents:
+            if self.positional:
+                self.add_document(path, *analyze_positions(text))
+            else:
+                self.add_document(path, analyze(text))
+        self.flush()
+        return self.intermediate_indices
+
+
+if __name__ == '__main__':
+
+    import tempfile
+    from .util import IdMap
+    from .index import InvertedIndexReader
+    from .compression import VBEPostings
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, 'data')
+        os.makedirs(os.path.join(data_dir, 'b', 'dalam'))
+        os.makedirs(os.path.join(data_dir, 'a'))
+        documents = {os.path.join(data_dir, 'akar.txt'): "lipid metabolism in toxemia",
+                     os.path.join(data_dir, 'a', '1.txt'): "normal pregnancy and lipid lipid",
+                     os.path.join(data_dir, 'a', '2.txt'): "the and of",
+                     os.path.join(data_dir, 'b', 'dalam', '3.txt'): "toxemia of pregnancy"}
+        for path, text in documents.items():
+            with open(path, 'w') as f:
+                f.write(text)
+        assert [path for path, _ in iter_documents(data_dir)][0] == os.path.join(data_dir, 'akar.txt'), \
+               "file di root data_dir harus dibaca lebih dulu"
+        assert sorted(path for path, _ in iter_documents(data_dir)) == sorted(documents), "semua file harus dibaca"
+
+        term_id_map, doc_id_map = IdMap(), IdMap()
+        inverter = SPIMIInverter(term_id_map, doc_id_map, tmp, VBEPostings, memory_budget = 1)
+        names = inverter.invert(iter_documents(data_dir))
+        assert len(names) == 3, "setiap dokumen (yang punya term) harus memicu flush dengan budget 1 byte"
+        assert len(doc_id_map) == 3, "dokumen tanpa term tidak mendapat docID"
+        assert inverter.postings == {} and inverter.memory_used == 0, "postings harus dikosongkan setelah flush"
+
+        postings = {}
+        for name in names:
+            with InvertedIndexReader(name, directory = tmp) as index:
+                for term_id, postings_list, tf_list in index:
+                    postings.setdefault(term_id, []).extend(zip(postings_list, tf_list))
+        lipid = postings[term_id_map['lipid']]
+        assert lipid == [(doc_id_map[os.path.join(data_dir, 'akar.txt')], 1), \
+                         (doc_id_map[os.path.join(data_dir, 'a', '1.txt')], 2)], "postings lipid salah"
+
+        inverter = SPIMIInverter(IdMap(), IdMap(), tmp, VBEPostings, memory_budget = 1 << 20, index_prefix = 'besar_')
+        assert inverter.invert(iter_documents(data_dir)) == ['besar_0'], "budget besar: satu intermediate index saja"
+
+        # positional: posisi dihitung sebelum stopwords dibuang
+        term_id_map, doc_id_map = IdMap(), IdMap()
+        inverter = SPIMIInverter(term_id_map, doc_id_map, tmp, VBEPostings, memory_budget = 1 << 20, \
+                                 index_prefix = 'posisi_', positional = True)
+        [name] = inverter.invert(iter_documents(data_dir))
+        with InvertedIndexReader(name, directory = tmp) as index:
+            postings, tfs, positions = index.get_positional_postings(term_id_map['lipid'])
+            assert tfs.tolist() == [1, 2] and positions.tolist() == [0, 3, 4], "posisi lipid salah"
+            postings, tfs, positions = index.get_positional_postings(term_id_map['pregnanc'])
+            assert positions.tolist() == [1, 2], "posisi pregnanc salah"
@@ -0,0 +1,134 @@
+"""
+Statistik koleksi yang dihitung sekali saat indexing (lihat
+BSBIIndex.merge_index) dan disimpan di <index_name>.stats, sehingga scoring
+saat query tidak perlu memindai tabel panjang dokumen:
+
+    num_docs (N), total_tokens, avg_doc_length (avgdl)
+    df dan cf (collection frequency) setiap term, indexed by termID
+    panjang dokumen dan faktor normalisasi panjang BM25
+    k1 * ((1 - b) + b * dl / avgdl) setiap dokumen, indexed by docID
+
+File disimpan dengan np.savez (tanpa kompresi). Untuk index lama yang belum
+punya file stats, statistik dihitung dari metadata index (tanpa cf).
+"""
+
+import os
+import numpy as np
+
+from .scoring import bm25_norms, K1, B
+
+STATS_VERSION = 1
+
+
+def stats_path(index_name, directory=''):
+    return os.path.join(directory, index_name + '.stats')
+
+
+class CollectionStats:
+    """
+    Attributes
+    ----------
+    num_docs: int
+        banyaknya dokumen di index (N)
+    total_tokens: int
+        banyaknya token di seluruh koleksi (setelah analisis)
+    avg_doc_length: float
+        total_tokens / num_docs
+    df: np.ndarray[int64]
+        document frequency, indexed by termID (0 untuk termID yang tidak ada)
+    cf: np.ndarray[int64]
+        collection frequency (jumlah TF), indexed by termID; None jika tidak
+        diketahui (index lama)
+    doc_length: np.ndarray[float64]
+        panjang dokumen, indexed by docID
+    bm25_norm: np.ndarray[float64]
+        k1 * ((1 - b) + b * dl / avgdl), indexed by docID
+    k1, b: float
+        parameter BM25 yang dipakai untuk bm25_norm
+    """
+    def __init__(self, num_docs, total_tokens, df, cf, doc_length, k1 = K1, b = B):
+        self.num_docs = num_docs
+        self.total_tokens = total_tokens
+        self.avg_doc_length = total_tokens / num_docs if num_docs else 0.0
+        self.df = df
+        self.cf = cf
+        self.doc_length = doc_length
+        self.k1 = k1
+        self.b = b
+        self.bm25_norm = bm25_norms(doc_length, self.avg_doc_length, k1, b)
+
+    @classmethod
+    def from_reader(cls, reader, with_cf = True, k1 = K1, b = B):
+        """
+        Menghitung statistik dari InvertedIndexReader yang sudah dibuka. Jika
+        with_cf, semua postings di-decode sekali untuk menghitung cf.
+        """
+        doc_length = reader.get_dense_doc_length()
+        df = np.zeros(max(reader.terms, default=-1) + 1, dtype=np.int64)
+        for term in reader.terms:
+            df[term] = reader.postings_dict[term][1]
+        cf = None
+        if with_cf:
+            cf = np.zeros(len(df), dtype=np.int64)
+            reader.reset()
+            for term, _, tf_list in reader:
+                cf[term] = sum(tf_list)
+            reader.reset()
+        return cls(len(reader.doc_length), int(doc_length.sum()), df, cf, doc_length, k1, b)
+
+    def save(self, path):
+        # file object, supaya np.savez tidak menambahkan ekstensi .npz
+        with open(path, 'wb') as f:
+            np.savez(f, version = STATS_VERSION, num_docs = self.num_docs, total_tokens = self.total_tokens,
+                     df = self.df, cf = self.cf if self.cf is not None else np.zeros(0, dtype=np.int64),
+                     has_cf = self.cf is not None, doc_length = self.doc_length,
+                     k1 = self.k1, b = self.b, bm25_norm = self.bm25_norm)
+
+    @classmethod
+    def load(cls, path, k1 = K1, b = B):
+        """
+        Memuat statistik dari file. bm25_norm yang tersimpan dipakai jika k1
+        dan b sama dengan yang diminta; jika tidak, dihitung ulang.
+        """
+        with np.load(path) as data:
+            if int(data['version']) > STATS_VERSION:
+                raise ValueError(f"format stats {path} tidak didukung")
+            stats = cls.__new__(cls)
+            stats.num_docs = int(data['num_docs'])
+            stats.total_tokens = int(data['total_tokens'])
+            stats.avg_doc_length = stats.total_tokens / stats.num_docs if stats.num_docs else 0.0
+            stats.df = data['df']
+            stats.cf = data['cf'] if bool(data['has_cf']) else None
+            stats.doc_length = data['doc_length']
+            stats.k1, stats.b = k1, b
+            if (float(data['k1']), float(data['b'])) == (k1, b):
+                stats.bm25_norm = data['bm25_norm']
+            else:
+                stats.bm25_norm = bm25_norms(stats.doc_length, stats.avg_doc_length, k1, b)
+        return stats
+
+
+if __name__ == '__main__':
+
+    import tempfile
+    from .index import InvertedIndexWriter, InvertedIndexReader
+    from .compression import VBEPostings
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with InvertedIndexWriter('test', VBEPostings, directory = tmp) as index:
+            index.append(1, [2, 3, 4, 8, 10], [2, 4, 2, 3, 30])
+            index.append(3, [3, 4, 5], [34, 23, 56])
+        with InvertedIndexReader('test', directory = tmp, use_mmap = True) as reader:
+            stats = CollectionStats.from_reader(reader)
+            assert [term for term, _, _ in reader] == [1, 3], "reader harus di-reset setelah menghitung cf"
+        assert (stats.num_docs, stats.total_tokens, stats.avg_doc_length) == (6, 154, 154 / 6), "statistik koleksi salah"
+        assert stats.df.tolist() == [0, 5, 0, 3] and stats.cf.tolist() == [0, 41, 0, 113], "df/cf salah"
+        assert stats.bm25_norm[3] == K1*((1-B)+B*(38/stats.avg_doc_length)), "bm25_norm salah"
+
+        stats.save(stats_path('test', tmp))
+        loaded = CollectionStats.load(stats_path('test', tmp))
+        assert (loaded.num_docs, loaded.avg_doc_length) == (6, stats.avg_doc_length), "stats yang dimuat salah"
+        assert loaded.cf.tolist() == stats.cf.tolist() and loaded.bm25_norm.tolist() == stats.bm25_norm.tolist(), \
+               "stats yang dimuat salah"
+        assert CollectionStats.load(stats_path('test', tmp), k1 = 1.2).bm25_norm[3] == 1.2*((1-B)+B*(38/stats.avg_doc_length)), \
+               "bm25_norm harus dihitung ulang untuk k1 yang berbeda"
@@ -0,0 +1,133 @@
+"""
+Tombstone: bitmap dokumen yang dihapus untuk satu index (merged index atau
+satu segment, lihat segments.py), disimpan di <index_name>.deleted.
+
+Postings dan doc_length index bersifat append-only, sehingga dokumen yang
+dihapus (lihat BSBIIndex.delete_documents) hanya ditandai di bitmap ini.
+Saat query, postings dokumen yang ditandai dibuang oleh
+SegmentedIndexReader (sehingga df, N, dan avgdl hanya menghitung dokumen
+yang masih ada); saat compaction (BSBIIndex.compact) postings dan panjang
+dokumen tersebut benar-benar dibuang dari index.
+
+    MAGIC (4 bytes) | docID pertama (uint64) | banyaknya bit (uint64) | bitmap
+
+Bit ke-i (urutan bit little endian, np.packbits) menandai docID
+pertama + i.
+"""
+
+import os
+import struct
+import numpy as np
+
+MAGIC = b'MSTB'
+HEADER = struct.Struct('<4sQQ')
+
+
+def tombstones_path(index_name, directory=''):
+    return os.path.join(directory, index_name + '.deleted')
+
+
+class Tombstones:
+    """
+    Attributes
+    ----------
+    first_doc_id: int
+        docID yang ditandai oleh bit pertama
+    bits: np.ndarray[bool]
+        bits[i] True jika docID first_doc_id + i dihapus
+    """
+    def __init__(self, first_doc_id = 0, bits = None):
+        self.first_doc_id = first_doc_id
+        self.bits = bits if bits is not None else np.zeros(0, dtype=bool)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, first_doc_id, num_bits = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} bukan file tombstone")
+        bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8, offset=HEADER.size), \
+                             count=num_bits, bitorder='little').astype(bool)
+        return cls(first_doc_id, bits)
+
+    def save(self, path):
+        """Menulis bitmap ke file sementara lalu di-rename (atomic)"""
+        with open(path + '.tmp', 'wb') as f:
+            f.write(HEADER.pack(MAGIC, self.first_doc_id, len(self.bits)))
+            f.write(np.packbits(self.bits, bitorder='little').tobytes())
+        os.replace(path + '.tmp', path)
+
+    def add(self, doc_ids):
+        """
+        Menandai doc_ids sebagai dihapus.
+
+        Returns
+        -------
+        int
+            banyaknya docID yang baru ditandai
+        """
+        doc_ids = np.asarray(sorted(doc_ids), dtype=np.int64)
+        if len(doc_ids) == 0:
+            return 0
+        if len(self.bits) == 0:
+            self.first_doc_id = int(doc_ids[0])
+        first = min(self.first_doc_id, int(doc_ids[0]))
+        last = max(self.first_doc_id + len(self.bits), int(doc_ids[-1]) + 1)
+        if (first, last) != (self.first_doc_id, self.first_doc_id + len(self.bits)):
+            bits = np.zeros(last - first, dtype=bool)
+            bits[self.first_doc_id - first:self.first_doc_id - first + len(self.bits)] = self.bits
+            self.first_doc_id, self.bits = first, bits
+        positions = doc_ids - self.first_doc_id
+        added = int(np.count_nonzero(~self.bits[positions]))
+        self.bits[positions] = True
+        return added
+
+    def __contains__(self, doc_id):
+        position = doc_id - self.first_doc_id
+        return 0 <= position < len(self.bits) and bool(self.bits[position])
+
+    def __len__(self):
+        """Banyaknya docID yang dihapus"""
+        return int(np.count_nonzero(self.bits))
+
+    def doc_ids(self):
+        """docID yang dihapus (terurut)"""
+        return np.flatnonzero(self.bits) + self.first_doc_id
+
+
+if __name__ == '__main__':
+
+    import tempfile
+
+    tombstones = Tombstones()
+    assert tombstones.add([12, 10]) == 2 and tombstones.add([10]) == 0, "banyaknya docID yang ditandai salah"
+    assert tombstones.add([3, 20]) == 2, "bitmap harus bisa diperluas ke dua arah"
+    assert 3 in tombstones and 12 in tombstones and 11 not in tombstones and 100 not in tombstones, "__contains__ salah"
+    assert tombstones.doc_ids().tolist() == [3, 10, 12, 20] and len(tombstones) == 4, "doc_ids salah"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = tombstones_path('test', tmp)
+        tombstones.save(path)
+        loaded = Tombstones.load(path)
+        assert loaded.first_doc_id == 3 and loaded.doc_ids().tolist() == [3, 10, 12, 20], "tombstone yang dimuat salah"
+        assert os.path.getsize(path) == HEADER.size + 3, "bitmap harus disimpan 1 bit per docID"
+
+    # compaction setelah semua dokumen dihapus: merged index kosong, bukan error
+    from .bsbi import BSBIIndex
+    with tempfile.TemporaryDirectory() as tmp:
+        # path dokumen di doc_id_map harus relatif (lihat docstore.split_path)
+        data_dir, output_dir = os.path.relpath(os.path.join(tmp, 'collection')), os.path.join(tmp, 'index')
+        documents = {os.path.join(data_dir, '1', 'a.txt'): "lipid metabolism in toxemia",
+                     os.path.join(data_dir, '2', 'b.txt'): "normal pregnancy"}
+        for path, text in documents.items():
+            os.makedirs(os.path.dirname(path), exist_ok = True)
+            with open(path, 'w') as f:
+                f.write(text)
+        os.mkdir(output_dir)
+        BSBIIndex(data_dir, output_dir).index()
+        assert BSBIIndex(data_dir, output_dir).delete_documents(list(documents)) == 2, "semua dokumen harus dihapus"
+        assert BSBIIndex(data_dir, output_dir).compact(), "compaction harus berjalan"
+        bsbi = BSBIIndex(data_dir, output_dir).open()
+        assert bsbi.retrieve_bm25('lipid') == [] and bsbi.retrieve_tfidf('lipid') == [], "index hasil compaction harus kosong"
+        bsbi.close()
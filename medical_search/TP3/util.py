@@ -1,4 +1,5 @@
 from numpy import append
+import numpy as np
 
 
 class IdMap:
@@ -71,6 +72,15 @@ class IdMap:
         else:
             raise TypeError
 
+    def get(self, s, default=None):
+        """
+        Mengembalikan integer id dari string s TANPA menambahkan entry baru
+        ketika s belum ada di IdMap (berbeda dengan __getitem__). Cocok
+        dipakai saat query time, karena IdMap yang dipakai bersama oleh banyak
+        thread tidak boleh dimodifikasi oleh term query yang tidak dikenal.
+        """
+        return self.str_to_id.get(s, default)
+
 def sorted_merge_posts_and_tfs(posts_tfs1, posts_tfs2):
     """
     Menggabung (merge) dua lists of tuples (doc id, tf) dan mengembalikan
@@ -119,6 +129,41 @@ def sorted_merge_posts_and_tfs(posts_tfs1, posts_tfs2):
         
     return merged_list
 
+def sorted_merge_postings(parts):
+    """
+    k-way merge beberapa postings list (beserta TF list-nya) sekaligus.
+    Seperti sorted_merge_posts_and_tfs, TF diakumulasikan untuk docID yang
+    sama, tetapi semua list digabung dalam satu langkah (bukan berpasangan).
+
+    Jika rentang docID setiap postings list saling lepas dan terurut sesuai
+    urutan parts (kasus intermediate indices BSBI, karena docID diberikan
+    block demi block), semua list cukup disambung. Jika tidak, list
+    disambung lalu diurutkan dan TF dijumlahkan secara vectorized (NumPy).
+
+    Parameters
+    ----------
+    parts: List[Tuple[List[int], List[int]]]
+        list of (postings_list, tf_list), masing-masing postings_list
+        terurut menaik
+
+    Returns
+    -------
+    Tuple[List[int], List[int]]
+        postings_list dan tf_list hasil penggabungan
+    """
+    parts = [(postings, tfs) for postings, tfs in parts if len(postings) > 0]
+    if len(parts) == 1:
+        return list(parts[0][0]), list(parts[0][1])
+    postings = [doc_id for postings, _ in parts for doc_id in postings]
+    tfs = [tf for _, tfs in parts for tf in tfs]
+    if all(parts[i][0][-1] < parts[i + 1][0][0] for i in range(len(parts) - 1)):
+        return postings, tfs
+    postings, tfs = np.array(postings, dtype=np.int64), np.array(tfs, dtype=np.int64)
+    order = np.argsort(postings, kind='stable')
+    postings, tfs = postings[order], tfs[order]
+    starts = np.flatnonzero(np.concatenate(([True], postings[1:] != postings[:-1])))
+    return postings[starts].tolist(), np.add.reduceat(tfs, starts).tolist()
+
 def test(output, expected):
     """ simple function for testing """
     return "PASSED" if output == expected else "FAILED"
@@ -138,6 +183,14 @@ if __name__ == '__main__':
             "/collection/1/data53.txt"]
     doc_id_map = IdMap()
     assert [doc_id_map[docname] for docname in docs] == [0, 1, 2], "docs_id salah"
+    assert doc_id_map.get("/collection/2/data99.txt") is None, "get tidak boleh menambah entry"
+    assert len(doc_id_map) == 3, "get tidak boleh menambah entry"
 
     assert sorted_merge_posts_and_tfs([(1, 34), (3, 2), (4, 23)], \
                                       [(1, 11), (2, 4), (4, 3 ), (6, 13)]) == [(1, 45), (2, 4), (3, 2), (4, 26), (6, 13)], "sorted_merge_posts_and_tfs salah"
+
+    assert sorted_merge_postings([([1, 3, 4], [34, 2, 23]), ([1, 2, 4, 6], [11, 4, 3, 13])]) \
+           == ([1, 2, 3, 4, 6], [45, 4, 2, 26, 13]), "sorted_merge_postings salah"
+    assert sorted_merge_postings([([1, 2], [1, 1]), ([], []), ([5, 9], [2, 3]), ([10], [4])]) \
+           == ([1, 2, 5, 9, 10], [1, 1, 2, 3, 4]), "sorted_merge_postings salah untuk rentang docID yang saling lepas"
+    assert sorted_merge_postings([]) == ([], []), "sorted_merge_postings salah untuk list kosong"
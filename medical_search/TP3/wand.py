@@ -0,0 +1,237 @@
+"""
+Evaluasi query document-at-a-time (DaaT) dengan dynamic pruning WAND
+(Weak AND, Broder et al., 2003).
+
+Setiap term query mempunyai cursor pada postings list-nya (lihat
+PostingsCursor di index.py) dan upper bound kontribusi score-nya. Selama
+top-K belum penuh, semua dokumen dievaluasi. Setelah penuh, dokumen hanya
+dievaluasi jika jumlah upper bound term-term yang mungkin memuatnya melebihi
+score terkecil di top-K (threshold); dokumen lain dilewati tanpa menghitung
+score-nya.
+
+Urutan ranking sama dengan evaluasi exhaustive (ScoreAccumulator.top_k):
+score mengecil, docID lebih kecil didahulukan jika score sama. Karena docID
+diproses secara menaik, dokumen baru dengan score SAMA dengan threshold tidak
+mungkin menggeser dokumen di top-K, sehingga pruning dengan perbandingan
+strict (>) tetap exact.
+
+Block-Max WAND (Ding & Suel, 2011) memakai index yang ditulis per block
+(lihat atribut blocks pada InvertedIndex): setelah pivot ditemukan dengan
+upper bound global, bound dipertajam dengan max_score block-block yang
+mungkin memuat pivot. Jika bound block tidak melebihi threshold, seluruh sisa
+block tersebut dilewati sekaligus.
+"""
+
+import heapq
+
+# toleransi pembulatan floating point pada upper bound
+UPPER_BOUND_SLACK = 1 + 1e-9
+
+
+def wand(cursors, upper_bounds, contribution, k):
+    """
+    Parameters
+    ----------
+    cursors: List[PostingsCursor]
+        satu cursor untuk setiap term query, sesuai urutan term di query
+    upper_bounds: List[float]
+        upper bound kontribusi score setiap term
+    contribution: Callable[[int, int, int], float]
+        contribution(i, doc, tf) mengembalikan kontribusi score term ke-i
+        untuk dokumen doc dengan term frequency tf
+    k: int
+        banyaknya dokumen yang dikembalikan
+
+    Returns
+    -------
+    Tuple[List[(float, int)], int]
+        top-K (score, docID) terurut mengecil berdasarkan score, dan banyaknya
+        posting yang dievaluasi (dihitung kontribusi score-nya)
+    """
+    upper_bounds = [upper_bound * UPPER_BOUND_SLACK for upper_bound in upper_bounds]
+    heap = []       # min-heap of (score, -docID): elemen teratas adalah dokumen "terburuk" di top-K
+    evaluated = 0
+    if k <= 0:
+        return [], evaluated
+
+    while True:
+        active = sorted((i for i in range(len(cursors)) if cursors[i].doc is not None), key=lambda i: cursors[i].doc)
+        threshold = heap[0][0] if len(heap) == k else float('-inf')
+
+        # cari pivot: term pertama (urut docID) dimana akumulasi upper bound > threshold
+        pivot = None
+        bound = 0
+        for j, i in enumerate(active):
+            bound += upper_bounds[i]
+            if bound > threshold:
+                pivot = j
+                break
+        if pivot is None:
+            break
+        pivot_doc = cursors[active[pivot]].doc
+
+        if cursors[active[0]].doc == pivot_doc:
+            # semua cursor sebelum pivot sudah berada di pivot_doc: evaluasi penuh.
+            # Kontribusi dijumlahkan sesuai urutan term query, sama seperti TaaT.
+            score = 0.0
+            for i, cursor in enumerate(cursors):
+                if cursor.doc == pivot_doc:
+                    score += contribution(i, pivot_doc, cursor.tf)
+                    evaluated += 1
+                    cursor.next()
+            if len(heap) < k:
+                heapq.heappush(heap, (score, -pivot_doc))
+            elif score > heap[0][0]:
+                heapq.heapreplace(heap, (score, -pivot_doc))
+        else:
+            # dokumen sebelum pivot_doc tidak mungkin melebihi threshold
+            for i in active[:pivot]:
+                cursors[i].next_geq(pivot_doc)
+
+    top = sorted(((score, -neg_doc) for score, neg_doc in heap), key=lambda x: (-x[0], x[1]))
+    return top, evaluated
+
+
+def block_max_wand(cursors, upper_bounds, weights, contribution, k):
+    """
+    Sama seperti wand, dengan tambahan pruning per block (Block-Max WAND).
+
+    Parameters
+    ----------
+    cursors: List[BlockPostingsCursor]
+        cursor yang menyediakan block_for, block_last_doc, dan block_max_score
+        (PostingsCursor juga bisa dipakai; seluruh list dianggap satu block)
+    upper_bounds: List[float]
+        upper bound kontribusi score setiap term (untuk seluruh postings list)
+    weights: List[float]
+        faktor pengali max_score block untuk setiap term (misal IDF), sehingga
+        upper bound sebuah block = weights[i] * block_max_score. Jika
+        max_score block tidak diketahui (None), dipakai upper_bounds[i].
+    contribution, k:
+        lihat wand
+
+    Returns
+    -------
+    Tuple[List[(float, int)], int]
+        lihat wand
+    """
+    upper_bounds = [upper_bound * UPPER_BOUND_SLACK for upper_bound in upper_bounds]
+    weights = [weight * UPPER_BOUND_SLACK for weight in weights]
+    heap = []
+    evaluated = 0
+    if k <= 0:
+        return [], evaluated
+
+    def block_bound(i, block):
+        max_score = cursors[i].block_max_score(block)
+        return upper_bounds[i] if max_score is None else weights[i] * max_score
+
+    while True:
+        active = sorted((i for i in range(len(cursors)) if cursors[i].doc is not None), key=lambda i: cursors[i].doc)
+        threshold = heap[0][0] if len(heap) == k else float('-inf')
+
+        pivot = None
+        bound = 0
+        for j, i in enumerate(active):
+            bound += upper_bounds[i]
+            if bound > threshold:
+                pivot = j
+                break
+        if pivot is None:
+            break
+        pivot_doc = cursors[active[pivot]].doc
+        # term-term setelah pivot yang juga berada di pivot_doc ikut diperhitungkan
+        while pivot + 1 < len(active) and cursors[active[pivot + 1]].doc == pivot_doc:
+            pivot += 1
+
+        # bound yang lebih tajam: max_score block yang mungkin memuat pivot_doc
+        blocks = [cursors[i].block_for(pivot_doc) for i in active[:pivot + 1]]
+        if sum(block_bound(i, block) for i, block in zip(active, blocks)) > threshold:
+            if cursors[active[0]].doc == pivot_doc:
+                score = 0.0
+                for i, cursor in enumerate(cursors):
+                    if cursor.doc == pivot_doc:
+                        score += contribution(i, pivot_doc, cursor.tf)
+                        evaluated += 1
+                        cursor.next()
+                if len(heap) < k:
+                    heapq.heappush(heap, (score, -pivot_doc))
+                elif score > heap[0][0]:
+                    heapq.heapreplace(heap, (score, -pivot_doc))
+            else:
+                for i in active[:pivot]:
+                    cursors[i].next_geq(pivot_doc)
+        else:
+            # tidak ada dokumen sampai akhir block terpendek (dan sebelum docID
+            # cursor berikutnya) yang bisa melebihi threshold: lewati sekaligus
+            # (block cursor pivot selalu ada karena cursor tersebut berada di pivot_doc)
+            last_docs = [cursors[i].block_last_doc(block) for i, block in zip(active, blocks)]
+            next_doc = min(last_doc for last_doc in last_docs if last_doc is not None) + 1
+            if pivot + 1 < len(active):
+                next_doc = min(next_doc, cursors[active[pivot + 1]].doc)
+            for i in active[:pivot + 1]:
+                cursors[i].next_geq(next_doc)
+
+    top = sorted(((score, -neg_doc) for score, neg_doc in heap), key=lambda x: (-x[0], x[1]))
+    return top, evaluated
+
+
+if __name__ == '__main__':
+
+    from .index import PostingsCursor
+
+    postings = [[1, 3, 5, 7, 9], [2, 3, 8], [3, 9]]
+    tfs = [[1, 1, 1, 1, 5], [2, 2, 2], [1, 1]]
+    weights = [1.0, 2.0, 3.0]
+    def contribution(i, doc, tf):
+        return weights[i] * tf
+
+    exhaustive = {}
+    for i in range(3):
+        for doc, tf in zip(postings[i], tfs[i]):
+            exhaustive[doc] = exhaustive.get(doc, 0.0) + contribution(i, doc, tf)
+    expected = sorted(((score, doc) for doc, score in exhaustive.items()), key=lambda x: (-x[0], x[1]))
+
+    for k in range(1, 9):
+        cursors = [PostingsCursor(p, t) for p, t in zip(postings, tfs)]
+        upper_bounds = [weights[i] * max(tfs[i]) for i in range(3)]
+        top, evaluated = wand(cursors, upper_bounds, contribution, k)
+        assert top == expected[:k], "hasil WAND berbeda dengan exhaustive"
+        assert evaluated <= sum(len(p) for p in postings), "jumlah posting yang dievaluasi salah"
+        cursors = [PostingsCursor(p, t, max_score = max(t)) for p, t in zip(postings, tfs)]
+        top, _ = block_max_wand(cursors, upper_bounds, weights, contribution, k)
+        assert top == expected[:k], "hasil Block-Max WAND berbeda dengan exhaustive"
+
+    # Block-Max WAND pada index yang ditulis per block
+    import random
+    import tempfile
+    from .index import InvertedIndexWriter, InvertedIndexReader
+    from .compression import VBEPostings
+
+    random.seed(0)
+    postings = [sorted(random.sample(range(500), n)) for n in [300, 60, 150]]
+    tfs = [[random.randint(1, 10) for _ in p] for p in postings]
+    def contribution(i, doc, tf):
+        return weights[i] * tf / (tf + 1 + doc % 7)
+
+    exhaustive = {}
+    for i in range(3):
+        for doc, tf in zip(postings[i], tfs[i]):
+            exhaustive[doc] = exhaustive.get(doc, 0.0) + contribution(i, doc, tf)
+    expected = sorted(((score, doc) for doc, score in exhaustive.items()), key=lambda x: (-x[0], x[1]))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with InvertedIndexWriter('test', VBEPostings, directory = tmp, block_size = 16) as index:
+            for i in range(3):
+                index.append(i, postings[i], tfs[i], impacts = [contribution(i, doc, tf) / weights[i] \
+                                                                for doc, tf in zip(postings[i], tfs[i])])
+        with InvertedIndexReader('test', VBEPostings, directory = tmp, use_mmap = True) as index:
+            for k in [1, 5, 10, 50, 1000]:
+                upper_bounds = [weights[i] * index.max_score[i] for i in range(3)]
+                top, _ = wand([index.cursor(i) for i in range(3)], upper_bounds, contribution, k)
+                assert top == expected[:k], "hasil WAND berbeda dengan exhaustive (block)"
+                cursors = [index.cursor(i) for i in range(3)]
+                top, evaluated = block_max_wand(cursors, upper_bounds, weights, contribution, k)
+                assert top == expected[:k], "hasil Block-Max WAND berbeda dengan exhaustive (block)"
+            assert evaluated == sum(len(p) for p in postings), "k besar harus mengevaluasi semua posting"
+            del cursors # cursor memegang slice mmap, harus dilepas sebelum reader ditutup
@@ -1,7 +1,6 @@
-import os
 import time
 from django.shortcuts import render
-from .TP3.search import search_bm25
+from .TP3.search import search_bm25, document_content
 
 # Create your views here.
 def search(request):
@@ -17,44 +16,39 @@ def search(request):
         response = {'message': 'Welcome to Medical Search!\nType something in the search box and get the result!'}
         return render(request, 'index.html', response)
 
-    document_path_and_content = search_bm25(query)
+    if not str(page).isnumeric() or int(page) < 1:
+        page = 1
+
+    # hanya halaman yang ditampilkan yang diambil dari search engine
+    total_docs, hits = search_bm25(query, (int(page)-1)*10, 10)
 
-    if len(document_path_and_content) == 0:
+    if total_docs == 0:
         response = {'message': 'Your search did not match any documents'}
         return render(request, 'index.html', response)
     
-    total_page = len(document_path_and_content)//10 + 1
+    total_page = total_docs//10 + 1
 
-    if not page.isnumeric():
-        page = 1          
-    elif (int(page) > total_page):
+    if (int(page) > total_page):
         page = total_page
-    elif (int(page) < 1):
-        page = 1
+        total_docs, hits = search_bm25(query, (int(page)-1)*10, 10)
 
-    first_index = (int(page)-1)*10
-    last_index = (int(page)-1)*10 + 10 if ((int(page)-1)*10 + 10 < len(document_path_and_content)) else len(document_path_and_content)
     end = time.time()
     response = {
-        'document_path_and_content': document_path_and_content[first_index:last_index],
+        # snippet setiap hit dibuat saat template dirender
+        'hits': hits,
         'curr_page': int(page),
         'prev_page': int(page)-1,
         'next_page': int(page)+1,
         'total_page': total_page,
-        'total_docs': len(document_path_and_content),
+        'total_docs': total_docs,
         'query': query,
         'time': "{:.2f}".format(end-start),
     }
     return render(request, 'index.html', response)
 
 def view_content(request, path1, path2, path3):
-    FILE_DIR = os.path.dirname(os.path.abspath(__file__))
-    PARENT_DIR = os.path.join(FILE_DIR, os.pardir)
-    doc_path = os.path.join(PARENT_DIR, path1, path2, path3)
-
-    doc_content = ""
-    with open(os.path.join(doc_path), 'r') as f:
-        doc_content = f.read()
+    # isi dokumen dibaca dari document store index (lihat TP3/docstore.py)
+    doc_content = document_content('/'.join([path1, path2, path3]))
     response = {'doc_content': doc_content, 'title': path3}
     return render(request, 'content.html', response)
 
@@ -120,6 +120,12 @@ USE_I18N = True
 USE_TZ = True
 
 
+# Cache hasil query search engine (lihat medical_search/TP3/cache.py):
+# 'local' (di memori setiap worker), 'django' (memakai CACHES), atau None
+SEARCH_RESULT_CACHE = 'local'
+SEARCH_RESULT_CACHE_TTL = 3600
+
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/4.1/howto/static-files/
 